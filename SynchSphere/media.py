@@ -0,0 +1,145 @@
+"""Serves user uploads under MEDIA_URL.
+
+Answers conditional requests with 304, single byte ranges with 206, and
+marks content-hashed names (the processed avatars) as immutable so
+browsers never ask for them again. With ``MEDIA_SERVING['OFFLOAD']`` set,
+the view only resolves the path and hands the transfer to the front
+server with X-Accel-Redirect (nginx) or X-Sendfile (Apache, lighttpd),
+so no worker is tied up streaming bytes.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_http_methods
+
+# Processed avatars only: "avatars/<24 hex digits>-96.webp" (see homepage/avatars.py)
+HASHED_NAME = re.compile(r'^avatars/[0-9a-f]{24}(?:-\d+)?\.\w+$')
+# Uploads waiting for a background job (see homepage/importer.py), never served
+PRIVATE_DIRS = ('imports/',)
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _options():
+    options = {'OFFLOAD': '', 'ACCEL_PREFIX': '/protected-media/', 'MAX_AGE': 3600, 'HASHED_MAX_AGE': 31536000}
+    options.update(getattr(settings, 'MEDIA_SERVING', {}))
+    return options
+
+
+def _cache_control(path, options):
+    if HASHED_NAME.match(path):
+        return f"public, max-age={options['HASHED_MAX_AGE']}, immutable"
+    return f"public, max-age={options['MAX_AGE']}"
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single "bytes=" range, or None to send everything.
+
+    Raises ValueError if the range can't be satisfied. Multi-range
+    requests get the whole file, which RFC 9110 allows.
+    """
+    match = _RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the final ``last`` bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    """RFC 9110 If-Range: serve the range only if the validator still matches"""
+    validator = request.headers.get('If-Range')
+    if validator is None:
+        return True
+    if validator.startswith(('"', 'W/')):
+        return validator == etag
+    return parse_http_date_safe(validator) == mtime
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _file_response(request, full_path, size, content_type, etag, mtime):
+    header = request.headers.get('Range')
+    byte_range = None
+    if header and _if_range_matches(request, etag, mtime):
+        try:
+            byte_range = parse_range(header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None or byte_range == (0, size - 1):
+        # FileResponse lets the WSGI server use sendfile() where it can
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(full_path, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_http_methods(['GET', 'HEAD'])
+def serve_media(request, path):
+    """The file at ``path`` under MEDIA_ROOT"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        info = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404('Not found')
+    relative = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    if not stat.S_ISREG(info.st_mode) or relative.startswith(PRIVATE_DIRS):
+        raise Http404('Not found')
+
+    options = _options()
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    mtime = int(info.st_mtime)
+    etag = f'"{info.st_mtime_ns:x}-{info.st_size:x}"'
+
+    if options['OFFLOAD']:
+        # The front server answers ranges and conditional requests itself
+        response = HttpResponse(content_type=content_type)
+        if options['OFFLOAD'] == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = options['ACCEL_PREFIX'] + quote(path)
+        else:
+            response['X-Sendfile'] = full_path
+    else:
+        response = get_conditional_response(request, etag=etag, last_modified=mtime)
+        if response is None:
+            response = _file_response(request, full_path, info.st_size, content_type, etag, mtime)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Cache-Control'] = _cache_control(path, options)
+    return response
@@ -0,0 +1,86 @@
+"""Project middleware"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+# Bytes read per trip to a worker thread when streaming a sync iterator
+STREAM_BATCH_SIZE = 256 * 1024
+
+
+def _next_batch(iterator):
+    parts, size = [], 0
+    for part in iterator:
+        parts.append(part)
+        size += len(part)
+        if size >= STREAM_BATCH_SIZE:
+            break
+    return b''.join(parts)
+
+
+async def _aiterate(iterator):
+    while True:
+        batch = await sync_to_async(_next_batch)(iterator)
+        if not batch:
+            return
+        yield batch
+
+
+class AsyncStreamingMiddleware:
+    """Streams sync-iterator responses under ASGI instead of buffering them.
+
+    Django reads a StreamingHttpResponse built on a sync iterator (the
+    calendar feed, FileResponse for media and static files) into one list
+    before sending it when running under ASGI. This hands the iterator to
+    the server a batch at a time instead, so memory stays bounded by the
+    batch size. Under WSGI it does nothing.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.streaming and not response.is_async:
+            # The original iterator stays registered for response.close()
+            response.streaming_content = _aiterate(iter(response.streaming_content))
+        return response
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """WhiteNoise that stays on the event loop under ASGI.
+
+    The stock middleware is sync-only, so Django would run every request
+    below it (async views included) through a thread. Looking a path up is
+    a dictionary hit; only serving a static file leaves the loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
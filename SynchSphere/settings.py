@@ -41,7 +41,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    'SynchSphere.middleware.AsyncStreamingMiddleware',  # Above WhiteNoise so static files stream too
+    "SynchSphere.middleware.WhiteNoiseMiddleware",  # Async-capable subclass for ASGI
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -163,17 +164,66 @@ except (OSError, PermissionError) as e:
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Caching configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-        'TIMEOUT': 300,  # 5 minutes default
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000
+# The cache must be shared by every process (web workers, runworker,
+# dispatch_reminders): the tiered cache's invalidation broadcast goes
+# through it. Set REDIS_URL to use Redis; otherwise the database
+# cache is used (create its table with `python manage.py createcachetable`).
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'TIMEOUT': 300,  # 5 minutes default
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'synchsphere_cache',
+            'TIMEOUT': 300,  # 5 minutes default
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000
+            }
         }
     }
+
+# In-process LRU tier in front of the shared cache (see homepage/cache.py).
+# Entries live for LOCAL_TTL seconds; each worker checks for invalidations
+# broadcast by other workers at most every SYNC_INTERVAL seconds.
+TIERED_CACHE = {
+    'LOCAL_TTL': int(os.environ.get("TIERED_CACHE_LOCAL_TTL", "5")),
+    'LOCAL_MAX_ENTRIES': 1024,
+    'SYNC_INTERVAL': float(os.environ.get("TIERED_CACHE_SYNC_INTERVAL", "1.0")),
+}
+
+# Notification retention (python manage.py purge_notifications).
+# Rows older than DAYS[notification_type] are moved to NotificationArchive
+# (MODE "archive") or removed (MODE "delete") in primary-key-ordered chunks,
+# sleeping SLEEP seconds between chunks to keep lock times short.
+NOTIFICATION_RETENTION = {
+    'DAYS': {
+        'event_invitation': 180,
+        'event': 90,
+        'reminder': 30,
+        'system': 90,
+    },
+    'MODE': os.environ.get("NOTIFICATION_RETENTION_MODE", "archive"),
+    'CHUNK_SIZE': 500,
+    'SLEEP': 0.1,
+}
+
+# Notification coalescing: a new notification of one of these types for the
+# same user and event merges into an unread one created within the window.
+NOTIFICATION_COALESCE = {
+    'WINDOW_MINUTES': 60,
+    'TYPES': ['event', 'event_invitation', 'reminder'],
 }
 
+# Reminder offsets (minutes before start) for users without a profile setting
+DEFAULT_REMINDER_OFFSETS = [10, 1440]
+
 # ✅ Email configuration
 if DEBUG:
     EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
@@ -188,6 +238,69 @@ EMAIL_HOST_USER = os.getenv("EMAIL_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_PASS")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Email delivery worker (python manage.py deliver_notifications).
+# Failed sends are retried with exponential backoff starting at
+# BACKOFF_SECONDS, up to MAX_ATTEMPTS before the notification is marked failed.
+NOTIFICATION_DELIVERY = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_SECONDS': 60,
+    'LEASE_SECONDS': 300,
+}
+
+# Background job queue (python manage.py runworker). Failed jobs are retried
+# with exponential backoff up to MAX_ATTEMPTS. EAGER runs jobs in-process
+# right after the request's transaction commits, for setups without a worker.
+JOB_QUEUE = {
+    'MAX_ATTEMPTS': 3,
+    'BACKOFF_SECONDS': 30,
+    'LEASE_SECONDS': 300,
+    'EAGER': os.getenv('JOB_QUEUE_EAGER', 'False') == 'True',
+}
+
+# Meeting slot finder (/homepage/api/meeting-slots/). Working hours are
+# applied in each participant's own profile timezone, Monday to Friday.
+SLOT_FINDER = {
+    'WORK_START_HOUR': 9,
+    'WORK_END_HOUR': 17,
+    'STEP_MINUTES': 15,
+    'MAX_RESULTS': 10,
+}
+
+# User autocomplete on the invite fields (/homepage/api/search-users/).
+# Results are cached per prefix for CACHE_TIMEOUT seconds. Directories of
+# up to LOCAL_INDEX_MAX_USERS users are searched in-process instead (0 = off),
+# with the in-process index rebuilt at least every LOCAL_INDEX_TTL seconds.
+USER_SEARCH = {
+    'CACHE_TIMEOUT': 60,
+    'LOCAL_INDEX_MAX_USERS': int(os.environ.get("USER_SEARCH_LOCAL_INDEX_MAX_USERS", "0")),
+    'LOCAL_INDEX_TTL': 300,
+}
+
+# Avatar processing (homepage/avatars.py). Uploads are turned into square
+# WebP + JPEG/PNG thumbnails by the worker in a pool of PROCESSES processes
+# (0 renders in the worker itself). SIZES cover the 40px sidebar and 96px
+# profile images at 1x and 2x.
+AVATARS = {
+    'SIZES': (40, 80, 96, 192),
+    'ORIGINAL_SIZE': 512,
+    'PROCESSES': int(os.getenv('AVATAR_PROCESSES', 2)),
+    'MAX_PIXELS': 40_000_000,
+}
+
+# Media serving (SynchSphere/media.py). Content-hashed names such as the
+# processed avatars are cached for HASHED_MAX_AGE seconds as immutable,
+# anything else for MAX_AGE. Set MEDIA_OFFLOAD to "x-accel-redirect"
+# (nginx, with an internal location at ACCEL_PREFIX aliased to MEDIA_ROOT)
+# or "x-sendfile" (Apache mod_xsendfile, lighttpd) to let the front server
+# send the bytes.
+MEDIA_SERVING = {
+    'OFFLOAD': os.getenv('MEDIA_OFFLOAD', ''),
+    'ACCEL_PREFIX': '/protected-media/',
+    'MAX_AGE': 3600,
+    'HASHED_MAX_AGE': 31536000,
+}
+
 # WhiteNoise: serve compressed static files
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
@@ -2,8 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 from django.conf import settings
-from django.conf.urls.static import static
-from . import realtime
+from . import media, realtime
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -13,6 +12,7 @@ urlpatterns = [
     path('events/', realtime.event_stream, name='events'),
 ]
 
-# Serve media files (in production, consider using cloud storage or nginx)
-# For now, serve via Django - in production, configure your web server to serve /media/
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# User uploads; see MEDIA_SERVING in settings.py for handing the transfer to nginx/Apache
+urlpatterns += [
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", media.serve_media, name='media'),
+]
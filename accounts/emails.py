@@ -0,0 +1,28 @@
+"""Case-insensitive email lookups.
+
+auth_user.email is neither unique nor indexed, and addresses are stored as
+typed. Lookups here compare ``lower(email)`` so "Bob@Example.com" matches
+"bob@example.com", and are served by the ``auth_user_email_lower_idx``
+expression index added in accounts/migrations/0002.
+"""
+from django.contrib.auth.models import User
+from django.db.models.functions import Lower
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def users_with_emails(emails):
+    """Users whose address matches any of ``emails``, ignoring case"""
+    normalized = {normalize_email(email) for email in emails} - {''}
+    # Filter on the same expression the index is built on so it can be used
+    return User.objects.alias(email_lower=Lower('email')).filter(email_lower__in=normalized)
+
+
+def email_in_use(email, exclude_id=None):
+    """Whether another account (not ``exclude_id``) already uses ``email``"""
+    users = users_with_emails([email])
+    if exclude_id is not None:
+        users = users.exclude(id=exclude_id)
+    return users.exists()
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, SetPasswordForm
 from django.contrib.auth.models import User
+from .emails import email_in_use
 from .models import SecurityQuestion, UserSecurityAnswer
 
 class SignUpForm(UserCreationForm):
@@ -17,7 +18,7 @@ class SignUpForm(UserCreationForm):
 
     def clean_email(self):
         email = self.cleaned_data.get("email")
-        if User.objects.filter(email=email).exists():
+        if email_in_use(email):
             raise forms.ValidationError("This email address is already registered.")
         return email
 
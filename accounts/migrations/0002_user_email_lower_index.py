@@ -0,0 +1,29 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def email_index():
+    return models.Index(Lower('email'), name='auth_user_email_lower_idx')
+
+
+def add_email_index(apps, schema_editor):
+    # auth_user belongs to django.contrib.auth, so the index is created here
+    # rather than declared in a model's Meta. Building it indexes every
+    # existing row.
+    schema_editor.add_index(apps.get_model('auth', 'User'), email_index())
+
+
+def remove_email_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), email_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_index, remove_email_index),
+    ]
@@ -10,6 +10,7 @@ pip install --no-cache-dir whitenoise
 echo "==> Running database migrations"
 python manage.py migrate accounts 0001 --fake --noinput
 python manage.py migrate --noinput
+python manage.py createcachetable
 echo "==> Populating security questions"
 python manage.py populate_security_questions
 echo "==> Collecting static files"
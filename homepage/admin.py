@@ -1,9 +1,14 @@
 from django.contrib import admin
-from .models import Event, Reminder, Notification, UserProfile
+from .models import Event, EventOccurrenceOverride, EventPurge, Job, Reminder, Notification, NotificationArchive, NotificationCounter, UserProfile
 
 admin.site.register(Event)
 admin.site.register(Reminder)
 admin.site.register(Notification)
 admin.site.register(UserProfile)
+admin.site.register(NotificationCounter)
+admin.site.register(NotificationArchive)
 
 
+admin.site.register(Job)
+admin.site.register(EventPurge)
+admin.site.register(EventOccurrenceOverride)
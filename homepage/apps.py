@@ -1,8 +1,26 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def _ensure_search_index(sender, using, **kwargs):
+    from django.db import connections
+    from .search import install_search_index
+    connection = connections[using]
+    # Skipped when migrating homepage back to zero
+    if 'homepage_event' in connection.introspection.table_names():
+        install_search_index(connection)
 
 
 class HomepageConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'homepage'
 
+    def ready(self):
+        from django.contrib.auth.models import User
+        from . import checks  # noqa: F401 (registers the system checks)
+        from .directory import user_deleted, user_saved
 
+        post_migrate.connect(_ensure_search_index, sender=self)
+        # Keep the autocomplete index in step with every way a user is saved
+        post_save.connect(user_saved, sender=User, dispatch_uid='homepage_user_search_save')
+        post_delete.connect(user_deleted, sender=User, dispatch_uid='homepage_user_search_delete')
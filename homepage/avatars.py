@@ -0,0 +1,139 @@
+"""Avatar processing.
+
+Uploads are saved as-is by the profile form and a ``process_avatar`` job
+is queued. The job renders the image in a process pool (Pillow work is
+CPU-bound and would otherwise hold the worker's GIL) into a cleaned
+original and square thumbnails in WebP plus JPEG/PNG, all with metadata
+stripped. Files are named after a hash of the upload, e.g.
+``avatars/<digest>-96.webp``, so they never change once written and can be
+served with an immutable Cache-Control header.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image
+
+from .imaging import render_avatar
+from .models import UserProfile
+from .utils import invalidate_user_cache
+
+logger = logging.getLogger(__name__)
+
+AVATAR_DIR = 'avatars'
+
+
+def _options():
+    options = {'SIZES': (40, 80, 96, 192), 'ORIGINAL_SIZE': 512, 'PROCESSES': 2, 'MAX_PIXELS': 40_000_000}
+    options.update(getattr(settings, 'AVATARS', {}))
+    return options
+
+
+_pool = {'executor': None}
+_pool_lock = threading.Lock()
+
+
+def _executor(processes):
+    with _pool_lock:
+        if _pool['executor'] is None:
+            # spawn, not fork: the worker process is multi-threaded
+            _pool['executor'] = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'))
+        return _pool['executor']
+
+
+def _render(data, options):
+    args = (data, tuple(options['SIZES']), options['ORIGINAL_SIZE'], options['MAX_PIXELS'])
+    if not options['PROCESSES']:
+        return render_avatar(*args)
+    try:
+        return _executor(options['PROCESSES']).submit(render_avatar, *args).result()
+    except BrokenProcessPool:
+        # A child died (out of memory, killed); start a fresh pool next time
+        with _pool_lock:
+            _pool['executor'] = None
+        raise
+
+
+def thumbnail_for(thumbnails, size):
+    """The smallest variant of at least ``size`` px (else the largest), or None"""
+    if not thumbnails:
+        return None
+    sizes = sorted(thumbnails)
+    return thumbnails[next((candidate for candidate in sizes if candidate >= size), sizes[-1])]
+
+
+def _stored_names(avatar_name, variants):
+    names = [name for formats in (variants or {}).values() for name in formats.values()]
+    if avatar_name:
+        names.append(avatar_name)
+    return names
+
+
+def _delete_unreferenced(storage, avatar_name, variants):
+    """Delete an avatar's files unless another profile shows the same image"""
+    if not avatar_name or UserProfile.objects.filter(avatar=avatar_name).exists():
+        return
+    for name in _stored_names(avatar_name, variants):
+        storage.delete(name)
+
+
+def _save(storage, name, content):
+    if storage.exists(name):
+        return  # Content-addressed: an existing file already has these bytes
+    saved = storage.save(name, ContentFile(content))
+    if saved != name:
+        # Lost a race with another job writing the same file
+        storage.delete(saved)
+
+
+def process_avatar(profile_id, name, previous=None, previous_variants=None):
+    """Render ``name`` for the profile and swap it in.
+
+    Does nothing if the profile has had another avatar uploaded since.
+    ``previous`` and ``previous_variants`` are the files the upload
+    replaced; they are removed once the new avatar is in place.
+    """
+    profile = UserProfile.objects.filter(id=profile_id).first()
+    if profile is None or profile.avatar.name != name:
+        return
+    storage = profile.avatar.storage
+    options = _options()
+    with storage.open(name, 'rb') as upload:
+        data = upload.read()
+
+    try:
+        digest, (original_format, original), thumbnails = _render(data, options)
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as exc:
+        # Not an image Pillow can safely decode; retrying won't help
+        logger.warning('Dropping avatar %s for profile %s: %s', name, profile_id, exc)
+        if UserProfile.objects.filter(id=profile_id, avatar=name).update(avatar=None, avatar_variants={}, updated_at=timezone.now()):
+            storage.delete(name)
+            invalidate_user_cache(profile.user_id)
+        return
+
+    original_name = f'{AVATAR_DIR}/{digest}.{original_format}'
+    _save(storage, original_name, original)
+    variants = {}
+    for size, formats in thumbnails.items():
+        for fmt, content in formats.items():
+            variant_name = f'{AVATAR_DIR}/{digest}-{size}.{fmt}'
+            _save(storage, variant_name, content)
+            variants.setdefault(str(size), {})[fmt] = variant_name
+
+    # Only swap if the upload is still current; a newer one has its own job
+    swapped = UserProfile.objects.filter(id=profile_id, avatar=name).update(
+        avatar=original_name, avatar_variants=variants, updated_at=timezone.now(),
+    )
+    if not swapped:
+        _delete_unreferenced(storage, original_name, variants)
+        return
+    if name != original_name:
+        storage.delete(name)
+    if previous and previous != original_name:
+        _delete_unreferenced(storage, previous, previous_variants)
+    invalidate_user_cache(profile.user_id)
@@ -0,0 +1,342 @@
+"""Two-tier cache: a small in-process LRU in front of Django's shared cache.
+
+Hot per-user lookups (profile, unread count) are served from the local tier
+without touching the shared backend. Invalidations are broadcast to every
+worker through a sequence counter kept in the shared cache; each process
+checks that counter at most once per ``SYNC_INTERVAL`` and purges the keys
+it missed.
+
+``cached_lookup`` wraps a loader function with stampede protection on top of
+the tiered cache: jittered TTLs, probabilistic early refresh and a
+single-flight recompute per key. Its ``acall`` serves async views.
+"""
+import functools
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+_MISSING = object()
+
+INVALIDATION_SEQ_KEY = 'tiered_cache:invalidation_seq'
+INVALIDATION_KEY = 'tiered_cache:invalidation:{}'
+
+# How many missed invalidation batches we replay before giving up and
+# clearing the whole local tier instead.
+MAX_REPLAY = 100
+
+
+class LocalLRU:
+    """Thread-safe, size-bounded LRU with a per-entry TTL.
+
+    Values are stored pickled (like Django's LocMemCache) so callers can't
+    mutate an object that other requests in the same process will receive.
+    """
+
+    def __init__(self, max_entries=1024, ttl=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, payload = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value, ttl=None):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache:
+    """Read-through cache with a local LRU tier and a shared Django cache tier."""
+
+    def __init__(self, shared=None, max_entries=1024, local_ttl=5, sync_interval=1.0):
+        self.shared = shared if shared is not None else default_cache
+        self.local = LocalLRU(max_entries=max_entries, ttl=local_ttl)
+        self.sync_interval = sync_interval
+        self._seen_seq = None
+        self._next_sync = 0.0
+        self._sync_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    # -- stats -------------------------------------------------------------
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {
+                'local': {'hits': 0, 'misses': 0},
+                'shared': {'hits': 0, 'misses': 0},
+            }
+
+    def stats(self):
+        """Return hit/miss counters per layer for this process."""
+        with self._stats_lock:
+            return {layer: dict(counts) for layer, counts in self._stats.items()}
+
+    def _count(self, layer, outcome):
+        with self._stats_lock:
+            self._stats[layer][outcome] += 1
+
+    # -- reads and writes --------------------------------------------------
+
+    def get(self, key, default=None, local_ttl=None):
+        """Look a key up locally first, then in the shared cache."""
+        self._maybe_sync()
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count('local', 'hits')
+            return value
+        self._count('local', 'misses')
+
+        value = self.shared.get(key, _MISSING)
+        if value is _MISSING:
+            self._count('shared', 'misses')
+            return default
+        self._count('shared', 'hits')
+        self.local.set(key, value, local_ttl)
+        return value
+
+    async def aget(self, key, default=None, local_ttl=None):
+        """get() for async code: the shared tier is read with the backend's aget()"""
+        if time.monotonic() >= self._next_sync:
+            await sync_to_async(self._maybe_sync)()
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count('local', 'hits')
+            return value
+        self._count('local', 'misses')
+
+        value = await self.shared.aget(key, _MISSING)
+        if value is _MISSING:
+            self._count('shared', 'misses')
+            return default
+        self._count('shared', 'hits')
+        self.local.set(key, value, local_ttl)
+        return value
+
+    def set(self, key, value, timeout=None, local_ttl=None):
+        if timeout is None:
+            self.shared.set(key, value)
+        else:
+            self.shared.set(key, value, timeout)
+        self.local.set(key, value, local_ttl)
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def delete_many(self, keys):
+        """Delete keys from both tiers and tell the other workers about it."""
+        keys = list(keys)
+        if not keys:
+            return
+        self.shared.delete_many(keys)
+        for key in keys:
+            self.local.delete(key)
+        self._broadcast(keys)
+
+    def clear_local(self):
+        self.local.clear()
+
+    # -- invalidation broadcast -------------------------------------------
+
+    def _broadcast(self, keys):
+        # Keep the batch long enough for every worker to see it.
+        keep_for = max(60, int(self.local.ttl * 10), int(self.sync_interval * 10))
+        # Claim the next free slot with add(), which is atomic on every
+        # shared backend (incr is a read-modify-write on the database cache,
+        # so two workers could get the same number and overwrite a batch).
+        seq = (self.shared.get(INVALIDATION_SEQ_KEY) or 0) + 1
+        while not self.shared.add(INVALIDATION_KEY.format(seq), keys, keep_for):
+            seq += 1
+        # The counter is only a hint for readers, who also look past it.
+        if seq > (self.shared.get(INVALIDATION_SEQ_KEY) or 0):
+            self.shared.set(INVALIDATION_SEQ_KEY, seq, None)
+        # Our own deletes are already applied locally.
+        with self._sync_lock:
+            if self._seen_seq is not None and seq == self._seen_seq + 1:
+                self._seen_seq = seq
+
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        with self._sync_lock:
+            if now < self._next_sync:
+                return
+            self._next_sync = now + self.sync_interval
+            self._sync()
+
+    def _sync(self):
+        seq = self.shared.get(INVALIDATION_SEQ_KEY)
+        if seq is None:
+            seq = 0
+        seen = self._seen_seq
+        self._seen_seq = seq
+        if seen is None:
+            return
+        if seq < seen or seq - seen > MAX_REPLAY:
+            # Counter was reset or we fell too far behind to replay.
+            self.local.clear()
+            return
+        wanted = [INVALIDATION_KEY.format(n) for n in range(seen + 1, seq + 1)]
+        batches = self.shared.get_many(wanted)
+        if len(batches) != len(wanted):
+            self.local.clear()
+            return
+        for keys in batches.values():
+            for key in keys:
+                self.local.delete(key)
+        # Batches claimed by writers that haven't moved the counter yet
+        while (keys := self.shared.get(INVALIDATION_KEY.format(seq + 1))) is not None:
+            seq += 1
+            for key in keys:
+                self.local.delete(key)
+        self._seen_seq = seq
+
+
+def _build_default():
+    options = getattr(settings, 'TIERED_CACHE', {})
+    return TwoTierCache(
+        max_entries=options.get('LOCAL_MAX_ENTRIES', 1024),
+        local_ttl=options.get('LOCAL_TTL', 5),
+        sync_interval=options.get('SYNC_INTERVAL', 1.0),
+    )
+
+
+tiered_cache = _build_default()
+
+
+# -- stampede protection ------------------------------------------------------
+
+# Striped so the number of locks stays fixed no matter how many keys we see.
+_inflight_locks = [threading.Lock() for _ in range(64)]
+
+
+def _inflight_lock(key):
+    return _inflight_locks[hash(key) % len(_inflight_locks)]
+
+
+def _should_refresh_early(delta, expires_at, beta, now):
+    """XFetch: refresh with rising probability as expiry approaches.
+
+    ``delta`` is how long the last recompute took, so slow loaders start
+    refreshing earlier than fast ones.
+    """
+    if beta <= 0 or delta <= 0:
+        return False
+    return now - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+def cached_lookup(key_func, timeout, jitter=0.1, beta=1.0, lock_timeout=10,
+                  wait_timeout=2.0, cache=None):
+    """Cache a loader's result with stampede protection.
+
+    Args:
+        key_func: Builds the cache key from the loader's arguments.
+        timeout: Nominal TTL in seconds; each write is jittered by +/- ``jitter``.
+        beta: Early-refresh aggressiveness (0 disables early refresh).
+        lock_timeout: How long the cross-worker recompute lock is held at most.
+        wait_timeout: How long a request waits for another worker's recompute
+            on a cold key before computing the value itself.
+
+    Only one thread per process and, via ``cache.add``, one worker across the
+    deployment recomputes a given key at a time. While an early refresh is in
+    flight, everyone else keeps getting the still-valid cached value.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            store = cache or tiered_cache
+            key = key_func(*args, **kwargs)
+            envelope = store.get(key)
+            now = time.time()
+            if envelope is not None:
+                value, delta, expires_at = envelope
+                if not _should_refresh_early(delta, expires_at, beta, now):
+                    return value
+
+            lock = _inflight_lock(key)
+            if not lock.acquire(blocking=envelope is None):
+                # Another thread here is already refreshing; serve stale.
+                return envelope[0]
+            try:
+                if envelope is None:
+                    # We may have waited behind another thread's recompute.
+                    fresh = store.get(key)
+                    if fresh is not None:
+                        return fresh[0]
+                return _recompute(store, key, envelope, func, args, kwargs)
+            finally:
+                lock.release()
+
+        def _recompute(store, key, envelope, func, args, kwargs):
+            lock_key = f'{key}:lock'
+            shared = store.shared if isinstance(store, TwoTierCache) else store
+            owns_lock = shared.add(lock_key, 1, lock_timeout)
+            if not owns_lock:
+                if envelope is not None:
+                    return envelope[0]
+                deadline = time.monotonic() + wait_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    fresh = shared.get(key)
+                    if fresh is not None:
+                        return fresh[0]
+            try:
+                started = time.monotonic()
+                value = func(*args, **kwargs)
+                delta = time.monotonic() - started
+                ttl = timeout * random.uniform(1 - jitter, 1 + jitter)
+                store.set(key, (value, delta, time.time() + ttl), max(1, int(ttl)))
+                return value
+            finally:
+                if owns_lock:
+                    shared.delete(lock_key)
+
+        async def acall(*args, **kwargs):
+            # A fresh cached value is returned without leaving the event
+            # loop; misses and early refreshes take the sync path in a thread.
+            store = cache or tiered_cache
+            envelope = await store.aget(key_func(*args, **kwargs))
+            if envelope is not None:
+                value, delta, expires_at = envelope
+                if not _should_refresh_early(delta, expires_at, beta, time.time()):
+                    return value
+            return await sync_to_async(wrapper)(*args, **kwargs)
+
+        wrapper.cache_key = key_func
+        wrapper.acall = acall
+        return wrapper
+    return decorator
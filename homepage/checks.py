@@ -0,0 +1,23 @@
+"""System checks for deployment settings the app relies on"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """The default cache must be visible to every process.
+
+    The tiered cache's invalidation broadcast goes through it; in a
+    per-process cache, invalidations made by one worker (or by runworker
+    jobs) never reach the others, which keep serving stale data.
+    """
+    backend = caches['default']
+    if isinstance(backend, (LocMemCache, DummyCache)):
+        return [Error(
+            f'The default cache ({type(backend).__name__}) is not shared between processes.',
+            hint='Set REDIS_URL, or use the database cache and run "python manage.py createcachetable".',
+            id='homepage.E001',
+        )]
+    return []
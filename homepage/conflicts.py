@@ -0,0 +1,132 @@
+"""Overlap checks for new or edited events.
+
+The user's events in the affected window (one-off rows plus expanded
+recurring occurrences) are loaded once into a static interval tree, which
+then answers overlap queries for a single event or a whole batch without
+another round-trip per event.
+"""
+from datetime import timedelta
+
+from .models import Event
+from .recurrence import expand_event, occurrences_between, recurring_in_window
+
+# How far ahead a new recurring event's occurrences are checked
+RECURRING_HORIZON = timedelta(days=90)
+
+
+class IntervalTree:
+    """Immutable augmented interval tree over half-open [start, end) intervals.
+
+    Intervals are sorted by start and laid out as an implicit balanced BST
+    over that array; every node also stores the largest end in its subtree
+    so whole subtrees that end before the query can be skipped.
+    Queries run in O(log n + k).
+    """
+
+    def __init__(self, intervals):
+        self._items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self._max_end = [None] * len(self._items)
+        if self._items:
+            self._build(0, len(self._items) - 1)
+
+    def _build(self, lo, hi):
+        mid = (lo + hi) // 2
+        best = self._items[mid][1]
+        if lo < mid:
+            best = max(best, self._build(lo, mid - 1))
+        if mid < hi:
+            best = max(best, self._build(mid + 1, hi))
+        self._max_end[mid] = best
+        return best
+
+    def __len__(self):
+        return len(self._items)
+
+    def overlapping(self, start, end):
+        """Payloads of every interval overlapping [start, end), in start order"""
+        found = []
+        stack = [(0, len(self._items) - 1)] if self._items else []
+        while stack:
+            lo, hi = stack.pop()
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start:
+                continue  # Everything below ends before the query starts
+            item_start, item_end, payload = self._items[mid]
+            if mid < hi and item_start < end:
+                stack.append((mid + 1, hi))
+            if item_start < end and item_end > start:
+                found.append(self._items[mid])
+            if lo < mid:
+                stack.append((lo, mid - 1))
+        found.sort(key=lambda item: item[0])
+        return [payload for _, _, payload in found]
+
+
+def candidate_intervals(event):
+    """(start, end) pairs an unsaved or edited event will occupy"""
+    if event.recurrence_rule:
+        horizon_end = event.start_time + RECURRING_HORIZON
+        return [(o.start, o.end) for o in expand_event(event, event.start_time, horizon_end)]
+    return [(event.start_time, event.end_time)]
+
+
+def user_tree(user, window_start, window_end, exclude_ids=()):
+    """IntervalTree of the user's events overlapping the window.
+
+    Payloads are (event, start, end), so a recurring event contributes one
+    entry per occurrence.
+    """
+    one_off = Event.objects.filter(
+        user=user, recurrence_rule='', start_time__lt=window_end, end_time__gt=window_start,
+    ).exclude(id__in=exclude_ids)
+    items = [(event.start_time, event.end_time, (event, event.start_time, event.end_time)) for event in one_off]
+    recurring = Event.objects.filter(recurring_in_window(window_start, window_end), user=user).exclude(id__in=exclude_ids)
+    items.extend(
+        (occurrence.start, occurrence.end, (occurrence.event, occurrence.start, occurrence.end))
+        for occurrence in occurrences_between(recurring, window_start, window_end)
+    )
+    return IntervalTree(items)
+
+
+def find_conflicts(user, events):
+    """Map each index in ``events`` to the (event, start, end) entries it overlaps.
+
+    Existing events are looked up with one tree built over the batch's whole
+    span; events in the same batch are checked against each other with a
+    second tree. Saved events (edits) are left out of the existing set so
+    they don't conflict with their old selves.
+    """
+    flat = [
+        (start, end, (index, start, end))
+        for index, event in enumerate(events)
+        for start, end in candidate_intervals(event)
+    ]
+    if not flat:
+        return {}
+    existing = user_tree(
+        user,
+        min(start for start, _, _ in flat),
+        max(end for _, end, _ in flat),
+        exclude_ids=[event.pk for event in events if event.pk],
+    )
+    batch = IntervalTree(flat)
+
+    conflicts = {}
+    for start, end, (index, _, _) in flat:
+        found = conflicts.setdefault(index, {})
+        for event, other_start, other_end in existing.overlapping(start, end):
+            found.setdefault(('saved', event.pk, other_start), (event, other_start, other_end))
+        for other_index, other_start, other_end in batch.overlapping(start, end):
+            if other_index != index:
+                found.setdefault(('batch', other_index, other_start), (events[other_index], other_start, other_end))
+    return {index: list(found.values()) for index, found in conflicts.items() if found}
+
+
+def describe_conflict(conflict):
+    event, start, end = conflict
+    return {
+        'id': event.pk,
+        'title': event.title,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+    }
@@ -0,0 +1,136 @@
+"""Email delivery for pending notifications.
+
+The worker leases a batch of pending email notifications (SKIP LOCKED, so
+several workers can share the queue), sends them over one SMTP connection
+and records the outcome with a few grouped UPDATEs. Failures are retried
+with exponential backoff until MAX_ATTEMPTS.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Notification
+
+
+def _options():
+    options = {'BATCH_SIZE': 100, 'MAX_ATTEMPTS': 5, 'BACKOFF_SECONDS': 60, 'LEASE_SECONDS': 300}
+    options.update(getattr(settings, 'NOTIFICATION_DELIVERY', {}))
+    return options
+
+
+def lease_pending_emails(batch_size, lease_seconds, now=None):
+    """Claim a batch of due email notifications for this worker.
+
+    The claim pushes next_delivery_at forward by the lease, so a worker
+    that dies mid-batch only delays those emails; it doesn't lose them.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        batch = list(
+            Notification.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('user', 'user__profile')
+            .filter(delivery_status='pending', delivery_method__in=['email', 'both'])
+            .filter(Q(next_delivery_at__isnull=True) | Q(next_delivery_at__lte=now))
+            .order_by('id')[:batch_size]
+        )
+        if batch:
+            Notification.objects.filter(id__in=[n.id for n in batch]).update(
+                next_delivery_at=now + timedelta(seconds=lease_seconds)
+            )
+    return batch
+
+
+def build_email(notification):
+    return EmailMessage(
+        subject=notification.title,
+        body=notification.message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[notification.user.email],
+    )
+
+
+def _wants_email(notification):
+    user = notification.user
+    profile = getattr(user, 'profile', None)
+    if not user.email:
+        return False
+    if profile is None:
+        return True
+    return profile.email_notifications and profile.digest_frequency == 'immediate'
+
+
+def deliver_pending_emails(batch_size=None, now=None, connection=None):
+    """Send one leased batch; returns a dict of counts by outcome"""
+    options = _options()
+    now = now or timezone.now()
+    batch = lease_pending_emails(batch_size or options['BATCH_SIZE'], options['LEASE_SECONDS'], now)
+    result = {'sent': 0, 'skipped': 0, 'retry': 0, 'failed': 0}
+    if not batch:
+        return result
+
+    sendable = []
+    skipped = []
+    for notification in batch:
+        (sendable if _wants_email(notification) else skipped).append(notification)
+
+    sent_ids, failed = [], []
+    if sendable:
+        connection = connection or get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception:
+            failed = sendable
+        else:
+            try:
+                # One connection, one message per call so a single bad
+                # address doesn't fail the whole batch.
+                for notification in sendable:
+                    try:
+                        if connection.send_messages([build_email(notification)]):
+                            sent_ids.append(notification.id)
+                        else:
+                            failed.append(notification)
+                    except Exception:
+                        failed.append(notification)
+            finally:
+                connection.close()
+
+    with transaction.atomic():
+        if sent_ids:
+            Notification.objects.filter(id__in=sent_ids).update(
+                delivery_status='sent', delivery_attempts=F('delivery_attempts') + 1, next_delivery_at=None
+            )
+        if skipped:
+            # The user switched email off (or to digests) after this was queued.
+            Notification.objects.filter(id__in=[n.id for n in skipped]).update(
+                delivery_method='web', delivery_status='sent', next_delivery_at=None
+            )
+        retry_by_attempt = defaultdict(list)
+        give_up = []
+        for notification in failed:
+            attempts = notification.delivery_attempts + 1
+            if attempts >= options['MAX_ATTEMPTS']:
+                give_up.append(notification.id)
+            else:
+                retry_by_attempt[attempts].append(notification.id)
+        for attempts, ids in retry_by_attempt.items():
+            delay = options['BACKOFF_SECONDS'] * 2 ** (attempts - 1)
+            Notification.objects.filter(id__in=ids).update(
+                delivery_attempts=attempts, next_delivery_at=now + timedelta(seconds=delay)
+            )
+        if give_up:
+            Notification.objects.filter(id__in=give_up).update(
+                delivery_status='failed', delivery_attempts=F('delivery_attempts') + 1, next_delivery_at=None
+            )
+
+    result['sent'] = len(sent_ids)
+    result['skipped'] = len(skipped)
+    result['failed'] = len(give_up)
+    result['retry'] = len(failed) - len(give_up)
+    return result
@@ -0,0 +1,262 @@
+"""User autocomplete for the invite fields.
+
+Every user is indexed as a handful of normalized words (username and its
+parts, email, email local part and domain, first, last and full name) in
+UserSearchTerm. A lookup is then a prefix range scan on one indexed
+column instead of four ``icontains`` scans over auth_user.
+
+Results are cached per prefix for a short time under a directory version,
+kept in the shared cache and bumped whenever a user's searchable fields
+change, so a rename shows up straight away in every process. Small
+deployments can instead keep the whole index in each process
+(``USER_SEARCH['LOCAL_INDEX_MAX_USERS']``), rebuilt on a version change
+or after ``LOCAL_INDEX_TTL`` seconds.
+"""
+import bisect
+import hashlib
+import re
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import UserSearchTerm
+
+MIN_QUERY_LENGTH = 2
+DIRECTORY_VERSION_KEY = 'user_directory_version'
+SEARCH_CACHE_KEY = 'user_search:{}:{}'
+SEARCHABLE_FIELDS = {'username', 'email', 'first_name', 'last_name'}
+
+_WORD_SPLIT = re.compile(r'[\s._+\-]+')
+
+# The top code point sorts after anything a prefix can be followed by
+_PREFIX_END = '\U0010ffff'
+
+
+def _options():
+    options = {'CACHE_TIMEOUT': 60, 'LOCAL_INDEX_MAX_USERS': 0, 'LOCAL_INDEX_TTL': 300}
+    options.update(getattr(settings, 'USER_SEARCH', {}))
+    return options
+
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def terms_for(username, email, first_name, last_name):
+    """Searchable words for one user"""
+    username, email = normalize(username), normalize(email)
+    first_name, last_name = normalize(first_name), normalize(last_name)
+    terms = {username, first_name, last_name, normalize(f'{first_name} {last_name}')}
+    terms.update(_WORD_SPLIT.split(username))
+    if email:
+        local, _, domain = email.partition('@')
+        terms.update([email, local, domain])
+        terms.update(_WORD_SPLIT.split(local))
+    return {term[:254] for term in terms if len(term) >= MIN_QUERY_LENGTH}
+
+
+def directory_version():
+    version = cache.get(DIRECTORY_VERSION_KEY)
+    if version is None:
+        cache.add(DIRECTORY_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(DIRECTORY_VERSION_KEY)
+    return version
+
+
+async def adirectory_version():
+    version = await cache.aget(DIRECTORY_VERSION_KEY)
+    if version is None:
+        await cache.aadd(DIRECTORY_VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(DIRECTORY_VERSION_KEY)
+    return version
+
+
+def bump_directory_version():
+    """Retire every cached autocomplete result"""
+    cache.set(DIRECTORY_VERSION_KEY, time.time_ns(), None)
+
+
+def index_users(users):
+    """Rebuild the search terms of ``users`` (objects with the four name fields)"""
+    users = list(users)
+    if not users:
+        return
+    rows = [
+        UserSearchTerm(user_id=user.id, term=term)
+        for user in users
+        for term in terms_for(user.username, user.email, user.first_name, user.last_name)
+    ]
+    with transaction.atomic():
+        UserSearchTerm.objects.filter(user_id__in=[user.id for user in users]).delete()
+        UserSearchTerm.objects.bulk_create(rows, batch_size=1000)
+    transaction.on_commit(bump_directory_version)
+
+
+def user_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """post_save hook; logins only touch last_login and are skipped"""
+    if raw or (update_fields is not None and not SEARCHABLE_FIELDS & set(update_fields)):
+        return
+    index_users([instance])
+
+
+def user_deleted(sender, instance, **kwargs):
+    # Terms go with the user through the foreign key; cached prefixes must too
+    transaction.on_commit(bump_directory_version)
+
+
+def _prefix_filter(prefix):
+    if connection.vendor == 'sqlite':
+        # SQLite's LIKE is case-insensitive and can't use the index; a binary range can
+        return {'term__gte': prefix, 'term__lt': prefix + _PREFIX_END}
+    # PostgreSQL serves LIKE 'prefix%' from the varchar_pattern_ops index Django adds
+    return {'term__startswith': prefix}
+
+
+def _serialize(user_id, username, email, first_name, last_name):
+    full_name = f'{first_name} {last_name}'.strip()
+    return {'id': user_id, 'username': username, 'email': email, 'full_name': full_name or None}
+
+
+def _matching_terms(prefix, limit):
+    # No ORDER BY: the scan walks the term index and stops at the limit
+    # instead of sorting every match of a short prefix. A user can match on
+    # several words, so read a few extra rows.
+    terms = UserSearchTerm.objects.filter(**_prefix_filter(prefix)).order_by()
+    return terms.values_list('user_id', flat=True)[:limit * 4]
+
+
+def _first_users(user_ids, limit):
+    found = []
+    for user_id in dict.fromkeys(user_ids):
+        found.append(user_id)
+        if len(found) == limit:
+            break
+    return found
+
+
+def _users_by_id(user_ids):
+    return User.objects.filter(id__in=user_ids).values_list('id', 'username', 'email', 'first_name', 'last_name')
+
+
+def _query_index(prefix, limit):
+    """Users with a word starting with ``prefix``, in index order"""
+    user_ids = _first_users(_matching_terms(prefix, limit), limit)
+    users = {row[0]: _serialize(*row) for row in _users_by_id(user_ids)}
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+
+async def _aquery_index(prefix, limit):
+    user_ids = _first_users([user_id async for user_id in _matching_terms(prefix, limit)], limit)
+    users = {row[0]: _serialize(*row) async for row in _users_by_id(user_ids)}
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+
+class PrefixIndex:
+    """In-process prefix lookup over every user's terms.
+
+    A sorted array of (term, user_id) searched with bisect; same lookups
+    as a trie in O(log n + k), in a fraction of the memory.
+    """
+
+    def __init__(self, rows, users):
+        self._rows = sorted(rows)
+        self._terms = [term for term, _ in self._rows]
+        self._users = users
+
+    def search(self, prefix, limit):
+        found = []
+        seen = set()
+        position = bisect.bisect_left(self._terms, prefix)
+        while position < len(self._rows) and len(found) < limit:
+            term, user_id = self._rows[position]
+            if not term.startswith(prefix):
+                break
+            if user_id not in seen and user_id in self._users:
+                seen.add(user_id)
+                found.append(self._users[user_id])
+            position += 1
+        return found
+
+
+_local = {'version': None, 'index': None, 'expires': 0.0}
+_local_lock = threading.Lock()
+
+
+def _local_index(version, max_users, ttl):
+    """This process's PrefixIndex for ``version``, or None if the directory is too big.
+
+    Rebuilt when the directory version moves and, as a backstop for
+    changes that never bumped it (raw SQL, a lost cache entry), at least
+    every ``ttl`` seconds.
+    """
+    if _local['version'] == version and time.monotonic() < _local['expires']:
+        return _local['index']
+    with _local_lock:
+        if _local['version'] != version or time.monotonic() >= _local['expires']:
+            index = None
+            if User.objects.count() <= max_users:
+                users = {
+                    row[0]: _serialize(*row)
+                    for row in User.objects.values_list('id', 'username', 'email', 'first_name', 'last_name')
+                }
+                index = PrefixIndex(UserSearchTerm.objects.values_list('term', 'user_id'), users)
+            _local['index'], _local['version'] = index, version
+            _local['expires'] = time.monotonic() + ttl
+    return _local['index']
+
+
+def _search_key(version, wanted, prefix):
+    return SEARCH_CACHE_KEY.format(version, hashlib.sha1(f'{wanted}:{prefix}'.encode()).hexdigest())
+
+
+def search_users(query, exclude_id=None, limit=10):
+    """Autocomplete matches for ``query`` as JSON-ready dicts"""
+    prefix = normalize(query)
+    if len(prefix) < MIN_QUERY_LENGTH:
+        return []
+    options = _options()
+    version = directory_version()
+    wanted = limit + 1  # Room to drop the requester
+
+    index = None
+    if options['LOCAL_INDEX_MAX_USERS']:
+        index = _local_index(version, options['LOCAL_INDEX_MAX_USERS'], options['LOCAL_INDEX_TTL'])
+    if index is not None:
+        matches = index.search(prefix, wanted)
+    else:
+        key = _search_key(version, wanted, prefix)
+        matches = cache.get(key)
+        if matches is None:
+            matches = _query_index(prefix, wanted)
+            cache.set(key, matches, options['CACHE_TIMEOUT'])
+    return [match for match in matches if match['id'] != exclude_id][:limit]
+
+
+async def asearch_users(query, exclude_id=None, limit=10):
+    """Async search_users for ASGI views; shares its cache entries"""
+    prefix = normalize(query)
+    if len(prefix) < MIN_QUERY_LENGTH:
+        return []
+    options = _options()
+    version = await adirectory_version()
+    wanted = limit + 1
+
+    index = None
+    if options['LOCAL_INDEX_MAX_USERS']:
+        index = await sync_to_async(_local_index)(
+            version, options['LOCAL_INDEX_MAX_USERS'], options['LOCAL_INDEX_TTL'],
+        )
+    if index is not None:
+        matches = index.search(prefix, wanted)
+    else:
+        key = _search_key(version, wanted, prefix)
+        matches = await cache.aget(key)
+        if matches is None:
+            matches = await _aquery_index(prefix, wanted)
+            await cache.aset(key, matches, options['CACHE_TIMEOUT'])
+    return [match for match in matches if match['id'] != exclude_id][:limit]
@@ -0,0 +1,85 @@
+"""Event deletion: hide immediately, purge in the background.
+
+Deleting a popular event used to run Django's cascade collector over every
+invitee copy, reminder and notification inside the request. Now the owner's
+event and all copies are stamped ``deleted_at`` in one UPDATE (the default
+manager hides them from then on) and a ``purge_event`` job removes the rows
+in short, primary-key-ordered chunks, recording progress in EventPurge.
+"""
+import time
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .freebusy import touch_calendars
+from .jobs import enqueue_on_commit
+from .models import Event, EventPurge, Notification, Reminder
+from .notifications import delete_notifications
+
+COPY_TYPES = ['joined', 'invitation']
+
+PURGE_CHUNK_SIZE = 500
+# A purge job re-queues itself after this many seconds so no single run
+# outlives its lease.
+PURGE_TIME_BUDGET = 30
+
+
+def copies_of(event_id):
+    """All invitees' copies of an event, including ones already hidden"""
+    return Event.all_objects.filter(external_calendar_id=str(event_id), external_calendar_type__in=COPY_TYPES)
+
+
+def soft_delete_event(event):
+    """Hide an owner's event and every invitee copy, and queue the purge"""
+    now = timezone.now()
+    with transaction.atomic():
+        series = Event.all_objects.filter(
+            Q(id=event.id) | Q(external_calendar_id=str(event.id), external_calendar_type__in=COPY_TYPES)
+        )
+        touch_calendars(series.values_list('user_id', flat=True))
+        series.update(deleted_at=now)
+        EventPurge.objects.get_or_create(event_id=event.id, defaults={'user_id': event.user_id})
+        enqueue_on_commit('purge_event', {'event_id': event.id})
+
+
+def _purge_chunk(purge, chunk_size):
+    """Delete one chunk of whatever is left; returns False once nothing is"""
+    event_id = purge.event_id
+    counts = {}
+    more = True
+    with transaction.atomic():
+        copy_ids = list(copies_of(event_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if copy_ids:
+            # Empty the copies first so deleting them doesn't cascade
+            counts['reminders_deleted'] = Reminder.objects.filter(event_id__in=copy_ids).delete()[0]
+            counts['notifications_deleted'] = delete_notifications(Notification.objects.filter(event_id__in=copy_ids))
+            counts['copies_deleted'] = Event.all_objects.filter(id__in=copy_ids).delete()[0]
+        else:
+            ids = list(
+                Notification.objects.filter(event_id=event_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+            )
+            if ids:
+                counts['notifications_deleted'] = delete_notifications(Notification.objects.filter(id__in=ids))
+            else:
+                counts['reminders_deleted'] = Reminder.objects.filter(event_id=event_id).delete()[0]
+                Event.all_objects.filter(id=event_id).delete()
+                more = False
+        EventPurge.objects.filter(id=purge.id).update(
+            **{field: F(field) + n for field, n in counts.items()}, updated_at=timezone.now()
+        )
+    return more
+
+
+def purge_event(event_id, chunk_size=PURGE_CHUNK_SIZE, time_budget=PURGE_TIME_BUDGET):
+    """Purge a soft-deleted event chunk by chunk, re-queuing if time runs out"""
+    purge = EventPurge.objects.filter(event_id=event_id).first()
+    if purge is None or purge.status == 'done':
+        return
+    EventPurge.objects.filter(id=purge.id).update(status='running')
+    deadline = time.monotonic() + time_budget
+    while _purge_chunk(purge, chunk_size):
+        if time.monotonic() >= deadline:
+            enqueue_on_commit('purge_event', {'event_id': event_id})
+            return
+    EventPurge.objects.filter(id=purge.id).update(status='done', finished_at=timezone.now())
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth.models import User
+from accounts.emails import email_in_use
 from .models import Event, Reminder, UserProfile
 import pytz
 
@@ -46,7 +47,7 @@ class EventForm(forms.ModelForm):
 
     class Meta:
         model = Event
-        fields = ['title', 'description', 'invite_participants', 'start_time', 'end_time', 'location']
+        fields = ['title', 'description', 'invite_participants', 'start_time', 'end_time', 'location', 'recurrence_rule']
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'w-full px-4 py-2 rounded-lg bg-gray-700 border border-gray-600 text-white placeholder-gray-400 focus:outline-none focus:ring-2 focus:ring-blue-500',
@@ -66,8 +67,22 @@ class EventForm(forms.ModelForm):
                 'class': 'w-full px-4 py-2 rounded-lg bg-gray-700 border border-gray-600 text-white placeholder-gray-400 focus:outline-none focus:ring-2 focus:ring-blue-500',
                 'placeholder': 'Location (optional)'
             }),
+            'recurrence_rule': forms.TextInput(attrs={
+                'class': 'w-full px-4 py-2 rounded-lg bg-gray-700 border border-gray-600 text-white placeholder-gray-400 focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'placeholder': 'e.g. FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10 (leave empty for a one-off event)'
+            }),
         }
 
+    def clean_recurrence_rule(self):
+        from .recurrence import parse_rrule
+        rule = self.cleaned_data.get('recurrence_rule', '').strip().upper().removeprefix('RRULE:')
+        if rule:
+            try:
+                parse_rrule(rule)
+            except ValueError as exc:
+                raise forms.ValidationError(str(exc))
+        return rule
+
 
 class ReminderForm(forms.ModelForm):
     """Form for creating reminders"""
@@ -178,8 +193,15 @@ class UserProfileForm(forms.ModelForm):
 
     class Meta:
         model = UserProfile
-        fields = ['timezone', 'email_notifications', 'web_notifications', 'bio', 'phone', 'location', 'avatar']
+        fields = ['timezone', 'email_notifications', 'web_notifications', 'digest_frequency', 'reminder_offsets', 'bio', 'phone', 'location', 'avatar']
         widgets = {
+            'reminder_offsets': forms.TextInput(attrs={
+                'class': 'w-full px-4 py-2 rounded-lg bg-gray-700 border border-gray-600 text-white placeholder-gray-400 focus:outline-none focus:ring-2 focus:ring-blue-500',
+                'placeholder': 'e.g. 10, 1440'
+            }),
+            'digest_frequency': forms.Select(attrs={
+                'class': 'w-full px-4 py-2 rounded-lg bg-gray-700 border border-gray-600 text-white focus:outline-none focus:ring-2 focus:ring-blue-500'
+            }),
             'email_notifications': forms.CheckboxInput(attrs={
                 'class': 'w-4 h-4 text-blue-600 bg-gray-700 border-gray-600 rounded focus:ring-blue-500'
             }),
@@ -202,6 +224,16 @@ class UserProfileForm(forms.ModelForm):
         }
 
 
+    def clean_reminder_offsets(self):
+        from .reminders import parse_offsets
+        raw = self.cleaned_data.get('reminder_offsets', '')
+        try:
+            offsets = parse_offsets(raw, strict=True)
+        except ValueError:
+            raise forms.ValidationError('Enter whole numbers of minutes separated by commas, e.g. 10, 1440.')
+        return ','.join(str(offset) for offset in offsets)
+
+
 class UserUpdateForm(forms.ModelForm):
     """Form for updating user account information"""
     email = forms.EmailField(
@@ -226,3 +258,8 @@ class UserUpdateForm(forms.ModelForm):
             }),
         }
 
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email_in_use(email, exclude_id=self.instance.pk):
+            raise forms.ValidationError('This email address is already registered.')
+        return email
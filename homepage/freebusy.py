@@ -0,0 +1,165 @@
+"""Free/busy lookups across several users' calendars.
+
+Busy time is computed per (user, UTC day) and cached under the user's
+calendar version, a counter in the database (CalendarVersion); any write
+to a user's events calls ``touch_calendars``, which bumps it once the
+transaction commits so the old day entries are never read again. Cache
+misses for every user and day in the window are filled with a single
+events query (plus the recurring series, expanded lazily).
+
+Intervals are merged with a sort-then-sweep pass, O(n log n) overall.
+"""
+from datetime import datetime, time as dt_time, timedelta
+from functools import partial
+
+import pytz
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+
+from .models import CalendarVersion, Event
+from .recurrence import occurrences_between, recurring_in_window
+
+FREEBUSY_DAY_KEY = 'freebusy:{}:{}:{}'
+FREEBUSY_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def calendar_versions(user_ids):
+    """Current calendar version per user (0 until their events first change)"""
+    versions = dict.fromkeys(user_ids, 0)
+    versions.update(CalendarVersion.objects.filter(user_id__in=versions).values_list('user_id', 'version'))
+    return versions
+
+
+def _bump_versions(user_ids):
+    missing = user_ids - set(CalendarVersion.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+    CalendarVersion.objects.bulk_create([CalendarVersion(user_id=user_id) for user_id in missing], ignore_conflicts=True)
+    CalendarVersion.objects.filter(user_id__in=user_ids).update(version=F('version') + 1, changed_at=Now())
+
+
+def touch_calendars(user_ids):
+    """Invalidate cached free/busy for these users once the transaction commits"""
+    user_ids = set(user_ids)
+    if user_ids:
+        transaction.on_commit(partial(_bump_versions, user_ids))
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching (start, end) pairs into sorted busy blocks"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def busy_profile(intervals_by_user):
+    """Sweep-line over everyone's blocks: [(start, end, busy_user_ids)] segments.
+
+    Each user's blocks must already be merged, so a user is counted at most
+    once per segment. Consecutive segments with the same people are joined.
+    """
+    points = []
+    for user_id, blocks in intervals_by_user.items():
+        for start, end in blocks:
+            points.append((start, 1, user_id))
+            points.append((end, -1, user_id))
+    points.sort(key=lambda point: (point[0], point[1]))
+
+    segments = []
+    busy = set()
+    previous = None
+    for at, delta, user_id in points:
+        if busy and previous is not None and at > previous:
+            people = frozenset(busy)
+            if segments and segments[-1][1] == previous and segments[-1][2] == people:
+                segments[-1] = (segments[-1][0], at, people)
+            else:
+                segments.append((previous, at, people))
+        if delta > 0:
+            busy.add(user_id)
+        else:
+            busy.discard(user_id)
+        previous = at
+    return segments
+
+
+def _days(window_start, window_end):
+    day = window_start.astimezone(pytz.UTC).date()
+    last = (window_end - timedelta(microseconds=1)).astimezone(pytz.UTC).date()
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+def _day_bounds(day):
+    start = pytz.UTC.localize(datetime.combine(day, dt_time.min))
+    return start, start + timedelta(days=1)
+
+
+def _clip(intervals, start, end):
+    return [(max(s, start), min(e, end)) for s, e in intervals if s < end and e > start]
+
+
+def _load_days(missing, versions):
+    """Compute and cache busy blocks for the given {user_id: [days]}"""
+    user_ids = list(missing)
+    first = min(_day_bounds(min(days))[0] for days in missing.values())
+    last = max(_day_bounds(max(days))[1] for days in missing.values())
+
+    raw = {user_id: [] for user_id in user_ids}
+    one_off = Event.objects.filter(
+        user_id__in=user_ids, recurrence_rule='', start_time__lt=last, end_time__gt=first,
+    ).values_list('user_id', 'start_time', 'end_time')
+    for user_id, start, end in one_off:
+        raw[user_id].append((start, end))
+    recurring = Event.objects.filter(recurring_in_window(first, last), user_id__in=user_ids)
+    for occurrence in occurrences_between(recurring, first, last):
+        raw[occurrence.event.user_id].append((occurrence.start, occurrence.end))
+
+    loaded = {}
+    to_cache = {}
+    for user_id, days in missing.items():
+        merged = merge_intervals(raw[user_id])
+        for day in days:
+            blocks = _clip(merged, *_day_bounds(day))
+            loaded[(user_id, day)] = blocks
+            to_cache[FREEBUSY_DAY_KEY.format(user_id, day.isoformat(), versions[user_id])] = blocks
+    cache.set_many(to_cache, FREEBUSY_CACHE_TIMEOUT)
+    return loaded
+
+
+def free_busy(user_ids, window_start, window_end):
+    """Busy blocks per user and for the group over [window_start, window_end).
+
+    Returns ``{'users': {user_id: [(start, end)]}, 'overall': [(start, end, busy_user_ids)]}``.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    versions = calendar_versions(user_ids)
+    days = list(_days(window_start, window_end))
+    keys = {
+        (user_id, day): FREEBUSY_DAY_KEY.format(user_id, day.isoformat(), versions[user_id])
+        for user_id in user_ids for day in days
+    }
+    cached = cache.get_many(keys.values())
+
+    per_day = {}
+    missing = {}
+    for (user_id, day), key in keys.items():
+        if key in cached:
+            per_day[(user_id, day)] = cached[key]
+        else:
+            missing.setdefault(user_id, []).append(day)
+    if missing:
+        per_day.update(_load_days(missing, versions))
+
+    users = {}
+    for user_id in user_ids:
+        blocks = [block for day in days for block in per_day[(user_id, day)]]
+        # Re-merge so blocks spanning midnight come back whole
+        users[user_id] = _clip(merge_intervals(blocks), window_start, window_end)
+    return {'users': users, 'overall': busy_profile(users)}
@@ -0,0 +1,254 @@
+"""iCalendar (RFC 5545) export of a user's events.
+
+The feed is streamed: events come off a server-side ``.iterator()`` and
+each VEVENT is yielded as soon as it is rendered, so a large calendar
+never sits in memory as one document. Recurring events are exported once
+with their RRULE; cancelled occurrences become EXDATEs and moved ones are
+exported as separate VEVENTs carrying a RECURRENCE-ID. Recurring events
+keep their local times (DTSTART;TZID), so every zone used gets a VTIMEZONE
+built from the tz database.
+
+Feeds are authenticated by a per-user secret token instead of a session,
+since calendar clients subscribe with a bare URL.
+"""
+import bisect
+import secrets
+from datetime import datetime
+
+import pytz
+from django.db.models import Min
+
+from .models import CalendarVersion, Event, EventOccurrenceOverride, UserProfile
+from .recurrence import source_event_id, until_in_utc
+
+PRODID = '-//SynchSphere//Calendar Feed//EN'
+FEED_CHUNK_SIZE = 500
+# X-WR-CALNAME is built from these, so changing one must change the feed's ETag
+CALENDAR_NAME_FIELDS = {'first_name', 'last_name', 'username'}
+
+
+def feed_token(profile, reset=False):
+    """The profile's calendar feed token, minting one on first use"""
+    if reset or not profile.calendar_feed_token:
+        profile.calendar_feed_token = secrets.token_urlsafe(32)
+        profile.save(update_fields=['calendar_feed_token', 'updated_at'])
+    return profile.calendar_feed_token
+
+
+def profile_for_token(token):
+    if not token:
+        return None
+    return UserProfile.objects.select_related('user').filter(calendar_feed_token=token).first()
+
+
+def escape_text(value):
+    """Escape a TEXT value (backslash, separators and newlines)"""
+    return (
+        (value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+        .replace('\r', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line at 75 octets, never splitting a UTF-8 character"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    start = 0
+    limit = 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Back off to a character boundary (continuation bytes are 10xxxxxx)
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode('utf-8'))
+        start = end
+        limit = 74  # The leading space counts towards the next line
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_utc(value):
+    return value.astimezone(pytz.UTC).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _local_zone(event):
+    """The zone a recurring event's times are written in, or None for UTC"""
+    zone = event.recurrence_timezone
+    if event.recurrence_rule and zone and zone != 'UTC' and zone in pytz.all_timezones_set:
+        return zone
+    return None
+
+
+def _start_lines(event):
+    """DTSTART/DTEND, in the series' zone for recurring events so DST is honoured"""
+    zone = _local_zone(event)
+    if zone:
+        tz = pytz.timezone(zone)
+        return [
+            f"DTSTART;TZID={zone}:{event.start_time.astimezone(tz).strftime('%Y%m%dT%H%M%S')}",
+            f"DTEND;TZID={zone}:{event.end_time.astimezone(tz).strftime('%Y%m%dT%H%M%S')}",
+        ]
+    return [f'DTSTART:{format_utc(event.start_time)}', f'DTEND:{format_utc(event.end_time)}']
+
+
+def _rule_line(event):
+    """The RRULE with UNTIL in UTC, as RFC 5545 requires alongside a TZID or UTC DTSTART"""
+    parts = []
+    for part in event.recurrence_rule.strip().upper().removeprefix('RRULE:').split(';'):
+        key, _, value = part.partition('=')
+        if key == 'UNTIL':
+            part = f'UNTIL={format_utc(until_in_utc(value, event.recurrence_timezone))}'
+        if part:
+            parts.append(part)
+    return 'RRULE:' + ';'.join(parts)
+
+
+def _utc_offset(delta):
+    total = int(delta.total_seconds())
+    hours, rest = divmod(abs(total), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{'-' if total < 0 else '+'}{hours:02d}{minutes:02d}" + (f'{seconds:02d}' if seconds else '')
+
+
+def _local_format(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def vtimezone_lines(zone, since):
+    """A VTIMEZONE for ``zone`` covering ``since`` (UTC) onwards.
+
+    Built from the tz database's transition table: one STANDARD or
+    DAYLIGHT observance per distinct offset change, each listing the
+    local times it takes effect as RDATEs.
+    """
+    tz = pytz.timezone(zone)
+    lines = ['BEGIN:VTIMEZONE', f'TZID:{zone}']
+    times = getattr(tz, '_utc_transition_times', None)
+    if not times or len(times) < 2:
+        # Fixed offset zone
+        offset = _utc_offset(tz.utcoffset(datetime(2000, 1, 1)))
+        lines += ['BEGIN:STANDARD', 'DTSTART:19700101T000000', f'TZOFFSETFROM:{offset}',
+                  f'TZOFFSETTO:{offset}', f'TZNAME:{tz.tzname(datetime(2000, 1, 1))}', 'END:STANDARD']
+    else:
+        info = tz._transition_info
+        # The transition in effect at ``since`` and every later one
+        first = max(bisect.bisect_right(times, since.astimezone(pytz.UTC).replace(tzinfo=None)) - 1, 1)
+        observances = {}
+        for index in range(first, len(times)):
+            offset, dst, name = info[index]
+            previous = info[index - 1][0]
+            key = ('DAYLIGHT' if dst else 'STANDARD', _utc_offset(previous), _utc_offset(offset), name)
+            # Observance starts are local times in the offset being left
+            observances.setdefault(key, []).append(times[index] + previous)
+        for (kind, offset_from, offset_to, name), starts in observances.items():
+            lines += [f'BEGIN:{kind}', f'DTSTART:{_local_format(starts[0])}']
+            if len(starts) > 1:
+                lines.append('RDATE:' + ','.join(_local_format(start) for start in starts[1:]))
+            lines += [f'TZOFFSETFROM:{offset_from}', f'TZOFFSETTO:{offset_to}', f'TZNAME:{name}', f'END:{kind}']
+    lines.append('END:VTIMEZONE')
+    return lines
+
+
+def event_lines(event, uid, overrides=()):
+    """Content lines for one event, plus one VEVENT per moved occurrence"""
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{format_utc(event.updated_at)}',
+        f'LAST-MODIFIED:{format_utc(event.updated_at)}',
+        *_start_lines(event),
+        f'SUMMARY:{escape_text(event.title)}',
+    ]
+    if event.description:
+        lines.append(f'DESCRIPTION:{escape_text(event.description)}')
+    if event.location:
+        lines.append(f'LOCATION:{escape_text(event.location)}')
+    if event.recurrence_rule:
+        lines.append(_rule_line(event))
+        for override in overrides:
+            if override.cancelled:
+                lines.append(f'EXDATE:{format_utc(override.original_start)}')
+    lines.append('END:VEVENT')
+
+    duration = event.end_time - event.start_time
+    for override in overrides:
+        if override.cancelled:
+            continue
+        start = override.start_time or override.original_start
+        lines.extend([
+            'BEGIN:VEVENT',
+            f'UID:{uid}',
+            f'DTSTAMP:{format_utc(event.updated_at)}',
+            f'RECURRENCE-ID:{format_utc(override.original_start)}',
+            f'DTSTART:{format_utc(start)}',
+            f'DTEND:{format_utc(override.end_time or start + duration)}',
+            f'SUMMARY:{escape_text(override.title or event.title)}',
+        ])
+        if override.location or event.location:
+            lines.append(f'LOCATION:{escape_text(override.location or event.location)}')
+        lines.append('END:VEVENT')
+    return lines
+
+
+def _overrides_by_source(user):
+    """Overrides of the user's recurring events, in one query"""
+    sources = {
+        source_event_id(event)
+        for event in Event.objects.filter(user=user).exclude(recurrence_rule='').only(
+            'id', 'external_calendar_id', 'external_calendar_type',
+        )
+    }
+    overrides = {}
+    if sources:
+        for override in EventOccurrenceOverride.objects.filter(event_id__in=sources).order_by('original_start'):
+            overrides.setdefault(override.event_id, []).append(override)
+    return overrides
+
+
+def feed_validators(user_id):
+    """ETag and Last-Modified (a timestamp, or None) for a user's feed.
+
+    Both come from the user's CalendarVersion row, which every write to
+    their events (or to CALENDAR_NAME_FIELDS) bumps, so all processes
+    agree on them.
+    """
+    version, changed_at = (
+        CalendarVersion.objects.filter(user_id=user_id).values_list('version', 'changed_at').first() or (0, None)
+    )
+    return f'"{user_id}-{version}"', int(changed_at.timestamp()) if changed_at else None
+
+
+def stream_calendar(user, host):
+    """Yield the user's calendar as iCalendar text, one VEVENT at a time"""
+    yield fold('BEGIN:VCALENDAR')
+    yield fold('VERSION:2.0')
+    yield fold(f'PRODID:{PRODID}')
+    yield fold('CALSCALE:GREGORIAN')
+    yield fold(f'X-WR-CALNAME:{escape_text(user.get_full_name() or user.username)}')
+
+    zones = (
+        Event.objects.filter(user=user).exclude(recurrence_rule='')
+        .exclude(recurrence_timezone__in=['', 'UTC'])
+        .order_by().values_list('recurrence_timezone').annotate(first=Min('start_time'))
+    )
+    for zone, first in zones:
+        if zone in pytz.all_timezones_set:
+            yield ''.join(fold(line) for line in vtimezone_lines(zone, first))
+
+    overrides = _overrides_by_source(user)
+    events = Event.objects.filter(user=user).order_by('start_time', 'id').only(
+        'id', 'title', 'description', 'location', 'start_time', 'end_time', 'updated_at',
+        'recurrence_rule', 'recurrence_timezone', 'external_calendar_id', 'external_calendar_type',
+    )
+    for event in events.iterator(chunk_size=FEED_CHUNK_SIZE):
+        # Invitees' copies share the original's UID, so clients see one meeting
+        source = source_event_id(event)
+        lines = event_lines(event, f'event-{source}@{host}', overrides.get(source, ()) if event.recurrence_rule else ())
+        yield ''.join(fold(line) for line in lines)
+    yield fold('END:VCALENDAR')
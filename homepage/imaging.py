@@ -0,0 +1,60 @@
+"""Avatar rendering with Pillow.
+
+Pure functions of the uploaded bytes with no Django imports, so they can
+run in a process pool (see homepage/avatars.py) without setting Django up
+in every child.
+"""
+import hashlib
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# Bump when the output changes, so re-rendered files get new names
+RENDER_VERSION = 1
+
+
+def _encode(image, fmt, **params):
+    buffer = BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def render_avatar(data, sizes, original_size, max_pixels):
+    """Render an upload into a cleaned original plus square thumbnails.
+
+    Returns ``(digest, original, thumbnails)``: ``original`` is
+    ``(format, bytes)`` scaled down to fit ``original_size`` and
+    ``thumbnails`` maps each size to ``{format: bytes}`` with a WebP and a
+    JPEG (PNG for transparent images) variant. Nothing from the upload's
+    EXIF, XMP or ICC data is carried over; the EXIF orientation is applied
+    to the pixels first. ``digest`` hashes the input and the render settings.
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    with Image.open(BytesIO(data)) as upload:
+        upload.draft('RGB', (original_size, original_size))  # Cheap JPEG downscale on decode
+        image = ImageOps.exif_transpose(upload)
+        alpha = _has_alpha(image)
+        image = image.convert('RGBA' if alpha else 'RGB')
+    # A bare copy of the pixels; info (exif, icc_profile, xmp, comments) is dropped
+    image = Image.frombytes(image.mode, image.size, image.tobytes())
+
+    fallback = ('PNG', {'optimize': True}) if alpha else ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True})
+    fingerprint = f'{RENDER_VERSION}:{sorted(sizes)}:{original_size}'.encode()
+    digest = hashlib.sha256(fingerprint + data).hexdigest()[:24]
+
+    image.thumbnail((original_size, original_size), Image.LANCZOS)
+    original = (fallback[0].lower(), _encode(image, fallback[0], **fallback[1]))
+
+    thumbnails = {}
+    for size in sizes:
+        thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        thumb.info = {}
+        thumbnails[size] = {
+            'webp': _encode(thumb, 'WEBP', quality=80, method=4),
+            fallback[0].lower(): _encode(thumb, fallback[0], **fallback[1]),
+        }
+    return digest, original, thumbnails
@@ -0,0 +1,474 @@
+"""Bulk import of events from iCalendar (.ics) or CSV files.
+
+Files are read as a stream of lines and parsed one record at a time, so
+memory stays bounded by the chunk size rather than the file size. Each
+chunk is upserted with a single ``bulk_create(update_conflicts=True)``
+keyed on (user, external_calendar_type, external_calendar_id), which makes
+re-importing the same file update events in place instead of duplicating
+them. Uploads through the API are stored and imported by a background
+job (``run_event_import``), which records its progress on an EventImport.
+
+Times follow ``convert_to_utc``: values with an offset or a trailing Z are
+taken as given, values with a TZID are read in that zone, and floating
+values are read in the importing user's timezone.
+"""
+import codecs
+import csv
+import hashlib
+import re
+from datetime import datetime, time as dt_time, timedelta
+
+import pytz
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .events import COPY_TYPES
+from .freebusy import touch_calendars
+from .jobs import enqueue_on_commit
+from .models import Event, EventImport, EventOccurrenceOverride
+from .recurrence import parse_rrule, series_end
+from .reminders import sync_event_reminders
+from .utils import convert_to_utc, get_timezone
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+FORMATS = ('ics', 'csv')
+
+UPSERT_FIELDS = [
+    'title', 'description', 'location', 'start_time', 'end_time',
+    'recurrence_rule', 'recurrence_timezone', 'recurrence_end', 'updated_at',
+]
+
+_DURATION = re.compile(r'^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+# Common spreadsheet/calendar export formats for CSV dates, tried in order
+CSV_DATETIME_FORMATS = [
+    '%m/%d/%Y %I:%M %p', '%m/%d/%Y %I:%M:%S %p', '%m/%d/%Y %H:%M', '%Y-%m-%d %H:%M', '%d.%m.%Y %H:%M',
+]
+CSV_DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%d.%m.%Y']
+
+
+class ImportRowError(ValueError):
+    """A record that can't be turned into an event; it is skipped and reported"""
+
+
+def detect_format(filename, declared=None):
+    if declared in FORMATS:
+        return declared
+    return 'csv' if (filename or '').lower().endswith('.csv') else 'ics'
+
+
+def text_lines(stream, chunk_size=64 * 1024):
+    """Decode a binary file-like object into lines (ends kept) without reading it whole"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    pending = ''
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        pending += decoder.decode(chunk)
+        lines = pending.splitlines(keepends=True)
+        # Hold back a partial line, and a bare \r that may be half of \r\n
+        pending = lines.pop() if lines and not lines[-1].endswith('\n') else ''
+        yield from lines
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+# iCalendar ------------------------------------------------------------------
+
+def _unfold(lines):
+    """Join RFC 5545 folded lines back into logical content lines"""
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def _split_property(line):
+    """'DTSTART;TZID=Europe/Paris:2025...' -> ('DTSTART', {'TZID': 'Europe/Paris'}, '2025...')"""
+    in_quotes = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ':' and not in_quotes:
+            head, value = line[:index], line[index + 1:]
+            break
+    else:
+        return None, {}, ''
+    name, *raw_params = head.split(';')
+    params = {}
+    for param in raw_params:
+        key, _, param_value = param.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def _unescape(value):
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+def parse_ics(lines):
+    """Yield one dict of properties per VEVENT; nested components are ignored"""
+    event = None
+    depth = 0
+    for line in _unfold(lines):
+        name, params, value = _split_property(line)
+        if name == 'BEGIN':
+            if value.upper() == 'VEVENT' and event is None:
+                event = {'EXDATE': []}
+            elif event is not None:
+                depth += 1  # e.g. VALARM inside the event
+        elif name == 'END':
+            if depth:
+                depth -= 1
+            elif value.upper() == 'VEVENT' and event is not None:
+                yield event
+                event = None
+        elif event is not None and not depth and name:
+            if name == 'EXDATE':
+                event['EXDATE'].extend((item, params) for item in value.split(',') if item)
+            else:
+                event[name] = (value, params)
+
+
+def _zone_for(params, default_tz):
+    tzid = params.get('TZID')
+    if tzid:
+        try:
+            return get_timezone(tzid)
+        except pytz.UnknownTimeZoneError:
+            pass  # e.g. Windows zone names from Outlook; fall back to the user's zone
+    return get_timezone(default_tz)
+
+
+def ics_datetime(value, params, default_tz):
+    """(utc datetime, is_all_day) for a DATE or DATE-TIME property value"""
+    value = value.strip()
+    try:
+        if params.get('VALUE') == 'DATE' or len(value) == 8:
+            naive = datetime.combine(datetime.strptime(value, '%Y%m%d').date(), dt_time.min)
+            return _zone_for(params, default_tz).localize(naive).astimezone(pytz.UTC), True
+        if value.endswith('Z'):
+            return pytz.UTC.localize(datetime.strptime(value, '%Y%m%dT%H%M%SZ')), False
+        naive = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    except ValueError:
+        raise ImportRowError(f'Unreadable date "{value}"') from None
+    return _zone_for(params, default_tz).localize(naive).astimezone(pytz.UTC), False
+
+
+def parse_duration(value):
+    match = _DURATION.match(value.strip().upper())
+    if not match or not any(match.groups()[1:]):
+        raise ImportRowError(f'Unreadable duration "{value}"')
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0),
+        hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0),
+    )
+    return -duration if sign == '-' else duration
+
+
+def _text(record, name):
+    value = record.get(name)
+    return _unescape(value[0]).strip() if value else ''
+
+
+def _without_wkst(rule):
+    """Drop WKST: it only changes which week BYDAY counts from, and the
+    expansion always starts weeks on Monday, the RFC 5545 default"""
+    return ';'.join(part for part in rule.split(';') if part.strip().upper().partition('=')[0] != 'WKST')
+
+
+def ics_record(record, default_tz):
+    """Turn a parsed VEVENT into (uid, fields, overrides, warning) or raise ImportRowError"""
+    uid = _text(record, 'UID')
+    if 'DTSTART' not in record:
+        raise ImportRowError('Missing DTSTART')
+    start, all_day = ics_datetime(*record['DTSTART'], default_tz)
+    if 'DTEND' in record:
+        end, _ = ics_datetime(*record['DTEND'], default_tz)
+    elif 'DURATION' in record:
+        end = start + parse_duration(record['DURATION'][0])
+    else:
+        end = start + (timedelta(days=1) if all_day else timedelta(0))
+    if end < start:
+        raise ImportRowError('DTEND is before DTSTART')
+
+    fields = {
+        'title': _text(record, 'SUMMARY')[:200] or '(No title)',
+        'description': _text(record, 'DESCRIPTION'),
+        'location': _text(record, 'LOCATION')[:200],
+        'start_time': start,
+        'end_time': end,
+        'recurrence_rule': '',
+        'recurrence_timezone': '',
+    }
+    warning = None
+    rule = _without_wkst(record.get('RRULE', ('', {}))[0].strip())
+    if rule:
+        try:
+            parse_rrule(rule)
+        except ValueError as exc:
+            # Keep the event rather than dropping it, and say what was lost
+            warning = f'Imported the first occurrence only: {exc}'
+            rule = ''
+    if rule:
+        fields['recurrence_rule'] = rule[:255]
+        fields['recurrence_timezone'] = _zone_for(record['DTSTART'][1], default_tz).zone
+
+    if 'RECURRENCE-ID' in record:
+        # A changed occurrence of a series; it becomes an override, not an event
+        if not uid:
+            raise ImportRowError('RECURRENCE-ID without a UID')
+        original, _ = ics_datetime(*record['RECURRENCE-ID'], default_tz)
+        return uid, None, [{
+            'original_start': original, 'cancelled': False, 'start_time': start, 'end_time': end,
+            'title': fields['title'] if 'SUMMARY' in record else '', 'location': fields['location'],
+        }], warning
+    overrides = [
+        {'original_start': ics_datetime(value, params, default_tz)[0], 'cancelled': True,
+         'start_time': None, 'end_time': None, 'title': '', 'location': ''}
+        for value, params in record['EXDATE']
+    ] if rule else []
+    if not uid:
+        uid = 'ics-' + hashlib.sha1(f"{fields['title']}|{start.isoformat()}|{end.isoformat()}".encode()).hexdigest()
+    return uid, fields, overrides, warning
+
+
+# CSV ------------------------------------------------------------------------
+
+def _csv_value(row, *names):
+    for name in names:
+        value = row.get(name)
+        if value and value.strip():
+            return value.strip()
+    return ''
+
+
+def _csv_datetime(value, default_tz):
+    parsed = parse_datetime(value.replace('Z', '+00:00')) if value else None
+    if parsed is None:
+        for fmt in CSV_DATETIME_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        for fmt in CSV_DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        raise ImportRowError(f'Unreadable date "{value}"')
+    return convert_to_utc(parsed, default_tz)
+
+
+def parse_csv(lines):
+    """Yield rows as dicts keyed by normalized header (lowercase, underscores)"""
+    reader = csv.reader(lines)
+    header = None
+    for row in reader:
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if header is None:
+            header = [re.sub(r'\W+', '_', cell.strip().lower()).strip('_') for cell in row]
+            continue
+        yield dict(zip(header, row))
+
+
+def csv_record(row, default_tz):
+    """Turn a CSV row into (uid, fields, overrides, warning) or raise ImportRowError.
+
+    Accepts a plain title/start_time/end_time layout as well as the Google
+    and Outlook export headers (Subject, Start Date, Start Time, ...).
+    """
+    # Exports with separate date columns put only the clock time in "Start Time"
+    if _csv_value(row, 'start_date'):
+        start = f"{_csv_value(row, 'start_date')} {_csv_value(row, 'start_time') or '12:00 AM'}"
+    else:
+        start = _csv_value(row, 'start_time', 'start', 'dtstart')
+    if _csv_value(row, 'end_date'):
+        end = f"{_csv_value(row, 'end_date')} {_csv_value(row, 'end_time') or '11:59 PM'}"
+    else:
+        end = _csv_value(row, 'end_time', 'end', 'dtend')
+    if not start:
+        raise ImportRowError('Missing start time')
+    start_time = _csv_datetime(start, default_tz)
+    end_time = _csv_datetime(end, default_tz) if end else start_time + timedelta(hours=1)
+    if end_time < start_time:
+        raise ImportRowError('End is before start')
+
+    title = _csv_value(row, 'title', 'subject', 'summary', 'name')[:200] or '(No title)'
+    uid = _csv_value(row, 'uid', 'id', 'external_id', 'event_id')
+    if not uid:
+        # No id column: identical rows dedupe against each other
+        uid = 'csv-' + hashlib.sha1(f'{title}|{start_time.isoformat()}|{end_time.isoformat()}'.encode()).hexdigest()
+    return uid, {
+        'title': title,
+        'description': _csv_value(row, 'description', 'notes'),
+        'location': _csv_value(row, 'location', 'where')[:200],
+        'start_time': start_time,
+        'end_time': end_time,
+        'recurrence_rule': '',
+        'recurrence_timezone': '',
+    }, [], None
+
+
+# Pipeline -------------------------------------------------------------------
+
+def _touch_series(ids, touched):
+    """Bump updated_at on events ``ids`` and their invitees' copies.
+
+    Cached expansions are keyed on updated_at; the copies' owners are added
+    to ``touched`` for touch_calendars. Returns the ids that have copies.
+    """
+    series = Event.objects.filter(
+        Q(id__in=ids) | Q(external_calendar_id__in=[str(i) for i in ids], external_calendar_type__in=COPY_TYPES)
+    )
+    series.update(updated_at=timezone.now())
+    copied = set()
+    for source_id, user_id in series.filter(external_calendar_type__in=COPY_TYPES).values_list(
+        'external_calendar_id', 'user_id',
+    ):
+        copied.add(int(source_id))
+        touched.add(user_id)
+    return copied
+
+
+def _upsert(user, calendar_type, chunk, touched):
+    """Insert or update one chunk of {uid: fields}; returns the saved events"""
+    events = []
+    for uid, fields in chunk.items():
+        event = Event(user=user, external_calendar_type=calendar_type, external_calendar_id=uid, **fields)
+        if event.recurrence_rule:
+            event.recurrence_end = series_end(event)
+        events.append(event)
+    with transaction.atomic():
+        Event.objects.bulk_create(
+            events,
+            update_conflicts=True,
+            unique_fields=['user', 'external_calendar_type', 'external_calendar_id'],
+            update_fields=UPSERT_FIELDS,
+        )
+        sync_event_reminders(events)
+        ids = Event.objects.filter(
+            user=user, external_calendar_type=calendar_type, external_calendar_id__in=list(chunk),
+        ).values_list('id', flat=True)
+        # Invitees' copies pick up the re-imported fields like a manual edit's
+        for event_id in _touch_series(list(ids), touched):
+            enqueue_on_commit('propagate_event_update', {'event_id': event_id}, priority=5)
+    return events
+
+
+def _save_overrides(user, calendar_type, pending, touched):
+    """Attach EXDATEs and moved occurrences to their (now imported) series"""
+    saved = 0
+    uids = list(pending)
+    for offset in range(0, len(uids), IMPORT_CHUNK_SIZE):
+        batch = uids[offset:offset + IMPORT_CHUNK_SIZE]
+        ids = dict(Event.objects.filter(
+            user=user, external_calendar_type=calendar_type, external_calendar_id__in=batch,
+        ).exclude(recurrence_rule='').values_list('external_calendar_id', 'id'))
+        overrides = [
+            EventOccurrenceOverride(event_id=ids[uid], **override)
+            for uid in batch if uid in ids
+            for override in pending[uid].values()
+        ]
+        with transaction.atomic():
+            EventOccurrenceOverride.objects.bulk_create(
+                overrides,
+                update_conflicts=True,
+                unique_fields=['event', 'original_start'],
+                update_fields=['cancelled', 'start_time', 'end_time', 'title', 'location'],
+            )
+            _touch_series(list(ids.values()), touched)
+        saved += len(overrides)
+    return saved
+
+
+def import_events(user, stream, fmt, default_tz, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Import every event in ``stream`` (a binary file) for ``user``.
+
+    Returns counts plus the first few per-record errors (records skipped)
+    and warnings (records imported with something left out); ``progress``
+    is called with the running stats after every chunk.
+    """
+    calendar_type = 'ical' if fmt == 'ics' else 'csv'
+    if fmt == 'ics':
+        records, convert = parse_ics(text_lines(stream)), ics_record
+    else:
+        records, convert = parse_csv(text_lines(stream)), csv_record
+
+    stats = {'processed': 0, 'imported': 0, 'skipped': 0, 'overrides': 0, 'errors': [], 'warnings': []}
+    chunk = {}
+    pending_overrides = {}
+    touched = {user.id}
+
+    def flush():
+        if chunk:
+            stats['imported'] += len(_upsert(user, calendar_type, chunk, touched))
+            chunk.clear()
+        if progress:
+            progress(stats)
+
+    for number, record in enumerate(records, start=1):
+        stats['processed'] += 1
+        try:
+            uid, fields, overrides, warning = convert(record, default_tz)
+        except ImportRowError as exc:
+            stats['skipped'] += 1
+            if len(stats['errors']) < MAX_REPORTED_ERRORS:
+                stats['errors'].append({'record': number, 'error': str(exc)})
+            continue
+        if warning and len(stats['warnings']) < MAX_REPORTED_ERRORS:
+            stats['warnings'].append({'record': number, 'warning': warning})
+        uid = uid[:200]
+        if fields is not None:
+            # Later copies of the same UID within a chunk win (one row per conflict key)
+            chunk[uid] = fields
+        for override in overrides:
+            pending_overrides.setdefault(uid, {})[override['original_start']] = override
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+
+    if pending_overrides:
+        stats['overrides'] = _save_overrides(user, calendar_type, pending_overrides, touched)
+    touch_calendars(touched)
+    return stats
+
+
+def run_event_import(import_id):
+    """Job handler: import an uploaded file, recording progress on its EventImport"""
+    event_import = EventImport.objects.select_related('user').filter(id=import_id).first()
+    if event_import is None or event_import.status == 'done':
+        return
+    EventImport.objects.filter(id=import_id).update(status='running', error='', updated_at=timezone.now())
+
+    def progress(stats):
+        EventImport.objects.filter(id=import_id).update(stats=stats, updated_at=timezone.now())
+
+    try:
+        with event_import.file.open('rb') as stream:
+            stats = import_events(event_import.user, stream, event_import.file_format, event_import.timezone,
+                                  progress=progress)
+    except Exception as exc:
+        # The job is retried; the upsert makes a second pass safe
+        EventImport.objects.filter(id=import_id).update(status='failed', error=str(exc), updated_at=timezone.now())
+        raise
+    now = timezone.now()
+    EventImport.objects.filter(id=import_id).update(
+        status='done', stats=stats, file='', finished_at=now, updated_at=now,
+    )
+    event_import.file.delete(save=False)
@@ -0,0 +1,127 @@
+"""Database-backed job queue for work that shouldn't hold up a request.
+
+Views enqueue jobs with ``enqueue_on_commit`` so the row only appears once
+the view's own write has committed; ``python manage.py runworker`` claims
+them with SKIP LOCKED, runs the registered task and retries failures with
+exponential backoff. Finished jobs are deleted; jobs that exhaust their
+attempts stay behind with status 'failed' and the last traceback.
+"""
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def _options():
+    options = {'MAX_ATTEMPTS': 3, 'BACKOFF_SECONDS': 30, 'LEASE_SECONDS': 300, 'EAGER': False}
+    options.update(getattr(settings, 'JOB_QUEUE', {}))
+    return options
+
+
+def task(name):
+    """Register a function as the handler for jobs called ``name``"""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    from . import tasks  # noqa: F401  (registers the handlers on first import)
+    return _registry[name]
+
+
+def enqueue(name, payload=None, priority=0, delay=None, max_attempts=None):
+    """Insert a job row now, inside whatever transaction is active"""
+    options = _options()
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts or options['MAX_ATTEMPTS'],
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+
+
+def enqueue_on_commit(name, payload=None, priority=0, delay=None, max_attempts=None):
+    """Queue a job once the current transaction commits.
+
+    With ``JOB_QUEUE['EAGER']`` on (handy without a worker running) the task
+    runs in-process after commit instead.
+    """
+    if _options()['EAGER']:
+        transaction.on_commit(partial(get_task(name), **(payload or {})))
+    else:
+        transaction.on_commit(partial(enqueue, name, payload, priority, delay, max_attempts))
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_jobs(worker, limit=1, now=None):
+    """Lease up to ``limit`` due jobs for ``worker``.
+
+    Jobs whose lease ran out (their worker died mid-run) are claimable again.
+    """
+    now = now or timezone.now()
+    lease = timedelta(seconds=_options()['LEASE_SECONDS'])
+    with transaction.atomic():
+        jobs = list(
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status='queued', run_at__lte=now)
+                | Q(status='running', locked_until__lt=now)
+            )
+            .order_by('-priority', 'run_at', 'id')[:limit]
+        )
+        if jobs:
+            Job.objects.filter(id__in=[job.id for job in jobs]).update(
+                status='running', locked_by=worker, locked_until=now + lease
+            )
+    return jobs
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome; returns True on success"""
+    try:
+        get_task(job.name)(**job.payload)
+    except Exception:
+        attempts = job.attempts + 1
+        error = traceback.format_exc()
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.name, attempts)
+        if attempts >= job.max_attempts:
+            Job.objects.filter(id=job.id).update(
+                status='failed', attempts=attempts, last_error=error, locked_until=None
+            )
+        else:
+            delay = _options()['BACKOFF_SECONDS'] * 2 ** (attempts - 1)
+            Job.objects.filter(id=job.id).update(
+                status='queued', attempts=attempts, last_error=error, locked_by='', locked_until=None,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+        return False
+    Job.objects.filter(id=job.id).delete()
+    return True
+
+
+def run_pending_jobs(worker, limit=10):
+    """Claim and run one batch; returns how many jobs were processed"""
+    jobs = claim_jobs(worker, limit)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from homepage.models import Event
+from homepage.reminders import sync_event_reminders
+
+
+class Command(BaseCommand):
+    help = "Generates default-offset reminders for existing future events"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Events per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        future = Event.objects.filter(start_time__gt=timezone.now()).only('id', 'user_id', 'title', 'start_time')
+        last_id = 0
+        total = 0
+        while True:
+            batch = list(future.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            sync_event_reminders(batch)
+            total += len(batch)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {total} event(s) processed...')
+        self.stdout.write(self.style.SUCCESS(f'Synced reminders for {total} future event(s)'))
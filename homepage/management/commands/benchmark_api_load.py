@@ -0,0 +1,133 @@
+import asyncio
+import statistics
+import time
+from collections import Counter, defaultdict
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from homepage.models import Event
+
+
+class _Results:
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.statuses = Counter()
+        self.errors = 0
+
+
+async def _read_response(reader):
+    """Status and keep-alive flag of one HTTP/1.1 response; the body is discarded"""
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split()[1])
+    headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection') != 'close'
+
+
+async def _client(number, host, port, paths, cookie, record_from, deadline, results):
+    """One keep-alive connection issuing requests back to back, reconnecting if closed"""
+    reader = writer = None
+    turn = number
+    while time.monotonic() < deadline:
+        path = paths[turn % len(paths)]
+        turn += 1
+        started = time.monotonic()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+                started = time.monotonic()
+            writer.write(
+                f'GET {path} HTTP/1.1\r\nHost: {host}\r\nCookie: {cookie}\r\n'
+                f'Accept: application/json\r\nConnection: keep-alive\r\n\r\n'.encode()
+            )
+            status, keep_alive = await _read_response(reader)
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            if started >= record_from:
+                results.errors += 1
+            writer = None
+            await asyncio.sleep(0.05)
+            continue
+        if started >= record_from:
+            results.timings[path.split('?')[0]].append((time.monotonic() - started) * 1000)
+            results.statuses[status] += 1
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests the read-heavy JSON endpoints over HTTP with many concurrent clients. '
+        'Start the server to measure first (runserver, gunicorn for WSGI or uvicorn for ASGI).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User whose session the clients share')
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server')
+        parser.add_argument('--clients', type=int, default=500, help='Concurrent connections')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds to measure')
+        parser.add_argument('--warmup', type=float, default=3, help='Seconds of load before measuring')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"No user named {options['username']!r}")
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('--url must be a plain http:// URL')
+
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+
+        paths = ['/homepage/api/events/', '/homepage/api/profile/', '/homepage/api/search-users/?q=al',
+                 '/homepage/api/notifications/']
+        event_id = Event.objects.filter(user=user).values_list('id', flat=True).first()
+        if event_id:
+            paths.append(f'/homepage/api/events/{event_id}/')
+        try:
+            results = asyncio.run(self._load(url, paths, f'{settings.SESSION_COOKIE_NAME}={session.session_key}', options))
+        finally:
+            session.delete()
+        self._report(results, options)
+
+    async def _load(self, url, paths, cookie, options):
+        results = _Results()
+        now = time.monotonic()
+        record_from = now + options['warmup']
+        deadline = record_from + options['duration']
+        await asyncio.gather(*(
+            _client(number, url.hostname, url.port or 80, paths, cookie, record_from, deadline, results)
+            for number in range(options['clients'])
+        ))
+        return results
+
+    def _report(self, results, options):
+        total = sum(len(timings) for timings in results.timings.values())
+        self.stdout.write(
+            f"{options['clients']} clients, {options['duration']:.0f}s: {total} responses, "
+            f"{total / options['duration']:.0f} req/s, {results.errors} connection errors"
+        )
+        self.stdout.write(f"status codes: {dict(sorted(results.statuses.items()))}")
+        self.stdout.write(f"{'endpoint':<34}{'requests':>9}{'p50 ms':>9}{'p99 ms':>9}")
+        for path, timings in sorted(results.timings.items()):
+            cuts = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+            self.stdout.write(f'{path:<34}{len(timings):>9}{cuts[49]:>9.1f}{cuts[98]:>9.1f}')
@@ -0,0 +1,95 @@
+import itertools
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from homepage.models import Event
+from homepage.search import naive_search, search_events, search_terms
+
+SYLLABLES = 'ka lo mi re su ta ne po vi da fe gu ri so la me ni to be ru'.split()
+RARE_WORD = 'zephyrine'
+
+
+def vocabulary(size):
+    """Made-up words; drawn with Zipf weights so word frequencies look like real text"""
+    words = []
+    n = 0
+    while len(words) < size:
+        word, rest = '', n
+        for _ in range(3):
+            rest, index = divmod(rest, len(SYLLABLES))
+            word += SYLLABLES[index]
+        words.append(word + (str(rest) if rest else ''))
+        n += 1
+    return words
+
+
+class Command(BaseCommand):
+    help = 'Compares full-text event search against an icontains scan on synthetic data (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic events to create')
+        parser.add_argument('--users', type=int, default=1, help='Calendars to spread them across')
+        parser.add_argument('--vocabulary', type=int, default=20000, help='Distinct words in the synthetic text')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._run(options)
+            transaction.set_rollback(True)
+
+    def _run(self, options):
+        rng = random.Random(42)
+        words = vocabulary(options['vocabulary'])
+        weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+        def text(k):
+            return ' '.join(rng.choices(words, cum_weights=weights, k=k))
+
+        users = [User.objects.create(username=f'__bench_search_{n}') for n in range(options['users'])]
+        start = timezone.now()
+        started = time.perf_counter()
+        batch = []
+        for n in range(options['rows']):
+            # One row in a thousand carries a rare word
+            rare = f' {RARE_WORD}' if n % 1000 == 0 else ''
+            batch.append(Event(
+                user=users[n % len(users)],
+                title=text(3).capitalize(),
+                description=text(12) + rare,
+                location=text(1).capitalize() + ' room',
+                start_time=start + timedelta(minutes=30 * n),
+                end_time=start + timedelta(minutes=30 * n + 30),
+            ))
+            if len(batch) == 5000:
+                Event.objects.bulk_create(batch)
+                batch = []
+        Event.objects.bulk_create(batch)
+        self.stdout.write(f"Created {options['rows']} events in {time.perf_counter() - started:.1f}s")
+
+        user = users[0]
+        self.stdout.write(f"{'query':<22}{'matches':>9}{'index ms':>11}{'scan ms':>11}{'speedup':>9}")
+        # From very common words down to rare ones, plus multi-word queries
+        queries = [words[5], words[50], words[500], words[5000], f'{words[20]} {words[40]}', RARE_WORD]
+        for query in queries:
+            terms = search_terms(query)
+            indexed = self._time(options['repeat'], lambda: search_events(user, query, limit=20))
+            # A scan has to visit every match before it can rank any of them
+            matches = naive_search(user, terms).count()
+            scanned = self._time(options['repeat'], lambda: list(naive_search(user, terms).values_list('id', flat=True)))
+            self.stdout.write(
+                f'{query:<22}{matches:>9}{indexed * 1000:>11.1f}{scanned * 1000:>11.1f}{scanned / indexed:>8.1f}x'
+            )
+
+    def _time(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
@@ -0,0 +1,85 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from homepage.models import Event
+from homepage.recurrence import occurrences_between, recurring_in_window
+
+
+class Command(BaseCommand):
+    help = 'Compares storage and window-query cost of recurring series against materialized copies (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--series', type=int, default=50, help='Weekly meetings to simulate')
+        parser.add_argument('--weeks', type=int, default=104, help='Occurrences per meeting')
+        parser.add_argument('--window-days', type=int, default=31, help='Calendar window to query')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._run(options)
+            transaction.set_rollback(True)
+
+    def _run(self, options):
+        series, weeks = options['series'], options['weeks']
+        start = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0) - timedelta(weeks=weeks // 2)
+        duration = timedelta(minutes=30)
+        materialized_user = User.objects.create(username='__bench_materialized')
+        recurring_user = User.objects.create(username='__bench_recurring')
+
+        Event.objects.bulk_create(
+            Event(
+                user=materialized_user, title=f'Meeting {n}',
+                start_time=start + timedelta(weeks=week, hours=n % 8),
+                end_time=start + timedelta(weeks=week, hours=n % 8) + duration,
+            )
+            for n in range(series) for week in range(weeks)
+        )
+        for n in range(series):
+            Event.objects.create(
+                user=recurring_user, title=f'Meeting {n}',
+                start_time=start + timedelta(hours=n % 8), end_time=start + timedelta(hours=n % 8) + duration,
+                recurrence_rule=f'FREQ=WEEKLY;COUNT={weeks}', recurrence_timezone='UTC',
+            )
+
+        window_start = timezone.now()
+        window_end = window_start + timedelta(days=options['window_days'])
+
+        def materialized():
+            return list(Event.objects.filter(
+                user=materialized_user, start_time__lt=window_end, end_time__gt=window_start
+            ))
+
+        def recurring(window_offset=timedelta()):
+            events = Event.objects.filter(recurring_in_window(window_start, window_end), user=recurring_user)
+            return occurrences_between(events, window_start + window_offset, window_end + window_offset)
+
+        runs = iter(range(1, 1_000_000))
+
+        def recurring_cold():
+            # A fresh window per run so the expansion cache never hits
+            return recurring(timedelta(microseconds=next(runs)))
+
+        rows = [
+            ('materialized', Event.objects.filter(user=materialized_user).count(), *self._measure(materialized, options)),
+            ('recurring (cold)', Event.objects.filter(user=recurring_user).count(), *self._measure(recurring_cold, options)),
+            ('recurring (cached)', Event.objects.filter(user=recurring_user).count(), *self._measure(recurring, options)),
+        ]
+        self.stdout.write(f"{series} weekly meetings x {weeks} weeks, {options['window_days']}-day window")
+        self.stdout.write(f"{'strategy':<20}{'rows stored':>12}{'results':>10}{'queries':>10}{'ms/run':>10}")
+        for name, stored, results, queries, ms in rows:
+            self.stdout.write(f'{name:<20}{stored:>12}{results:>10}{queries:>10}{ms:>10.2f}')
+
+    def _measure(self, func, options):
+        func()  # warm-up
+        timings = []
+        for _ in range(options['repeat']):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                results = func()
+                timings.append((time.perf_counter() - started) * 1000)
+        return len(results), len(queries), min(timings)
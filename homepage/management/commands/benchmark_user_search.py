@@ -0,0 +1,89 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from homepage.directory import PrefixIndex, _query_index, _serialize, bump_directory_version, index_users, search_users
+from homepage.models import UserSearchTerm
+
+FIRST_NAMES = (
+    'james mary robert patricia john jennifer michael linda david elizabeth william barbara richard susan '
+    'joseph jessica thomas sarah charles karen maria jose juan ana luis carmen wei li jun hiroshi yuki '
+    'priya rahul amit fatima ahmed omar olga ivan anna pierre marie hans greta'
+).split()
+LAST_NAMES = (
+    'smith johnson williams brown jones garcia miller davis rodriguez martinez hernandez lopez gonzalez '
+    'wilson anderson thomas taylor moore jackson martin lee perez thompson white harris sanchez clark '
+    'ramirez lewis robinson walker young allen king wright scott torres nguyen hill flores green adams '
+    'nelson baker hall rivera campbell mitchell carter roberts tanaka suzuki wang chen kumar singh'
+).split()
+DOMAINS = ['example.com', 'mail.test', 'corp.example', 'uni.example.edu']
+
+
+class Command(BaseCommand):
+    help = 'Measures user autocomplete latency (p50/p99) against the old icontains query (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000, help='Synthetic users to create')
+        parser.add_argument('--queries', type=int, default=1000, help='Autocomplete requests to time')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                transaction.set_rollback(True)
+        finally:
+            # Cached results may name users that were just rolled back
+            bump_directory_version()
+
+    def _run(self, options):
+        rng = random.Random(7)
+        started = time.perf_counter()
+        people = []
+        for n in range(options['users']):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            people.append(User(
+                username=f'{first}.{last}{n}', email=f'{first[0]}{last}{n}@{rng.choice(DOMAINS)}',
+                first_name=first.capitalize(), last_name=last.capitalize(), password='!',
+            ))
+        for offset in range(0, len(people), 5000):
+            created = User.objects.bulk_create(people[offset:offset + 5000])
+            index_users(created)
+        self.stdout.write(f"Created and indexed {options['users']} users in {time.perf_counter() - started:.1f}s")
+
+        # What someone types: the first 2-6 letters of a name, username or email
+        prefixes = []
+        for _ in range(options['queries']):
+            person = rng.choice(people)
+            word = rng.choice([person.first_name, person.last_name, person.username, person.email]).lower()
+            prefixes.append(word[:rng.randint(2, 6)])
+
+        def old_query(prefix):
+            return list(User.objects.filter(
+                Q(username__icontains=prefix) | Q(email__icontains=prefix)
+                | Q(first_name__icontains=prefix) | Q(last_name__icontains=prefix)
+            )[:10])
+
+        local = PrefixIndex(
+            UserSearchTerm.objects.values_list('term', 'user_id'),
+            {row[0]: _serialize(*row) for row in User.objects.values_list('id', 'username', 'email', 'first_name', 'last_name')},
+        )
+        bump_directory_version()
+        self.stdout.write(f"{'lookup':<34}{'p50 ms':>9}{'p99 ms':>9}")
+        self._report('icontains over auth_user (before)', prefixes, old_query)
+        self._report('prefix index, uncached', prefixes, lambda prefix: _query_index(prefix, 11))
+        self._report('prefix index + cache, first pass', prefixes, search_users)
+        self._report('prefix index + cache, repeated', prefixes, search_users)
+        self._report('in-process PrefixIndex', prefixes, lambda prefix: local.search(prefix, 11))
+
+    def _report(self, label, prefixes, func):
+        timings = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            func(prefix)
+            timings.append((time.perf_counter() - started) * 1000)
+        cuts = statistics.quantiles(timings, n=100)
+        self.stdout.write(f'{label:<34}{cuts[49]:>9.2f}{cuts[98]:>9.2f}')
@@ -0,0 +1,43 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from homepage.delivery import deliver_pending_emails
+
+
+class Command(BaseCommand):
+    help = 'Sends pending email notifications in batches over a reused SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Notifications per batch')
+        parser.add_argument('--idle-sleep', type=float, default=10, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        if not options['once']:
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+            signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+        totals = {'sent': 0, 'skipped': 0, 'retry': 0, 'failed': 0}
+        while not stop.is_set():
+            close_old_connections()
+            result = deliver_pending_emails(batch_size=options['batch_size'])
+            for key, value in result.items():
+                totals[key] += value
+            processed = sum(result.values())
+            if processed:
+                self.stdout.write(
+                    f"Batch: {result['sent']} sent, {result['retry']} to retry, "
+                    f"{result['failed']} failed, {result['skipped']} skipped"
+                )
+                continue
+            if options['once']:
+                break
+            stop.wait(options['idle_sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals['sent']} email(s); {totals['retry']} queued for retry, "
+            f"{totals['failed']} failed, {totals['skipped']} skipped"
+        ))
@@ -0,0 +1,53 @@
+import signal
+import threading
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from homepage.reminders import dispatch_due_reminders, next_reminder_time
+
+
+class Command(BaseCommand):
+    help = 'Long-running dispatcher that turns due reminders into notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Reminders claimed per transaction')
+        parser.add_argument('--max-sleep', type=float, default=5,
+                            help='Longest wait before checking for reminders created or moved earlier (seconds)')
+        parser.add_argument('--once', action='store_true', help='Dispatch everything currently due and exit')
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        if not options['once']:
+            signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+            signal.signal(signal.SIGINT, lambda *_: self.stop.set())
+
+        batch_size = options['batch_size']
+        max_sleep = timedelta(seconds=options['max_sleep'])
+        total = 0
+
+        while not self.stop.is_set():
+            close_old_connections()
+            now = timezone.now()
+
+            # Drain everything due, one claimed batch at a time.
+            while True:
+                sent = dispatch_due_reminders(now, batch_size)
+                total += sent
+                if sent:
+                    self.stdout.write(f'Dispatched {sent} reminder(s)')
+                if sent < batch_size:
+                    break
+
+            if options['once']:
+                break
+
+            # Sleep until the next reminder is due, read fresh from the due-time
+            # index each time round, so one created or rescheduled meanwhile
+            # waits at most --max-sleep past its due time.
+            next_due = next_reminder_time(now)
+            wake_at = min(next_due, now + max_sleep) if next_due else now + max_sleep
+            self.stop.wait(max((wake_at - timezone.now()).total_seconds(), 0))
+
+        self.stdout.write(self.style.SUCCESS(f'Dispatched {total} reminder(s) in total'))
@@ -0,0 +1,50 @@
+import time
+
+import pytz
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from homepage.importer import FORMATS, IMPORT_CHUNK_SIZE, detect_format, import_events
+from homepage.utils import get_user_profile
+
+
+class Command(BaseCommand):
+    help = 'Imports events from an .ics or .csv file into a user\'s calendar (re-running updates instead of duplicating)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User whose calendar receives the events')
+        parser.add_argument('path', help='Path to the .ics or .csv file')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--timezone', help="Zone for floating times; defaults to the user's profile timezone")
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Events per upsert')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']}")
+        tz_name = options['timezone'] or get_user_profile(user).timezone
+        if tz_name not in pytz.all_timezones_set:
+            raise CommandError(f'Unknown timezone {tz_name}')
+        fmt = detect_format(options['path'], options['format'])
+        started = time.perf_counter()
+
+        def progress(stats):
+            self.stdout.write(
+                f"  {stats['processed']} record(s) read, {stats['imported']} imported, "
+                f"{stats['skipped']} skipped ({time.perf_counter() - started:.1f}s)"
+            )
+
+        try:
+            with open(options['path'], 'rb') as stream:
+                stats = import_events(user, stream, fmt, tz_name, options['chunk_size'], progress)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in stats['errors']:
+            self.stdout.write(self.style.ERROR(f"  record {error['record']} skipped: {error['error']}"))
+        for warning in stats['warnings']:
+            self.stdout.write(self.style.WARNING(f"  record {warning['record']}: {warning['warning']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['imported']} event(s) and {stats['overrides']} occurrence change(s), "
+            f"skipped {stats['skipped']}, in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from homepage.notifications import purge_notifications
+
+
+class Command(BaseCommand):
+    help = 'Archives or deletes notifications older than the per-type retention in NOTIFICATION_RETENTION'
+
+    def add_arguments(self, parser):
+        retention = getattr(settings, 'NOTIFICATION_RETENTION', {})
+        parser.add_argument('--mode', choices=['archive', 'delete'], default=retention.get('MODE', 'archive'))
+        parser.add_argument('--chunk-size', type=int, default=retention.get('CHUNK_SIZE', 500))
+        parser.add_argument('--sleep', type=float, default=retention.get('SLEEP', 0.1),
+                            help='Seconds to pause between chunks')
+        parser.add_argument('--dry-run', action='store_true', help='Count expired rows without changing anything')
+
+    def handle(self, *args, **options):
+        retention_days = getattr(settings, 'NOTIFICATION_RETENTION', {}).get('DAYS', {})
+        if not retention_days:
+            raise CommandError('NOTIFICATION_RETENTION["DAYS"] is not configured')
+
+        total = 0
+        for total in purge_notifications(
+            retention_days,
+            mode=options['mode'],
+            chunk_size=options['chunk_size'],
+            sleep=options['sleep'],
+            dry_run=options['dry_run'],
+        ):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {total} notification(s) processed...')
+
+        verb = 'Would process' if options['dry_run'] else ('Archived' if options['mode'] == 'archive' else 'Deleted')
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} expired notification(s)'))
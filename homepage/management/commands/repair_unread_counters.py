@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from homepage.models import Notification, NotificationCounter
+from homepage.utils import invalidate_user_cache
+
+
+def _actual_unread():
+    """Correlated subquery counting the counter's user's unread notifications"""
+    counts = (
+        Notification.objects.filter(user_id=OuterRef('user_id'), is_read=False)
+        .order_by().values('user_id').annotate(n=Count('id')).values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = 'Recomputes denormalized unread notification counters in batches and fixes any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        last_id = 0
+        checked = drifted = 0
+
+        while True:
+            user_ids = list(
+                User.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+            checked += len(user_ids)
+            if dry_run:
+                drifted += self._count_drift(user_ids)
+            else:
+                fixed = self._repair(user_ids)
+                drifted += len(fixed)
+                for user_id in fixed:
+                    invalidate_user_cache(user_id)
+
+        verb = 'would fix' if dry_run else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} user(s), {verb} {drifted} counter(s)'))
+
+    def _count_drift(self, user_ids):
+        counters = NotificationCounter.objects.filter(user_id__in=user_ids)
+        missing = len(user_ids) - counters.count()
+        return missing + counters.annotate(actual=_actual_unread()).exclude(unread=F('actual')).count()
+
+    def _repair(self, user_ids):
+        """Fix the batch's drifted counters; returns the user ids that changed.
+
+        The counter rows stay locked from the count to the write, so an
+        F() increment from a concurrent notification waits and is applied
+        on top of the corrected value instead of being overwritten.
+        """
+        with transaction.atomic():
+            missing = set(user_ids) - set(
+                NotificationCounter.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+            )
+            NotificationCounter.objects.bulk_create(
+                [NotificationCounter(user_id=user_id, unread=0) for user_id in missing],
+                ignore_conflicts=True,
+            )
+            counters = NotificationCounter.objects.select_for_update().filter(user_id__in=user_ids)
+            list(counters.values_list('user_id', flat=True))  # take the row locks
+            fixed = list(
+                counters.annotate(actual=_actual_unread()).exclude(unread=F('actual')).values_list('user_id', flat=True)
+            )
+            NotificationCounter.objects.filter(user_id__in=fixed).update(unread=_actual_unread())
+        return set(fixed) | missing
@@ -0,0 +1,80 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, connections
+from homepage.jobs import run_pending_jobs, worker_id
+
+
+def _work(stop, batch_size, idle_sleep, once):
+    """Worker thread loop: run batches until stopped (or the queue drains with --once)"""
+    name = f"{worker_id()}:{threading.get_ident()}"
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            if run_pending_jobs(name, batch_size):
+                continue
+            if once:
+                break
+            stop.wait(idle_sleep)
+    finally:
+        connection.close()
+
+
+def _run_threads(stop, threads, batch_size, idle_sleep, once):
+    pool = [
+        threading.Thread(target=_work, args=(stop, batch_size, idle_sleep, once), daemon=True)
+        for _ in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+
+def _child(threads, batch_size, idle_sleep, once):
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    _run_threads(stop, threads, batch_size, idle_sleep, once)
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs with a pool of worker processes and threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes to fork')
+        parser.add_argument('--threads', type=int, default=2, help='Worker threads per process')
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed per transaction')
+        parser.add_argument('--idle-sleep', type=float, default=2, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Run everything currently due and exit')
+
+    def handle(self, *args, **options):
+        args = (options['threads'], options['batch_size'], options['idle_sleep'], options['once'])
+        self.stdout.write(f"Starting {options['processes']} process(es) x {options['threads']} thread(s)")
+
+        if options['processes'] <= 1:
+            stop = threading.Event()
+            if not options['once']:
+                signal.signal(signal.SIGTERM, lambda *_: stop.set())
+                signal.signal(signal.SIGINT, lambda *_: stop.set())
+            _run_threads(stop, *args)
+        else:
+            # Children must not inherit the parent's database connections.
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            children = [context.Process(target=_child, args=args) for _ in range(options['processes'])]
+            for child in children:
+                child.start()
+
+            def forward(signum, frame):
+                for child in children:
+                    if child.is_alive():
+                        child.terminate()
+            signal.signal(signal.SIGTERM, forward)
+            signal.signal(signal.SIGINT, forward)
+            for child in children:
+                child.join()
+
+        self.stdout.write(self.style.SUCCESS('Worker stopped'))
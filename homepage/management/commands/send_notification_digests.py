@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from homepage.models import Notification, UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Emails a daily summary of new notifications to users who chose digest delivery'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Emails sent per SMTP connection')
+        parser.add_argument('--max-items', type=int, default=20, help='Notifications listed per digest')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        profiles = (
+            UserProfile.objects
+            .filter(digest_frequency='daily', email_notifications=True)
+            .exclude(user__email='')
+            .exclude(last_digest_at__gt=now - timedelta(hours=23))
+            .select_related('user')
+            .order_by('id')
+        )
+
+        sent = 0
+        batch, batch_ids = [], []
+        for profile in profiles.iterator(chunk_size=options['batch_size']):
+            since = profile.last_digest_at or now - timedelta(days=1)
+            recent = Notification.objects.filter(
+                user_id=profile.user_id, created_at__gt=since, archived_at__isnull=True
+            ).order_by('-created_at')
+            items = list(recent[:options['max_items']])
+            batch_ids.append(profile.id)
+            if items:
+                batch.append(self.build_message(profile.user, items, recent.count()))
+            if len(batch_ids) >= options['batch_size']:
+                sent += self.flush(batch, batch_ids, now)
+                batch, batch_ids = [], []
+        sent += self.flush(batch, batch_ids, now)
+
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} digest email(s)'))
+
+    def build_message(self, user, items, total):
+        lines = [f"Hi {user.get_full_name() or user.username},", '', "Here's what happened on SynchSphere today:", '']
+        for notification in items:
+            suffix = f" (x{notification.occurrences})" if notification.occurrences > 1 else ''
+            lines.append(f"- {notification.title}{suffix}")
+        if total > len(items):
+            lines.append(f"...and {total - len(items)} more.")
+        return EmailMessage(
+            subject=f"Your SynchSphere digest: {total} new notification(s)",
+            body='\n'.join(lines),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
+        )
+
+    def flush(self, messages, profile_ids, now):
+        """Send one batch over a single connection and stamp the profiles"""
+        sent = 0
+        if messages:
+            with get_connection() as connection:
+                sent = connection.send_messages(messages) or 0
+        if profile_ids:
+            UserProfile.objects.filter(id__in=profile_ids).update(last_digest_at=now)
+        return sent
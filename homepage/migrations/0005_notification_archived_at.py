@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0004_notification_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, help_text="Hidden from the user's lists once set", null=True),
+        ),
+    ]
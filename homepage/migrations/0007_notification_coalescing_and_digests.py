@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0006_notificationarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='occurrences',
+            field=models.PositiveIntegerField(default=1, help_text='How many similar notifications were merged into this one'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='digest_frequency',
+            field=models.CharField(choices=[('immediate', 'As they happen'), ('daily', 'Daily digest')], default='immediate', help_text='Email each notification, or one summary email per day', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='last_digest_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0007_notification_coalescing_and_digests'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['is_sent', 'reminder_time'], name='homepage_re_is_sent_d721e2_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0008_reminder_due_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='offset_minutes',
+            field=models.PositiveIntegerField(blank=True, help_text="Set for reminders generated from the owner's default offsets", null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='reminder_offsets',
+            field=models.CharField(blank=True, default='10,1440', help_text='Comma-separated minutes before each event to send a reminder', max_length=100),
+        ),
+    ]
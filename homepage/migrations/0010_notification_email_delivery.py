@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0009_reminder_offsets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='delivery_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='next_delivery_at',
+            field=models.DateTimeField(blank=True, help_text='Earliest time the email worker may (re)try this notification', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['delivery_status', 'next_delivery_at'], name='homepage_no_deliver_3cd844_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0012_event_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='recurrence_end',
+            field=models.DateTimeField(blank=True, help_text='End of the last occurrence; empty for open-ended series', null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='recurrence_rule',
+            field=models.CharField(blank=True, help_text='RRULE subset, e.g. FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='recurrence_timezone',
+            field=models.CharField(blank=True, help_text='Zone the rule is expanded in, so occurrences keep their local time across DST', max_length=100),
+        ),
+        migrations.CreateModel(
+            name='EventOccurrenceOverride',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_start', models.DateTimeField(help_text='Start the occurrence would have had, in UTC')),
+                ('cancelled', models.BooleanField(default=False)),
+                ('start_time', models.DateTimeField(blank=True, null=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('location', models.CharField(blank=True, max_length=200)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrence_overrides', to='homepage.event')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('event', 'original_start'), name='unique_occurrence_override')],
+            },
+        ),
+    ]
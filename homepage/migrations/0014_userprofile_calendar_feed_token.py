@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0013_event_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='calendar_feed_token',
+            field=models.CharField(blank=True, help_text='Secret for the iCalendar subscription URL', max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_copies(apps, schema_editor):
+    """Keep the oldest row per (user, type, external id) so the constraint can be added"""
+    Event = apps.get_model('homepage', 'Event')
+    duplicates = (
+        Event.objects.filter(external_calendar_id__isnull=False)
+        .values('user_id', 'external_calendar_type', 'external_calendar_id')
+        .annotate(rows=Count('id'), keep=Min('id'))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        Event.objects.filter(
+            user_id=group['user_id'],
+            external_calendar_type=group['external_calendar_type'],
+            external_calendar_id=group['external_calendar_id'],
+        ).exclude(id=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0014_userprofile_calendar_feed_token'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='external_calendar_type',
+            field=models.CharField(blank=True, choices=[('google', 'Google Calendar'), ('outlook', 'Outlook'), ('ical', 'iCal'), ('csv', 'CSV import')], max_length=50),
+        ),
+        migrations.RunPython(drop_duplicate_copies, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(fields=('user', 'external_calendar_type', 'external_calendar_id'), name='unique_external_event'),
+        ),
+    ]
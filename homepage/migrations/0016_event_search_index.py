@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# The index as it stood when this migration was written; homepage.search may
+# change later without changing what this migration does.
+SQLITE_INSTALL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS homepage_event_fts USING fts5(
+        title, description, location, owner, content='', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS homepage_event_fts_ai AFTER INSERT ON homepage_event BEGIN
+        INSERT INTO homepage_event_fts(rowid, title, description, location, owner)
+        VALUES (new.id, new.title, new.description, new.location, 'u' || new.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS homepage_event_fts_ad AFTER DELETE ON homepage_event BEGIN
+        INSERT INTO homepage_event_fts(homepage_event_fts, rowid, title, description, location, owner)
+        VALUES ('delete', old.id, old.title, old.description, old.location, 'u' || old.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS homepage_event_fts_au
+    AFTER UPDATE OF title, description, location, user_id ON homepage_event BEGIN
+        INSERT INTO homepage_event_fts(homepage_event_fts, rowid, title, description, location, owner)
+        VALUES ('delete', old.id, old.title, old.description, old.location, 'u' || old.user_id);
+        INSERT INTO homepage_event_fts(rowid, title, description, location, owner)
+        VALUES (new.id, new.title, new.description, new.location, 'u' || new.user_id);
+    END""",
+]
+SQLITE_BACKFILL = """INSERT INTO homepage_event_fts(rowid, title, description, location, owner)
+    SELECT id, title, description, location, 'u' || user_id FROM homepage_event"""
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS homepage_event_fts_ai',
+    'DROP TRIGGER IF EXISTS homepage_event_fts_ad',
+    'DROP TRIGGER IF EXISTS homepage_event_fts_au',
+    'DROP TABLE IF EXISTS homepage_event_fts',
+]
+POSTGRES_INSTALL = [
+    """CREATE INDEX IF NOT EXISTS homepage_event_search_idx ON homepage_event USING GIN ((
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ))""",
+]
+POSTGRES_UNINSTALL = ['DROP INDEX IF EXISTS homepage_event_search_idx']
+
+
+def install(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'homepage_event_fts'")
+            created = cursor.fetchone() is None
+            for statement in SQLITE_INSTALL:
+                cursor.execute(statement)
+            if created:
+                cursor.execute(SQLITE_BACKFILL)
+        elif connection.vendor == 'postgresql':
+            for statement in POSTGRES_INSTALL:
+                cursor.execute(statement)
+
+
+def uninstall(apps, schema_editor):
+    connection = schema_editor.connection
+    statements = {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    """Full-text index over events: FTS5 + triggers on SQLite, a GIN tsvector index on PostgreSQL"""
+
+    dependencies = [
+        ('homepage', '0015_event_unique_external_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:02
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Term rules as they stood when this migration was written (see
+# homepage.directory.terms_for); later changes there don't alter it.
+_WORD_SPLIT = re.compile(r'[\s._+\-]+')
+
+
+def _normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def terms_for(username, email, first_name, last_name):
+    username, email = _normalize(username), _normalize(email)
+    first_name, last_name = _normalize(first_name), _normalize(last_name)
+    terms = {username, first_name, last_name, _normalize(f'{first_name} {last_name}')}
+    terms.update(_WORD_SPLIT.split(username))
+    if email:
+        local, _, domain = email.partition('@')
+        terms.update([email, local, domain])
+        terms.update(_WORD_SPLIT.split(local))
+    return {term[:254] for term in terms if len(term) >= 2}
+
+
+def index_existing_users(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    UserSearchTerm = apps.get_model('homepage', 'UserSearchTerm')
+    last_id = 0
+    while True:
+        batch = list(
+            User.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'username', 'email', 'first_name', 'last_name')[:2000]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        UserSearchTerm.objects.bulk_create(
+            [UserSearchTerm(user_id=row[0], term=term) for row in batch for term in terms_for(*row[1:])],
+            batch_size=1000,
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0016_event_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=254)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(index_existing_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:09
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def queue_existing_avatars(apps, schema_editor):
+    # Existing uploads get thumbnails the same way new ones do
+    UserProfile = apps.get_model('homepage', 'UserProfile')
+    Job = apps.get_model('homepage', 'Job')
+    now = timezone.now()
+    Job.objects.bulk_create([
+        Job(name='process_avatar', payload={'profile_id': profile_id, 'name': name}, max_attempts=3, run_at=now)
+        for profile_id, name in UserProfile.objects.exclude(avatar='').exclude(avatar=None).values_list('id', 'avatar')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homepage', '0017_usersearchterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Processed thumbnails as {size: {format: file name}}'),
+        ),
+        migrations.RunPython(queue_existing_avatars, migrations.RunPython.noop),
+    ]
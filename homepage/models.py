@@ -39,6 +39,13 @@ class UserProfile(models.Model):
     ])
     email_notifications = models.BooleanField(default=True)
     web_notifications = models.BooleanField(default=True)
+    digest_frequency = models.CharField(max_length=20, default='immediate', choices=[
+        ('immediate', 'As they happen'),
+        ('daily', 'Daily digest'),
+    ], help_text="Email each notification, or one summary email per day")
+    last_digest_at = models.DateTimeField(null=True, blank=True)
+    reminder_offsets = models.CharField(max_length=100, blank=True, default='10,1440',
+                                        help_text="Comma-separated minutes before each event to send a reminder")
     bio = models.TextField(blank=True, max_length=500, help_text="Short biography or description")
     phone = models.CharField(max_length=20, blank=True, help_text="Phone number")
     location = models.CharField(max_length=100, blank=True, help_text="Location/Country", choices=[
@@ -68,17 +75,43 @@ class UserProfile(models.Model):
         ('Other', 'Other'),
     ])
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True, help_text="Profile picture")
+    avatar_variants = models.JSONField(default=dict, blank=True,
+                                       help_text="Processed thumbnails as {size: {format: file name}}")
+    calendar_feed_token = models.CharField(max_length=64, unique=True, null=True, blank=True,
+                                           help_text="Secret for the iCalendar subscription URL")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
+    @property
+    def avatar_url(self):
+        return self.avatar.url if self.avatar else None
+
+    @property
+    def avatar_thumbnails(self):
+        """{size: {format: url}}; empty until the upload has been processed"""
+        if not self.avatar:
+            return {}
+        storage = self.avatar.storage
+        return {
+            int(size): {fmt: storage.url(name) for fmt, name in formats.items()}
+            for size, formats in self.avatar_variants.items()
+        }
+
     class Meta:
         verbose_name = "User Profile"
         verbose_name_plural = "User Profiles"
 
 
+class ActiveEventManager(models.Manager):
+    """Hides events that have been deleted and are waiting to be purged"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Event(models.Model):
     """Calendar events/meetings"""
     title = models.CharField(max_length=200)
@@ -94,19 +127,67 @@ class Event(models.Model):
         ('google', 'Google Calendar'),
         ('outlook', 'Outlook'),
         ('ical', 'iCal'),
+        ('csv', 'CSV import'),
     ])
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, help_text="Set when deleted; the row is purged in the background")
+    recurrence_rule = models.CharField(max_length=255, blank=True, help_text="RRULE subset, e.g. FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10")
+    recurrence_timezone = models.CharField(max_length=100, blank=True, help_text="Zone the rule is expanded in, so occurrences keep their local time across DST")
+    recurrence_end = models.DateTimeField(null=True, blank=True, help_text="End of the last occurrence; empty for open-ended series")
+
+    objects = ActiveEventManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['start_time']
         indexes = [
             models.Index(fields=['user', 'start_time']),
+            # Invitees' copies point back at the original through this column
+            models.Index(fields=['external_calendar_id']),
+        ]
+        constraints = [
+            # Imports upsert on this key, so re-importing a file never duplicates events
+            models.UniqueConstraint(
+                fields=['user', 'external_calendar_type', 'external_calendar_id'],
+                name='unique_external_event',
+            ),
         ]
 
     def __str__(self):
         return f"{self.title} - {self.user.username}"
 
+    @property
+    def is_recurring(self):
+        return bool(self.recurrence_rule)
+
+    def save(self, *args, **kwargs):
+        if self.recurrence_rule:
+            from .recurrence import series_end
+            self.recurrence_end = series_end(self)
+        else:
+            self.recurrence_end = None
+        super().save(*args, **kwargs)
+
+
+class EventOccurrenceOverride(models.Model):
+    """A cancelled or changed occurrence of a recurring event (EXDATE / RECURRENCE-ID)"""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='occurrence_overrides')
+    original_start = models.DateTimeField(help_text="Start the occurrence would have had, in UTC")
+    cancelled = models.BooleanField(default=False)
+    start_time = models.DateTimeField(null=True, blank=True)
+    end_time = models.DateTimeField(null=True, blank=True)
+    title = models.CharField(max_length=200, blank=True)
+    location = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'original_start'], name='unique_occurrence_override'),
+        ]
+
+    def __str__(self):
+        return f"Override of event {self.event_id} at {self.original_start}"
+
 
 class Reminder(models.Model):
     """Reminders linked to events"""
@@ -115,6 +196,7 @@ class Reminder(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     reminder_time = models.DateTimeField(help_text="When to send the reminder (UTC)")
+    offset_minutes = models.PositiveIntegerField(null=True, blank=True, help_text="Set for reminders generated from the owner's default offsets")
     is_sent = models.BooleanField(default=False)
     sent_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -123,6 +205,8 @@ class Reminder(models.Model):
         ordering = ['reminder_time']
         indexes = [
             models.Index(fields=['user', 'reminder_time', 'is_sent']),
+            # Global due scan for the reminder dispatcher
+            models.Index(fields=['is_sent', 'reminder_time']),
         ]
 
     def __str__(self):
@@ -159,13 +243,143 @@ class Notification(models.Model):
     ], null=True, blank=True, help_text="Status for event invitations")
     created_at = models.DateTimeField(auto_now_add=True)
     read_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(null=True, blank=True, help_text="Hidden from the user's lists once set")
+    occurrences = models.PositiveIntegerField(default=1, help_text="How many similar notifications were merged into this one")
+    delivery_attempts = models.PositiveSmallIntegerField(default=0)
+    next_delivery_at = models.DateTimeField(null=True, blank=True, help_text="Earliest time the email worker may (re)try this notification")
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'is_read', 'created_at']),
+            # Keyset pagination over a user's full history (see homepage/pagination.py)
+            models.Index(fields=['user', 'created_at', 'id']),
+            # Pending-email scan for the delivery worker
+            models.Index(fields=['delivery_status', 'next_delivery_at']),
         ]
 
     def __str__(self):
         return f"Notification: {self.title} for {self.user.username}"
 
+
+class NotificationArchive(models.Model):
+    """Compact copy of notifications moved out by the retention job"""
+    original_id = models.BigIntegerField(unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    notification_type = models.CharField(max_length=50)
+    title = models.CharField(max_length=200)
+    invitation_status = models.CharField(max_length=50, null=True, blank=True)
+    event_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    read_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Archived notification {self.original_id} for user {self.user_id}"
+
+
+class NotificationCounter(models.Model):
+    """Denormalized unread notification count per user, maintained on write"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class CalendarVersion(models.Model):
+    """Per-user counter bumped after every write to the user's events.
+
+    Cached free/busy days are keyed by it and the calendar feed's validators
+    come from it, so every process sees a change as soon as it commits.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='calendar_version')
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user_id}: version {self.version}"
+
+
+class Job(models.Model):
+    """Unit of deferred work picked up by the runworker command"""
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=20, choices=[
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    ], default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(help_text="Earliest time a worker may pick this job up")
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Claim scan: highest priority first, then oldest due
+            models.Index(fields=['status', '-priority', 'run_at']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id}: {self.name} ({self.status})"
+
+
+class EventPurge(models.Model):
+    """Progress of the background purge of one deleted event"""
+    event_id = models.BigIntegerField(unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='event_purges')
+    status = models.CharField(max_length=20, choices=[
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+    ], default='pending')
+    copies_deleted = models.PositiveIntegerField(default=0)
+    notifications_deleted = models.PositiveIntegerField(default=0)
+    reminders_deleted = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Purge of event {self.event_id} ({self.status})"
+
+
+class EventImport(models.Model):
+    """An uploaded .ics/.csv file and the progress of its background import"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='event_imports')
+    file = models.FileField(upload_to='imports/', blank=True)
+    file_format = models.CharField(max_length=3, choices=[('ics', 'iCalendar'), ('csv', 'CSV')])
+    timezone = models.CharField(max_length=100, help_text="Zone floating times are read in")
+    status = models.CharField(max_length=20, choices=[
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], default='queued')
+    stats = models.JSONField(default=dict, blank=True, help_text="Running counts, errors and warnings")
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import {self.id} for {self.user_id} ({self.status})"
+
+
+class UserSearchTerm(models.Model):
+    """One normalized, prefix-searchable word for user autocomplete (see homepage/directory.py)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=254, db_index=True)
+
+    def __str__(self):
+        return f"{self.term} -> {self.user_id}"
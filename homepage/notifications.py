@@ -0,0 +1,454 @@
+"""Notification write paths.
+
+Every place that creates, reads or deletes notifications goes through these
+helpers so the denormalized NotificationCounter stays in step with the
+Notification table without re-counting it.
+"""
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from accounts.emails import users_with_emails
+
+from .models import Event, Notification, NotificationArchive, NotificationCounter, UserProfile
+from .utils import invalidate_user_cache
+
+
+def adjust_unread_counters(deltas):
+    """Apply {user_id: delta} to the unread counters with F() updates.
+
+    Users with the same delta share one UPDATE, so a fan-out to many
+    invitees costs one statement. A missing counter row is seeded from a
+    real count, which already includes the change being applied.
+    """
+    by_delta = {}
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(user_id)
+
+    for delta, user_ids in by_delta.items():
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + delta)
+        existing = set(
+            NotificationCounter.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+        )
+        for user_id in set(user_ids) - existing:
+            seed_unread_counter(user_id)
+
+
+def seed_unread_counter(user_id):
+    """Create a user's counter from the Notification table if it is missing"""
+    unread = Notification.objects.filter(user_id=user_id, is_read=False).count()
+    counter, created = NotificationCounter.objects.get_or_create(user_id=user_id, defaults={'unread': unread})
+    return counter.unread
+
+
+def _invalidate_after_commit(user_ids):
+    """Drop cached counts once the surrounding transaction has committed"""
+    def invalidate(ids):
+        for user_id in ids:
+            invalidate_user_cache(user_id)
+    transaction.on_commit(partial(invalidate, set(user_ids)))
+
+
+def coalesce_notifications(notifications, now=None):
+    """Merge new notifications into recent unread ones for the same user and event.
+
+    A match is an unread, unarchived row of the same type (and invitation
+    status) for the same user and event, created inside the configured
+    window. Matches get their occurrence count bumped, take the newest
+    title/message and move to the top of the list. Duplicates within the
+    batch collapse the same way. Returns (to_insert, merged_ids).
+    """
+    options = getattr(settings, 'NOTIFICATION_COALESCE', {})
+    types = set(options.get('TYPES', ()))
+    window = timedelta(minutes=options.get('WINDOW_MINUTES', 0))
+    if not types or not window:
+        return list(notifications), []
+    now = now or timezone.now()
+
+    to_insert = []
+    groups = defaultdict(list)
+    for notification in notifications:
+        if notification.event_id and notification.notification_type in types and not notification.is_read:
+            key = (notification.notification_type, notification.event_id, notification.invitation_status)
+            groups[key].append(notification)
+        else:
+            to_insert.append(notification)
+
+    merged_ids = []
+    for (notification_type, event_id, invitation_status), items in groups.items():
+        # Newest item per user wins; earlier duplicates add to its count.
+        latest, extra = {}, Counter()
+        for item in items:
+            if item.user_id in latest:
+                extra[item.user_id] += 1
+            latest[item.user_id] = item
+
+        existing = {}
+        matches = Notification.objects.filter(
+            user_id__in=latest,
+            notification_type=notification_type,
+            event_id=event_id,
+            invitation_status=invitation_status,
+            is_read=False,
+            archived_at__isnull=True,
+            created_at__gte=now - window,
+        ).order_by('created_at').values_list('user_id', 'id')
+        for user_id, pk in matches:
+            existing[user_id] = pk
+
+        # One UPDATE per distinct (title, message, added count)
+        updates = defaultdict(list)
+        for user_id, item in latest.items():
+            if user_id in existing:
+                updates[(item.title, item.message, 1 + extra[user_id])].append(existing[user_id])
+            else:
+                item.occurrences = 1 + extra[user_id]
+                to_insert.append(item)
+        for (title, message, added), ids in updates.items():
+            Notification.objects.filter(id__in=ids).update(
+                occurrences=F('occurrences') + added, title=title, message=message, created_at=now,
+            )
+            merged_ids.extend(ids)
+    return to_insert, merged_ids
+
+
+def apply_delivery_preferences(notifications):
+    """Set delivery method/status from each recipient's profile (one query).
+
+    Web delivery happens on insert. Notifications that should also go out by
+    email stay 'pending' for the delivery worker. Users on daily digests get
+    their email through send_notification_digests instead.
+    """
+    user_ids = {n.user_id for n in notifications}
+    prefs = {
+        user_id: (email, web, digest)
+        for user_id, email, web, digest in UserProfile.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'email_notifications', 'web_notifications', 'digest_frequency'
+        )
+    }
+    for notification in notifications:
+        email, web, digest = prefs.get(notification.user_id, (True, True, 'immediate'))
+        if email and digest == 'immediate':
+            notification.delivery_method = 'both' if web else 'email'
+            notification.delivery_status = 'pending'
+        else:
+            notification.delivery_method = 'web'
+            notification.delivery_status = 'sent'
+    return notifications
+
+
+def create_notification(**fields):
+    """Create (or coalesce) a single notification and bump the owner's unread counter"""
+    with transaction.atomic():
+        to_insert, merged_ids = coalesce_notifications([Notification(**fields)])
+        if merged_ids:
+            notification = Notification.objects.get(id=merged_ids[0])
+        else:
+            notification = apply_delivery_preferences(to_insert)[0]
+            notification.save()
+            if not notification.is_read:
+                adjust_unread_counters({notification.user_id: 1})
+        _invalidate_after_commit([notification.user_id])
+    return notification
+
+
+def bulk_create_notifications(notifications):
+    """Coalesce, then bulk_create notifications with one grouped counter update"""
+    if not notifications:
+        return []
+    with transaction.atomic():
+        to_insert, merged_ids = coalesce_notifications(notifications)
+        created = Notification.objects.bulk_create(apply_delivery_preferences(to_insert))
+        adjust_unread_counters(Counter(n.user_id for n in created if not n.is_read))
+        _invalidate_after_commit(n.user_id for n in notifications)
+    return created
+
+
+def mark_notifications_read(user, queryset=None, **extra_updates):
+    """Mark a user's unread notifications read in one UPDATE.
+
+    ``queryset`` narrows which notifications are affected (defaults to all
+    of the user's). Only rows that were actually unread at UPDATE time are
+    subtracted from the counter, so concurrent requests can't double count.
+    """
+    if queryset is None:
+        queryset = Notification.objects.all()
+    with transaction.atomic():
+        count = queryset.filter(user=user, is_read=False).update(
+            is_read=True, read_at=timezone.now(), **extra_updates
+        )
+        adjust_unread_counters({user.id: -count})
+        _invalidate_after_commit([user.id])
+    return count
+
+
+def set_invitation_status(notification, status):
+    """Record an invitation response and mark the invitation read"""
+    with transaction.atomic():
+        was_unread = Notification.objects.filter(pk=notification.pk, is_read=False).update(
+            is_read=True, read_at=timezone.now(), invitation_status=status
+        )
+        if not was_unread:
+            Notification.objects.filter(pk=notification.pk).update(invitation_status=status)
+        adjust_unread_counters({notification.user_id: -was_unread})
+        _invalidate_after_commit([notification.user_id])
+    notification.invitation_status = status
+    notification.is_read = True
+
+
+def delete_notifications(queryset):
+    """Delete notifications, decrementing counters for the unread ones; returns how many went"""
+    with transaction.atomic():
+        unread = dict(
+            queryset.filter(is_read=False).order_by().values_list('user_id').annotate(n=Count('id'))
+        )
+        deleted, _ = queryset.delete()
+        adjust_unread_counters({user_id: -n for user_id, n in unread.items()})
+        _invalidate_after_commit(unread)
+    return deleted
+
+
+BULK_ACTIONS = ('mark_read', 'archive', 'accept', 'reject')
+
+
+def bulk_notification_action(user, queryset, action):
+    """Apply ``action`` to a set of the user's notifications in grouped statements.
+
+    mark_read and archive are a single UPDATE each (archiving also marks rows
+    read). accept and reject only touch pending invitations; accepting
+    bulk-creates the calendar copies and confirmations. The counter is
+    adjusted once and the user's cache invalidated once, after commit.
+    Returns {'updated': n, 'events_created': n}.
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f'Unknown action: {action}')
+    queryset = queryset.filter(user=user, archived_at__isnull=True)
+    now = timezone.now()
+    events_created = 0
+
+    with transaction.atomic():
+        if action == 'mark_read':
+            updated = queryset.filter(is_read=False).update(is_read=True, read_at=now)
+            newly_read = updated
+        elif action == 'archive':
+            newly_read = queryset.filter(is_read=False).update(is_read=True, read_at=now, archived_at=now)
+            updated = newly_read + queryset.update(archived_at=now)
+        else:
+            invitations = queryset.filter(notification_type='event_invitation', invitation_status='pending')
+            if action == 'accept':
+                invitations = invitations.filter(event__deleted_at__isnull=True, event__end_time__gte=now)
+                events_created = _accept_invitations(user, list(invitations.select_related('event')))
+            ids = list(invitations.values_list('id', flat=True))
+            status = 'accepted' if action == 'accept' else 'rejected'
+            newly_read = Notification.objects.filter(id__in=ids, is_read=False).update(
+                is_read=True, read_at=now, invitation_status=status
+            )
+            updated = newly_read + Notification.objects.filter(id__in=ids).exclude(
+                invitation_status=status
+            ).update(invitation_status=status)
+
+        adjust_unread_counters({user.id: -newly_read})
+        _invalidate_after_commit([user.id])
+    return {'updated': updated, 'events_created': events_created}
+
+
+def _accept_invitations(user, invitations):
+    """bulk_create calendar copies (and confirmations) for accepted invitations"""
+    source_ids = {str(n.event_id) for n in invitations}
+    already_joined = set(
+        Event.objects.filter(
+            user=user,
+            external_calendar_id__in=source_ids,
+            external_calendar_type__in=['joined', 'invitation'],
+        ).values_list('external_calendar_id', flat=True)
+    )
+    copies = {}
+    for notification in invitations:
+        event = notification.event
+        key = str(event.id)
+        if key in already_joined or key in copies:
+            continue
+        copies[key] = Event(
+            title=event.title,
+            description=event.description,
+            start_time=event.start_time,
+            end_time=event.end_time,
+            location=event.location,
+            recurrence_rule=event.recurrence_rule,
+            recurrence_timezone=event.recurrence_timezone,
+            recurrence_end=event.recurrence_end,
+            user=user,
+            external_calendar_id=key,
+            external_calendar_type='invitation'
+        )
+    # A concurrent accept of the same invitation may insert the copy first;
+    # skip it instead of failing the whole action on the unique constraint.
+    Event.objects.bulk_create(list(copies.values()), ignore_conflicts=True)
+    # ignore_conflicts leaves no primary keys, so read back the rows this
+    # call inserted: the ones carrying the created_at it stamped on them.
+    stamped = {(key, copy.created_at) for key, copy in copies.items()}
+    created = [
+        copy for copy in Event.objects.filter(
+            user=user, external_calendar_type='invitation', external_calendar_id__in=list(copies),
+        )
+        if (copy.external_calendar_id, copy.created_at) in stamped
+    ]
+    from .freebusy import touch_calendars
+    from .reminders import sync_event_reminders
+    sync_event_reminders(created)
+    touch_calendars([user.id])
+    confirmations = [
+        Notification(
+            user=user,
+            title='Invitation Accepted',
+            message=f'You have accepted the invitation for "{copy.title}"',
+            notification_type='event',
+            event=copy
+        )
+        for copy in created
+    ]
+    Notification.objects.bulk_create(apply_delivery_preferences(confirmations))
+    adjust_unread_counters({user.id: len(confirmations)})
+    return len(created)
+
+
+def filter_notifications(queryset, params):
+    """Apply the feed's optional type / invitation status / unread filters"""
+    notification_type = params.get('type')
+    if notification_type:
+        queryset = queryset.filter(notification_type=notification_type)
+    invitation_status = params.get('invitation_status')
+    if invitation_status:
+        queryset = queryset.filter(invitation_status=invitation_status)
+    if params.get('unread') in ('1', 'true'):
+        # Served by the (user, is_read, created_at) index
+        queryset = queryset.filter(is_read=False)
+    return queryset
+
+
+def serialize_notification(notification):
+    event = notification.event
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.notification_type,
+        'is_read': notification.is_read,
+        'invitation_status': notification.invitation_status,
+        'delivery_status': notification.delivery_status,
+        'count': notification.occurrences,
+        'created_at': notification.created_at.isoformat(),
+        'event': {
+            'id': event.id,
+            'title': event.title,
+            'start': event.start_time.isoformat(),
+            'location': event.location or '',
+        } if event else None,
+    }
+
+
+def send_event_invitations(event, inviter, emails, confirmation_message):
+    """Fan an event invitation out to every registered user in ``emails``.
+
+    Invitees are resolved in one query and their notifications inserted with
+    one bulk_create. The inviter gets a confirmation notification if anyone
+    was invited. Returns how many invitations were sent.
+    """
+    emails = [email.strip() for email in emails if email and email.strip()]
+    if not emails:
+        return 0
+    invitees = users_with_emails(emails)
+    when = event.start_time.strftime('%Y-%m-%d %H:%M UTC')
+    notifications = [
+        Notification(
+            user=invitee,
+            title=f"Event Invitation: {event.title}",
+            message=f"{inviter.username} has invited you to '{event.title}' on {when}. Location: {event.location or 'Not specified'}",
+            notification_type='event_invitation',
+            event=event,
+            invitation_status='pending'
+        )
+        for invitee in invitees
+    ]
+    invited_count = len(notifications)
+    if invited_count:
+        notifications.append(Notification(
+            user=inviter,
+            title=f"Invitations Sent for {event.title}",
+            message=confirmation_message.format(count=invited_count, title=event.title),
+            notification_type='event',
+            event=event
+        ))
+        bulk_create_notifications(notifications)
+    return invited_count
+
+
+def expired_notifications(retention_days, now=None):
+    """Queryset of notifications past their per-type retention window.
+
+    Pending invitations for events that haven't ended yet are kept.
+    """
+    now = now or timezone.now()
+    expired = Notification.objects.none()
+    for notification_type, days in retention_days.items():
+        if days is None:
+            continue
+        expired = expired | Notification.objects.filter(
+            notification_type=notification_type,
+            created_at__lt=now - timedelta(days=days),
+        )
+    return expired.exclude(invitation_status='pending', event__end_time__gte=now)
+
+
+def purge_notifications(retention_days, mode='archive', chunk_size=500, sleep=0.1, dry_run=False):
+    """Archive or delete expired notifications in primary-key-ordered chunks.
+
+    Each chunk is its own short transaction, followed by ``sleep`` seconds
+    of idle time, so the job never holds locks for long. Yields the running
+    total after every chunk.
+    """
+    if mode not in ('archive', 'delete'):
+        raise ValueError(f'Unknown retention mode: {mode}')
+    expired = expired_notifications(retention_days)
+    last_id = 0
+    total = 0
+    while True:
+        ids = list(expired.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+        if not dry_run:
+            with transaction.atomic():
+                chunk = Notification.objects.filter(id__in=ids)
+                if mode == 'archive':
+                    NotificationArchive.objects.bulk_create(
+                        [
+                            NotificationArchive(
+                                original_id=row['id'],
+                                user_id=row['user_id'],
+                                notification_type=row['notification_type'],
+                                title=row['title'],
+                                invitation_status=row['invitation_status'],
+                                event_id=row['event_id'],
+                                created_at=row['created_at'],
+                                read_at=row['read_at'],
+                            )
+                            for row in chunk.values(
+                                'id', 'user_id', 'notification_type', 'title',
+                                'invitation_status', 'event_id', 'created_at', 'read_at',
+                            )
+                        ],
+                        ignore_conflicts=True,
+                    )
+                delete_notifications(chunk)
+        total += len(ids)
+        yield total
+        if sleep:
+            time.sleep(sleep)
@@ -0,0 +1,59 @@
+"""Keyset (seek) pagination helpers.
+
+Pages are addressed by an opaque cursor encoding the (timestamp, id) of the
+last row shown, so fetching page N costs the same as page 1 instead of an
+ever-growing OFFSET scan.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (timestamp, pk) for a cursor; raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (TypeError, UnicodeDecodeError, base64.binascii.Error) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def older_than(queryset, cursor, field='created_at'):
+    """Restrict a queryset to rows strictly before ``cursor`` in (field, id) order"""
+    timestamp, pk = decode_cursor(cursor)
+    return queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk}))
+
+
+def keyset_page(queryset, before=None, limit=20, field='created_at'):
+    """Return (rows, next_cursor) for rows older than ``before``, newest first.
+
+    ``next_cursor`` is None on the last page. Ordering is (field DESC, id DESC)
+    so rows sharing a timestamp are neither skipped nor repeated.
+    """
+    if before:
+        queryset = older_than(queryset, before, field)
+    rows = list(queryset.order_by(f'-{field}', '-id')[:limit + 1])
+    return _page(rows, limit, field)
+
+
+async def akeyset_page(queryset, before=None, limit=20, field='created_at'):
+    """Async keyset_page for ASGI views"""
+    if before:
+        queryset = older_than(queryset, before, field)
+    rows = [row async for row in queryset.order_by(f'-{field}', '-id')[:limit + 1]]
+    return _page(rows, limit, field)
+
+
+def _page(rows, limit, field):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, field), last.id)
@@ -0,0 +1,344 @@
+"""Recurring events: a small RFC 5545 RRULE subset, expanded lazily.
+
+A recurring event is stored once, with its first occurrence in
+start_time/end_time and the rule in ``recurrence_rule``. Occurrences are
+generated only for the window a view asks for, in the event's
+``recurrence_timezone`` so a 09:00 meeting stays at 09:00 across DST.
+Cancelled or moved occurrences live in EventOccurrenceOverride, keyed by
+the occurrence's original start.
+
+Supported: FREQ=DAILY|WEEKLY|MONTHLY|YEARLY, INTERVAL, COUNT, UNTIL,
+BYDAY (weekly, plain weekday codes) and BYMONTHDAY (monthly).
+"""
+import calendar
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pytz
+from django.db.models import Q
+
+from .cache import tiered_cache
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+
+# Safety nets for rules that rarely or never match (e.g. FEB 29 every 100 years)
+MAX_PERIODS = 10000
+MAX_OCCURRENCES_PER_WINDOW = 500
+
+EXPANSION_CACHE_TIMEOUT = 300
+
+Rule = namedtuple('Rule', 'freq interval count until byday bymonthday')
+
+Occurrence = namedtuple('Occurrence', 'event start end original_start title description location overridden')
+
+
+def _positive_int(value, name):
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a whole number') from None
+    if number < 1:
+        raise ValueError(f'{name} must be positive')
+    return number
+
+
+def _parse_until(value):
+    """UNTIL as a date, floating local time or UTC (trailing Z)"""
+    try:
+        if len(value) == 8:
+            return datetime.strptime(value, '%Y%m%d').replace(hour=23, minute=59, second=59)
+        if value.endswith('Z'):
+            return pytz.UTC.localize(datetime.strptime(value, '%Y%m%dT%H%M%SZ'))
+        return datetime.strptime(value, '%Y%m%dT%H%M%S')
+    except ValueError:
+        raise ValueError('UNTIL must look like 20250131 or 20250131T090000Z') from None
+
+
+def parse_rrule(text):
+    """Parse an RRULE string into a Rule; raises ValueError for anything unsupported"""
+    parts = {}
+    for part in text.strip().upper().removeprefix('RRULE:').split(';'):
+        if not part:
+            continue
+        key, sep, value = part.partition('=')
+        if not sep or not value:
+            raise ValueError(f'Malformed rule part: {part}')
+        parts[key.strip()] = value.strip()
+
+    freq = parts.pop('FREQ', None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    interval = _positive_int(parts.pop('INTERVAL', '1'), 'INTERVAL')
+    count = parts.pop('COUNT', None)
+    count = _positive_int(count, 'COUNT') if count is not None else None
+    until = parts.pop('UNTIL', None)
+    until = _parse_until(until) if until is not None else None
+    if count and until:
+        raise ValueError('Use either COUNT or UNTIL, not both')
+
+    byday = parts.pop('BYDAY', None)
+    if byday is not None:
+        if freq != 'WEEKLY':
+            raise ValueError('BYDAY is only supported with FREQ=WEEKLY')
+        try:
+            byday = tuple(sorted({WEEKDAYS.index(day.strip()) for day in byday.split(',')}))
+        except ValueError:
+            raise ValueError('BYDAY takes weekday codes like MO,WE,FR') from None
+
+    bymonthday = parts.pop('BYMONTHDAY', None)
+    if bymonthday is not None:
+        if freq != 'MONTHLY':
+            raise ValueError('BYMONTHDAY is only supported with FREQ=MONTHLY')
+        days = {_positive_int(day, 'BYMONTHDAY') for day in bymonthday.split(',')}
+        if max(days) > 31:
+            raise ValueError('BYMONTHDAY must be between 1 and 31')
+        bymonthday = tuple(sorted(days))
+
+    if parts:
+        raise ValueError(f"Unsupported rule parts: {', '.join(sorted(parts))}")
+    return Rule(freq, interval, count, until, byday, bymonthday)
+
+
+def _candidates(rule, dtstart, first_period=0):
+    """Local wall-clock starts matching the rule, ignoring COUNT/UNTIL"""
+    if rule.freq == 'DAILY':
+        for k in range(first_period, first_period + MAX_PERIODS):
+            yield dtstart + timedelta(days=k * rule.interval)
+    elif rule.freq == 'WEEKLY':
+        week = dtstart - timedelta(days=dtstart.weekday())
+        days = rule.byday or (dtstart.weekday(),)
+        for k in range(first_period, first_period + MAX_PERIODS):
+            base = week + timedelta(weeks=k * rule.interval)
+            for day in days:
+                candidate = base + timedelta(days=day)
+                if candidate >= dtstart:
+                    yield candidate
+    elif rule.freq == 'MONTHLY':
+        days = rule.bymonthday or (dtstart.day,)
+        for k in range(first_period, first_period + MAX_PERIODS):
+            year, month = divmod(dtstart.month - 1 + k * rule.interval, 12)
+            year, month = dtstart.year + year, month + 1
+            last_day = calendar.monthrange(year, month)[1]
+            for day in days:
+                # RFC 5545: months without that day are skipped, not clamped
+                if day <= last_day:
+                    candidate = dtstart.replace(year=year, month=month, day=day)
+                    if candidate >= dtstart:
+                        yield candidate
+    else:
+        for k in range(first_period, first_period + MAX_PERIODS):
+            try:
+                yield dtstart.replace(year=dtstart.year + k * rule.interval)
+            except ValueError:
+                continue  # Feb 29 in a non-leap year
+
+
+def _first_period(rule, dtstart, skip_before):
+    """Whole periods that end before ``skip_before`` and can be skipped.
+
+    Only used when there is no COUNT, since counting needs every occurrence.
+    """
+    if skip_before is None or rule.count is not None or skip_before <= dtstart:
+        return 0
+    if rule.freq == 'DAILY':
+        period_days, origin = rule.interval, dtstart
+    elif rule.freq == 'WEEKLY':
+        period_days, origin = 7 * rule.interval, dtstart - timedelta(days=dtstart.weekday())
+    else:
+        return 0
+    return max(0, (skip_before - origin).days // period_days - 1)
+
+
+def _localize(tz, naive):
+    return tz.normalize(tz.localize(naive)).astimezone(pytz.UTC)
+
+
+def _zone(name):
+    try:
+        return pytz.timezone(name or 'UTC')
+    except pytz.UnknownTimeZoneError:
+        return pytz.UTC
+
+
+def iter_occurrence_starts(rule, start_time, tz_name, skip_before=None):
+    """Yield UTC occurrence starts in order, honouring COUNT and UNTIL.
+
+    ``skip_before`` (UTC) lets daily and weekly rules jump straight to the
+    requested window instead of walking every occurrence since the series
+    began.
+    """
+    tz = _zone(tz_name)
+    dtstart = start_time.astimezone(tz).replace(tzinfo=None)
+    local_skip = skip_before.astimezone(tz).replace(tzinfo=None) if skip_before else None
+    first = _first_period(rule, dtstart, local_skip)
+    produced = 0
+    for candidate in _candidates(rule, dtstart, first):
+        if rule.until is not None:
+            limit = candidate if rule.until.tzinfo is None else _localize(tz, candidate)
+            if limit > rule.until:
+                return
+        produced += 1
+        if rule.count is not None and produced > rule.count:
+            return
+        yield _localize(tz, candidate)
+
+
+def until_in_utc(value, tz_name):
+    """An UNTIL value as a UTC datetime, reading date and floating forms in ``tz_name``"""
+    until = _parse_until(value)
+    if until.tzinfo is None:
+        return _localize(_zone(tz_name), until)
+    return until
+
+
+def series_end(event):
+    """End of a recurring event's last occurrence, or None if open-ended"""
+    rule = parse_rrule(event.recurrence_rule)
+    if rule.count is None and rule.until is None:
+        return None
+    last = event.start_time
+    for last in iter_occurrence_starts(rule, event.start_time, event.recurrence_timezone):
+        pass
+    return last + (event.end_time - event.start_time)
+
+
+def is_occurrence(event, start):
+    """Whether ``start`` is one of the event's generated occurrence starts"""
+    rule = parse_rrule(event.recurrence_rule)
+    for candidate in iter_occurrence_starts(rule, event.start_time, event.recurrence_timezone, start):
+        if candidate >= start:
+            return candidate == start
+    return False
+
+
+def next_occurrence_start(event, after, overrides=()):
+    """Start of the event's first occurrence later than ``after``, or None.
+
+    Cancelled occurrences are skipped and moved ones count at their new start.
+    """
+    rule = parse_rrule(event.recurrence_rule)
+    by_original = {override.original_start: override for override in overrides}
+    for start in iter_occurrence_starts(rule, event.start_time, event.recurrence_timezone, after):
+        override = by_original.get(start)
+        if override is not None:
+            if override.cancelled:
+                continue
+            start = override.start_time or start
+        if start > after:
+            return start
+    return None
+
+
+def recurring_in_window(window_start, window_end):
+    """Q for recurring events that may have an occurrence inside the window"""
+    return (
+        ~Q(recurrence_rule='')
+        & Q(start_time__lt=window_end)
+        & (Q(recurrence_end__isnull=True) | Q(recurrence_end__gt=window_start))
+    )
+
+
+def source_event_id(event):
+    """Invitees' copies share the original's overrides"""
+    if event.external_calendar_type in ('joined', 'invitation') and event.external_calendar_id:
+        return int(event.external_calendar_id)
+    return event.id
+
+
+def expand_event(event, window_start, window_end, overrides=()):
+    """Occurrences of ``event`` overlapping [window_start, window_end)"""
+    rule = parse_rrule(event.recurrence_rule)
+    duration = event.end_time - event.start_time
+    by_original = {override.original_start: override for override in overrides}
+    occurrences = []
+
+    def add(original_start, start, end, override=None):
+        if start >= window_end or end <= window_start:
+            return
+        occurrences.append(Occurrence(
+            event, start, end, original_start,
+            (override and override.title) or event.title,
+            event.description,
+            (override and override.location) or event.location,
+            override is not None,
+        ))
+
+    starts = iter_occurrence_starts(rule, event.start_time, event.recurrence_timezone, window_start - duration)
+    for start in starts:
+        if start >= window_end or len(occurrences) >= MAX_OCCURRENCES_PER_WINDOW:
+            break
+        override = by_original.pop(start, None)
+        if override is None:
+            add(start, start, start + duration)
+        elif not override.cancelled:
+            moved_to = override.start_time or start
+            add(start, moved_to, override.end_time or moved_to + duration, override)
+
+    # Occurrences moved into this window from outside it
+    for override in by_original.values():
+        if not override.cancelled and override.start_time and override.start_time < window_end:
+            add(override.original_start, override.start_time, override.end_time or override.start_time + duration, override)
+    return sorted(occurrences, key=lambda occurrence: occurrence.start)
+
+
+def _cache_key(event, window_start, window_end):
+    # updated_at is bumped whenever the rule or an override changes, so stale
+    # expansions simply stop being looked up.
+    return (
+        f'event_occurrences:{event.id}:{event.updated_at.timestamp()}:'
+        f'{window_start.timestamp()}:{window_end.timestamp()}'
+    )
+
+
+def occurrences_between(events, window_start, window_end):
+    """Expand recurring ``events`` inside the window, with one override query.
+
+    Each (event, window) expansion is cached, so paging back and forth over
+    the calendar doesn't regenerate it.
+    """
+    from .models import EventOccurrenceOverride
+
+    occurrences = []
+    missing = []
+    for event in events:
+        cached = tiered_cache.get(_cache_key(event, window_start, window_end))
+        if cached is None:
+            missing.append(event)
+        else:
+            occurrences.extend(Occurrence(event, *row) for row in cached)
+
+    if missing:
+        # Overrides of occurrences that overlap the window, plus ones moved into it
+        longest = max(event.end_time - event.start_time for event in missing)
+        overrides = {}
+        for override in EventOccurrenceOverride.objects.filter(
+            Q(original_start__gt=window_start - longest, original_start__lt=window_end)
+            | Q(start_time__lt=window_end, end_time__gt=window_start)
+            # Moved without an end: it keeps the series' duration
+            | Q(start_time__lt=window_end, start_time__gt=window_start - longest, end_time__isnull=True),
+            event_id__in={source_event_id(event) for event in missing},
+        ):
+            overrides.setdefault(override.event_id, []).append(override)
+        for event in missing:
+            expanded = expand_event(event, window_start, window_end, overrides.get(source_event_id(event), ()))
+            tiered_cache.set(
+                _cache_key(event, window_start, window_end),
+                [tuple(occurrence)[1:] for occurrence in expanded],
+                EXPANSION_CACHE_TIMEOUT,
+            )
+            occurrences.extend(expanded)
+    return sorted(occurrences, key=lambda occurrence: occurrence.start)
+
+
+def serialize_occurrence(occurrence):
+    return {
+        'id': occurrence.event.id,
+        'title': occurrence.title,
+        'start': occurrence.start.astimezone(pytz.UTC).isoformat(),
+        'end': occurrence.end.astimezone(pytz.UTC).isoformat(),
+        'description': occurrence.description,
+        'location': occurrence.location,
+        'recurring': True,
+        'original_start': occurrence.original_start.astimezone(pytz.UTC).isoformat(),
+    }
@@ -0,0 +1,197 @@
+"""Reminder generation and dispatch.
+
+Each event owner's default offsets (``UserProfile.reminder_offsets``) are
+turned into Reminder rows by sync_event_reminders whenever events are
+created, rescheduled, joined or accepted. A recurring event has one
+reminder per offset, for its next upcoming occurrence; it moves on to
+the following occurrence once it has been sent.
+
+Due reminders are claimed in batches with ``SELECT ... FOR UPDATE SKIP
+LOCKED`` so several dispatchers can run side by side without double
+sending. Each batch becomes Notifications and is marked sent in one
+transaction.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EventOccurrenceOverride, Notification, Reminder, UserProfile
+from .notifications import bulk_create_notifications
+from .recurrence import next_occurrence_start, source_event_id
+
+
+def parse_offsets(raw, strict=False):
+    """Parse "10, 1440" into sorted unique positive minute offsets"""
+    offsets = set()
+    for part in (raw or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            value = int(part)
+        except ValueError:
+            if strict:
+                raise
+            continue
+        if value <= 0:
+            if strict:
+                raise ValueError(f'Offset must be positive: {value}')
+            continue
+        offsets.add(value)
+    return sorted(offsets)
+
+
+def _offsets_for_users(user_ids):
+    default = list(getattr(settings, 'DEFAULT_REMINDER_OFFSETS', []))
+    offsets = {user_id: default for user_id in user_ids}
+    for user_id, raw in UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', 'reminder_offsets'):
+        offsets[user_id] = parse_offsets(raw)
+    return offsets
+
+
+def _upcoming_overrides(events, now):
+    """Overrides that can affect the next occurrences of the recurring ``events``"""
+    source_ids = {source_event_id(event) for event in events if event.recurrence_rule}
+    overrides = {}
+    if source_ids:
+        for override in EventOccurrenceOverride.objects.filter(
+            Q(original_start__gt=now) | Q(start_time__gt=now), event_id__in=source_ids,
+        ):
+            overrides.setdefault(override.event_id, []).append(override)
+    return overrides
+
+
+def _due_time(event, offset, now, overrides):
+    """When the reminder ``offset`` minutes ahead of the event is due, or None"""
+    if not event.recurrence_rule:
+        return event.start_time - offset
+    # The first occurrence whose reminder is still ahead
+    start = next_occurrence_start(event, now + offset, overrides.get(source_event_id(event), ()))
+    return start - offset if start else None
+
+
+def sync_event_reminders(events, now=None):
+    """Create, shift or drop the offset-based reminders for ``events``.
+
+    Works on a whole batch with one read, one bulk_create, one bulk_update
+    and one delete, and only touches rows whose due time actually changed.
+    Reminders that would already be due are not created. A sent reminder
+    that moves back into the future is re-armed. Hand-made reminders
+    (offset_minutes is NULL) are left alone.
+    """
+    events = [event for event in events if event.pk]
+    if not events:
+        return
+    now = now or timezone.now()
+    offsets = _offsets_for_users({event.user_id for event in events})
+    overrides = _upcoming_overrides(events, now)
+
+    existing = {}
+    for reminder in Reminder.objects.filter(event__in=events, offset_minutes__isnull=False):
+        existing[(reminder.event_id, reminder.user_id, reminder.offset_minutes)] = reminder
+
+    to_create, to_update, keep = [], [], set()
+    for event in events:
+        for offset in offsets[event.user_id]:
+            due = _due_time(event, timedelta(minutes=offset), now, overrides)
+            key = (event.id, event.user_id, offset)
+            reminder = existing.get(key)
+            if due is None:
+                # A series with no occurrences left
+                continue
+            if reminder is None:
+                if due > now:
+                    to_create.append(Reminder(
+                        event=event,
+                        user_id=event.user_id,
+                        title=event.title,
+                        reminder_time=due,
+                        offset_minutes=offset,
+                    ))
+                continue
+            keep.add(key)
+            if reminder.reminder_time == due and reminder.title == event.title:
+                continue
+            reminder.reminder_time = due
+            reminder.title = event.title
+            if reminder.is_sent and due > now:
+                reminder.is_sent = False
+                reminder.sent_at = None
+            to_update.append(reminder)
+
+    stale = [reminder.id for key, reminder in existing.items() if key not in keep and not reminder.is_sent]
+    with transaction.atomic():
+        if to_create:
+            Reminder.objects.bulk_create(to_create)
+        if to_update:
+            Reminder.objects.bulk_update(to_update, ['reminder_time', 'title', 'is_sent', 'sent_at'])
+        if stale:
+            Reminder.objects.filter(id__in=stale).delete()
+
+
+# Reminders of events waiting to be purged (see homepage/events.py) never fire
+_live_event = Q(event__isnull=True) | Q(event__deleted_at__isnull=True)
+
+
+def dispatch_due_reminders(now=None, batch_size=200):
+    """Claim up to ``batch_size`` due reminders, notify and mark them sent.
+
+    Reminders of recurring events are then re-armed for the next
+    occurrence. Returns how many reminders were dispatched.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = list(
+            Reminder.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('event')
+            .filter(is_sent=False, reminder_time__lte=now)
+            .filter(_live_event)
+            .order_by('reminder_time')[:batch_size]
+        )
+        if not due:
+            return 0
+        bulk_create_notifications([
+            Notification(
+                user_id=reminder.user_id,
+                title=f"Reminder: {reminder.title}",
+                message=reminder.description or _default_message(reminder),
+                notification_type='reminder',
+                event=reminder.event
+            )
+            for reminder in due
+        ])
+        Reminder.objects.filter(id__in=[r.id for r in due]).update(is_sent=True, sent_at=now)
+        recurring = {
+            reminder.event_id: reminder.event for reminder in due
+            if reminder.event and reminder.event.recurrence_rule and reminder.offset_minutes is not None
+        }
+        if recurring:
+            sync_event_reminders(list(recurring.values()), now)
+    return len(due)
+
+
+def _default_message(reminder):
+    if reminder.event:
+        start = reminder.event.start_time
+        if reminder.offset_minutes is not None:
+            # The occurrence this reminder was due for
+            start = reminder.reminder_time + timedelta(minutes=reminder.offset_minutes)
+        when = start.strftime('%Y-%m-%d %H:%M UTC')
+        return f"'{reminder.event.title}' starts at {when}"
+    return reminder.title
+
+
+def next_reminder_time(now):
+    """Due time of the earliest unsent reminder after ``now``, or None"""
+    return (
+        Reminder.objects
+        .filter(is_sent=False, reminder_time__gt=now)
+        .filter(_live_event)
+        .order_by('reminder_time')
+        .values_list('reminder_time', flat=True)
+        .first()
+    )
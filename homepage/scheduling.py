@@ -0,0 +1,112 @@
+"""Meeting slot finder across invitees in different timezones.
+
+Each participant's availability is their working hours (in their own
+profile timezone, weekdays only) minus their busy blocks from
+homepage/freebusy.py. Candidate slots sit on a fixed step, so each free
+interval maps arithmetically onto the range of slots it can hold; the
+work is proportional to the (person, slot) pairs that are actually free
+rather than to a minute-by-minute grid.
+
+Slots are ranked by how many participants can attend, then by how close
+the slot sits to the middle of everyone's working day, then by time.
+"""
+import heapq
+from datetime import datetime, time as dt_time, timedelta
+
+import pytz
+from django.conf import settings
+
+from .freebusy import free_busy
+from .models import UserProfile
+
+
+def _options():
+    options = {'WORK_START_HOUR': 9, 'WORK_END_HOUR': 17, 'STEP_MINUTES': 15, 'MAX_RESULTS': 10}
+    options.update(getattr(settings, 'SLOT_FINDER', {}))
+    return options
+
+
+def working_hours(tz_name, window_start, window_end, start_hour, end_hour):
+    """Weekday working-hour intervals in UTC as (start, end, midpoint)"""
+    try:
+        tz = pytz.timezone(tz_name or 'UTC')
+    except pytz.UnknownTimeZoneError:
+        tz = pytz.UTC
+    day = window_start.astimezone(tz).date() - timedelta(days=1)
+    last = window_end.astimezone(tz).date()
+    intervals = []
+    while day <= last:
+        if day.weekday() < 5:
+            start = tz.localize(datetime.combine(day, dt_time(start_hour))).astimezone(pytz.UTC)
+            end = tz.localize(datetime.combine(day, dt_time(end_hour))).astimezone(pytz.UTC)
+            if end > window_start and start < window_end:
+                intervals.append((start, end, start + (end - start) / 2))
+        day += timedelta(days=1)
+    return intervals
+
+
+def subtract_busy(available, busy):
+    """Remove merged, sorted busy blocks from sorted (start, end, midpoint) intervals"""
+    free = []
+    i = 0
+    for start, end, midpoint in available:
+        while i < len(busy) and busy[i][1] <= start:
+            i += 1
+        cursor = start
+        j = i
+        while j < len(busy) and busy[j][0] < end:
+            if busy[j][0] > cursor:
+                free.append((cursor, busy[j][0], midpoint))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if cursor < end:
+            free.append((cursor, end, midpoint))
+    return free
+
+
+def find_slots(user_ids, duration, window_start, window_end, limit=None):
+    """Rank meeting slots for ``user_ids``; returns dicts with start, end and who can attend"""
+    options = _options()
+    limit = limit or options['MAX_RESULTS']
+    step = options['STEP_MINUTES'] * 60
+    length = int(duration.total_seconds())
+    zones = dict(UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', 'timezone'))
+    busy = free_busy(user_ids, window_start, window_end)['users']
+
+    # Candidate i starts at first + i * step (epoch seconds, aligned to the step)
+    epoch = int(window_start.timestamp())
+    first = epoch + (-epoch % step)
+    slots = max(0, (int(window_end.timestamp()) - length - first) // step + 1)
+    attending = [[] for _ in range(slots)]
+    penalty = [0] * slots
+
+    for user_id in user_ids:
+        hours = working_hours(zones.get(user_id, 'UTC'), window_start, window_end,
+                              options['WORK_START_HOUR'], options['WORK_END_HOUR'])
+        for start, end, midpoint in subtract_busy(hours, busy[user_id]):
+            start, end = int(start.timestamp()), int(end.timestamp())
+            # Twice the offset from mid-day, kept in whole seconds
+            middle = 2 * int(midpoint.timestamp()) - length
+            lo = max(0, -(-(start - first) // step))
+            hi = min(slots - 1, (end - length - first) // step)
+            for i in range(lo, hi + 1):
+                attending[i].append(user_id)
+                penalty[i] += abs(2 * (first + i * step) - middle)
+
+    ranked = heapq.nsmallest(
+        limit,
+        (i for i in range(slots) if attending[i]),
+        key=lambda i: (-len(attending[i]), penalty[i], i),
+    )
+    results = []
+    for i in ranked:
+        start = datetime.fromtimestamp(first + i * step, pytz.UTC)
+        results.append({
+            'start': start,
+            'end': start + duration,
+            'available': attending[i],
+            'unavailable': [user_id for user_id in user_ids if user_id not in attending[i]],
+            # Average distance from the middle of attendees' working days
+            'offset_hours': round(penalty[i] / 7200 / len(attending[i]), 2),
+        })
+    return results
@@ -0,0 +1,185 @@
+"""Full-text search over events' title, description and location.
+
+The index is native to whichever database is active:
+
+* SQLite: a contentless FTS5 table kept in sync by insert/update/delete
+  triggers, ranked with bm25(). The owner is indexed as a token too, so
+  the per-user filter is answered inside the index instead of after a
+  match over everyone's events.
+* PostgreSQL: a GIN expression index over a weighted tsvector, ranked
+  with ts_rank_cd(). The expression is computed by the index itself, so
+  there is nothing to keep in sync.
+
+Any other backend falls back to an ``icontains`` scan. Because the index
+is maintained by the database, bulk_create, .update() and raw SQL writes
+are all covered.
+
+Results are ordered by (score, id), lower score first, and paged with a
+cursor on that pair.
+"""
+import base64
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Event
+
+SQLITE_FTS_TABLE = 'homepage_event_fts'
+
+# Title matches count most, then location, then description; owner is a filter only
+SQLITE_BM25_WEIGHTS = (10.0, 1.0, 3.0, 0.0)
+
+_SQLITE_ROW = "{0}.id, {0}.title, {0}.description, {0}.location, 'u' || {0}.user_id"
+SQLITE_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        title, description, location, owner, content='', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON homepage_event BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, description, location, owner)
+        VALUES ({_SQLITE_ROW.format('new')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON homepage_event BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, description, location, owner)
+        VALUES ('delete', {_SQLITE_ROW.format('old')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au
+    AFTER UPDATE OF title, description, location, user_id ON homepage_event BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, description, location, owner)
+        VALUES ('delete', {_SQLITE_ROW.format('old')});
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, description, location, owner)
+        VALUES ({_SQLITE_ROW.format('new')});
+    END""",
+]
+
+POSTGRES_VECTOR = (
+    "(setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C'))"
+)
+POSTGRES_INDEX = 'homepage_event_search_idx'
+
+MAX_TERMS = 8
+_TERM = re.compile(r'\w+')
+
+
+def install_search_index(connection):
+    """Create the backend's search index if missing; safe to run repeatedly.
+
+    Runs after every migrate as well, because SQLite migrations that rebuild
+    homepage_event drop the table's triggers along with it.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SQLITE_FTS_TABLE],
+            )
+            created = cursor.fetchone() is None
+            for statement in SQLITE_SCHEMA:
+                cursor.execute(statement)
+            if created:
+                cursor.execute(
+                    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, description, location, owner) "
+                    f"SELECT {_SQLITE_ROW.format('homepage_event')} FROM homepage_event"
+                )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} ON homepage_event USING GIN ({POSTGRES_VECTOR})')
+
+
+def drop_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {POSTGRES_INDEX}')
+
+
+def search_terms(query):
+    """Lowercased word tokens; anything else (quotes, operators) is dropped"""
+    return _TERM.findall(query.lower())[:MAX_TERMS]
+
+
+def encode_cursor(score, pk):
+    raw = f'{score!r}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (score, pk) for a cursor; raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return float(score), int(pk)
+    except (TypeError, UnicodeDecodeError, base64.binascii.Error) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def _ranked_ids(user_id, terms, after, limit):
+    """[(id, score)] from the native index, best first"""
+    cursor_sql = ''
+    params = []
+    if connection.vendor == 'sqlite':
+        # Every term must appear; each also matches as a prefix ("meet" finds "meeting")
+        phrases = ' '.join(f'"{term}"*' for term in terms)
+        match = f'owner:u{user_id} AND {{title description location}}:({phrases})'
+        score = f'bm25({SQLITE_FTS_TABLE}, {", ".join(map(str, SQLITE_BM25_WEIGHTS))})'
+        sql = (
+            f'SELECT e.id, {score} AS score FROM {SQLITE_FTS_TABLE} '
+            f'JOIN homepage_event e ON e.id = {SQLITE_FTS_TABLE}.rowid '
+            f'WHERE {SQLITE_FTS_TABLE} MATCH %s AND e.user_id = %s AND e.deleted_at IS NULL'
+        )
+        params = [match, user_id]
+    else:
+        tsquery = "to_tsquery('english', %s)"
+        score = f'(-ts_rank_cd({POSTGRES_VECTOR}, {tsquery}))::float8'
+        sql = (
+            f'SELECT e.id, {score} AS score FROM homepage_event e '
+            f'WHERE {POSTGRES_VECTOR} @@ {tsquery} AND e.user_id = %s AND e.deleted_at IS NULL'
+        )
+        query = ' & '.join(f'{term}:*' for term in terms)
+        params = [query, query, user_id]
+    if after is not None:
+        # Re-evaluating the score expression keeps the comparison exact
+        cursor_sql = f' AND ({score} > %s OR ({score} = %s AND e.id > %s))'
+        extra = [after[0], after[0], after[1]]
+        if connection.vendor == 'postgresql':
+            extra = [params[0], after[0], params[0], after[0], after[1]]
+        params += extra
+    sql += cursor_sql + ' ORDER BY score, e.id LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def naive_search(user, terms):
+    """icontains scan over the same fields; the fallback and benchmark baseline"""
+    events = Event.objects.filter(user=user)
+    for term in terms:
+        events = events.filter(Q(title__icontains=term) | Q(description__icontains=term) | Q(location__icontains=term))
+    return events
+
+
+def search_events(user, query, limit=20, after=None):
+    """Return ([(event, score)], next_cursor) for the user's events matching ``query``"""
+    terms = search_terms(query)
+    if not terms:
+        return [], None
+    position = decode_cursor(after) if after else None
+
+    if connection.vendor in ('sqlite', 'postgresql'):
+        rows = _ranked_ids(user.id, terms, position, limit + 1)
+    else:
+        events = naive_search(user, terms).order_by('id')
+        if position:
+            events = events.filter(id__gt=position[1])
+        rows = [(pk, 0.0) for pk in events.values_list('id', flat=True)[:limit + 1]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    events = Event.objects.in_bulk([pk for pk, _ in rows])
+    return [(events[pk], score) for pk, score in rows if pk in events], next_cursor
@@ -0,0 +1,54 @@
+"""Background job handlers (see homepage/jobs.py).
+
+Handlers take plain JSON payload values and re-read everything they need,
+so a job that outlives its event just finds nothing to do.
+"""
+from django.contrib.auth.models import User
+
+from .avatars import process_avatar
+from .events import COPY_TYPES, purge_event
+from .freebusy import touch_calendars
+from .importer import run_event_import
+from .jobs import task
+from .models import Event
+from .notifications import send_event_invitations
+from .reminders import sync_event_reminders
+
+
+@task('send_event_invitations')
+def send_event_invitations_task(event_id, inviter_id, emails, confirmation_message):
+    event = Event.objects.filter(id=event_id).first()
+    inviter = User.objects.filter(id=inviter_id).first()
+    if event is None or inviter is None:
+        return
+    send_event_invitations(event, inviter, emails, confirmation_message)
+
+
+@task('propagate_event_update')
+def propagate_event_update(event_id):
+    """Copy an owner's edits onto every invitee's copy and shift their reminders"""
+    event = Event.objects.filter(id=event_id).first()
+    if event is None:
+        return
+    copies = list(Event.objects.filter(external_calendar_id=str(event.id), external_calendar_type__in=COPY_TYPES))
+    for copy in copies:
+        copy.title = event.title
+        copy.description = event.description
+        copy.start_time = event.start_time
+        copy.end_time = event.end_time
+        copy.location = event.location
+        copy.recurrence_rule = event.recurrence_rule
+        copy.recurrence_timezone = event.recurrence_timezone
+        copy.recurrence_end = event.recurrence_end
+        copy.updated_at = event.updated_at
+    Event.objects.bulk_update(copies, [
+        'title', 'description', 'start_time', 'end_time', 'location',
+        'recurrence_rule', 'recurrence_timezone', 'recurrence_end', 'updated_at',
+    ])
+    sync_event_reminders(copies)
+    touch_calendars(copy.user_id for copy in copies)
+
+
+task('purge_event')(purge_event)
+task('process_avatar')(process_avatar)
+task('import_events')(run_event_import)
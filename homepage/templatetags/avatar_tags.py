@@ -0,0 +1,32 @@
+"""Template tag for rendering avatars at the size they are shown"""
+from django import template
+from django.utils.html import format_html
+
+from homepage.avatars import thumbnail_for
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar_img(profile, size, alt='', css_class='', img_id=''):
+    """
+    An <img> (in a <picture> with a WebP source once thumbnails exist) for
+    an avatar displayed at ``size`` CSS pixels, with a 2x variant for
+    high-density screens.
+    Usage in template: {% avatar_img profile 40 user.username "w-full h-full" %}
+    """
+    thumbnails = getattr(profile, 'avatar_thumbnails', None)
+    one_x, two_x = thumbnail_for(thumbnails, size), thumbnail_for(thumbnails, size * 2)
+    if not one_x:
+        return format_html(
+            '<img{} src="{}" alt="{}" class="{}" width="{}" height="{}" decoding="async">',
+            format_html(' id="{}"', img_id) if img_id else '', profile.avatar_url, alt, css_class, size, size,
+        )
+    fallback = next(fmt for fmt in one_x if fmt != 'webp')
+    return format_html(
+        '<picture class="contents"><source type="image/webp" srcset="{} 1x, {} 2x">'
+        '<img{} src="{}" srcset="{} 1x, {} 2x" alt="{}" class="{}" width="{}" height="{}" decoding="async"></picture>',
+        one_x['webp'], two_x['webp'],
+        format_html(' id="{}"', img_id) if img_id else '', one_x[fallback], one_x[fallback], two_x[fallback],
+        alt, css_class, size, size,
+    )
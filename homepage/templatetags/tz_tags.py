@@ -1,6 +1,7 @@
 """Template tags and filters for timezone handling"""
 from django import template
 from django.utils import timezone
+from homepage.utils import get_user_profile
 import pytz
 
 register = template.Library()
@@ -16,10 +17,9 @@ def convert_to_user_tz(dt, user):
         return dt
     
     try:
-        # Get user profile to access their timezone
-        profile = user.profile
-        user_tz_name = profile.timezone
-    except:
+        # Cached profile snapshot; avoids a query per filter call
+        user_tz_name = get_user_profile(user).timezone
+    except Exception:
         user_tz_name = 'UTC'
     
     if user_tz_name is None:
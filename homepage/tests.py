@@ -1,5 +1,692 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
 
-# Create your tests here.
+import pytz
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
 
+from .cache import INVALIDATION_SEQ_KEY, TwoTierCache, tiered_cache
+from .checks import check_shared_cache
+from .directory import search_users
+from .forms import UserUpdateForm
+from .freebusy import calendar_versions, free_busy, merge_intervals, touch_calendars
+from .ical import feed_token
+from .importer import import_events
+from .models import Event, EventImport, EventOccurrenceOverride, Notification, Reminder, UserProfile, UserSearchTerm
+from .recurrence import expand_event, occurrences_between
+from .reminders import dispatch_due_reminders, sync_event_reminders
 
+
+def utc(*args):
+    return datetime(*args, tzinfo=pytz.UTC)
+
+
+class TieredCacheBroadcastTests(TestCase):
+    """Two TwoTierCache instances stand in for two processes: each has its
+    own local tier, and they share only the default cache."""
+
+    def setUp(self):
+        self.web = TwoTierCache(local_ttl=60, sync_interval=0)
+        self.worker = TwoTierCache(local_ttl=60, sync_interval=0)
+
+    def test_delete_in_one_process_reaches_the_other(self):
+        self.web.set('profile:1', 'old', 300)
+        self.assertEqual(self.web.get('profile:1'), 'old')
+
+        self.worker.delete('profile:1')
+        self.assertIsNone(self.web.get('profile:1'))
+
+        self.worker.set('profile:1', 'new', 300)
+        self.assertEqual(self.web.get('profile:1'), 'new')
+
+    def test_writers_racing_on_the_counter_keep_both_batches(self):
+        self.web.set('a', 1, 300)
+        self.web.set('b', 2, 300)
+        self.web.get('a')
+        self.web.get('b')
+
+        self.worker.delete('a')
+        # A second writer that read the counter before the first one moved it
+        seq = self.worker.shared.get(INVALIDATION_SEQ_KEY)
+        self.worker.shared.set(INVALIDATION_SEQ_KEY, seq - 1, None)
+        TwoTierCache(sync_interval=0).delete('b')
+
+        self.assertIsNone(self.web.get('a'))
+        self.assertIsNone(self.web.get('b'))
+
+    def test_later_batches_past_the_counter_are_replayed(self):
+        self.web.set('a', 1, 300)
+        self.web.get('a')
+        self.worker.delete('a')
+        # The writer claimed its slot but hasn't moved the counter yet
+        seq = self.worker.shared.get(INVALIDATION_SEQ_KEY)
+        self.worker.shared.set(INVALIDATION_SEQ_KEY, seq - 1, None)
+        self.web.local.set('a', 1)
+
+        self.assertIsNone(self.web.get('a'))
+
+
+class ProfileApiTests(TestCase):
+    def setUp(self):
+        tiered_cache.clear_local()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.url = reverse('homepage:profile_api')
+
+    def test_served_from_the_cached_snapshot(self):
+        self.assertEqual(self.client.get(self.url, secure=True).json()['timezone'], 'UTC')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, secure=True)
+        self.assertFalse([q for q in queries if 'homepage_userprofile' in q['sql']])
+
+    def test_updates_are_visible(self):
+        self.client.get(self.url, secure=True)
+        self.client.put(self.url, {'bio': 'Hello', 'timezone': 'Europe/Paris'},
+                        content_type='application/json', secure=True)
+        data = self.client.get(self.url, secure=True).json()
+        self.assertEqual((data['bio'], data['timezone']), ('Hello', 'Europe/Paris'))
+
+
+class SharedCacheCheckTests(TestCase):
+    def test_database_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_is_an_error(self):
+        errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['homepage.E001'])
+
+
+class RecurrenceTests(TestCase):
+    def setUp(self):
+        tiered_cache.clear_local()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        # Mondays 09:00-10:00 UTC, four times: Jan 6, 13, 20, 27 2025
+        self.event = Event.objects.create(
+            user=self.user, title='Standup', start_time=utc(2025, 1, 6, 9), end_time=utc(2025, 1, 6, 10),
+            recurrence_rule='FREQ=WEEKLY;COUNT=4', recurrence_timezone='UTC',
+        )
+
+    def test_series_end_is_the_last_occurrence(self):
+        self.assertEqual(self.event.recurrence_end, utc(2025, 1, 27, 10))
+
+    def test_cancelled_and_moved_occurrences(self):
+        overrides = [
+            EventOccurrenceOverride(event=self.event, original_start=utc(2025, 1, 13, 9), cancelled=True),
+            # Moved to Wednesday with only a new start: keeps the one-hour duration
+            EventOccurrenceOverride(event=self.event, original_start=utc(2025, 1, 20, 9),
+                                    start_time=utc(2025, 1, 22, 14), title='Moved standup'),
+        ]
+        occurrences = expand_event(self.event, utc(2025, 1, 1), utc(2025, 2, 1), overrides)
+        self.assertEqual(
+            [(o.start, o.end, o.title, o.overridden) for o in occurrences],
+            [
+                (utc(2025, 1, 6, 9), utc(2025, 1, 6, 10), 'Standup', False),
+                (utc(2025, 1, 22, 14), utc(2025, 1, 22, 15), 'Moved standup', True),
+                (utc(2025, 1, 27, 9), utc(2025, 1, 27, 10), 'Standup', False),
+            ],
+        )
+
+    def test_occurrence_moved_into_the_window_without_an_end(self):
+        EventOccurrenceOverride.objects.create(
+            event=self.event, original_start=utc(2025, 1, 6, 9), start_time=utc(2025, 1, 30, 9),
+        )
+        occurrences = occurrences_between([self.event], utc(2025, 1, 30), utc(2025, 1, 31))
+        self.assertEqual([(o.start, o.end, o.original_start) for o in occurrences],
+                         [(utc(2025, 1, 30, 9), utc(2025, 1, 30, 10), utc(2025, 1, 6, 9))])
+
+    def test_local_time_is_kept_across_dst(self):
+        event = Event.objects.create(
+            user=self.user, title='Sync', start_time=utc(2025, 3, 3, 14), end_time=utc(2025, 3, 3, 15),
+            recurrence_rule='FREQ=WEEKLY;COUNT=3', recurrence_timezone='America/New_York',
+        )
+        starts = [o.start for o in expand_event(event, utc(2025, 3, 1), utc(2025, 4, 1))]
+        # 09:00 in New York before and after the switch on March 9
+        self.assertEqual(starts, [utc(2025, 3, 3, 14), utc(2025, 3, 10, 13), utc(2025, 3, 17, 13)])
+
+    def test_occurrence_api_rejects_an_end_before_the_start(self):
+        self.client.force_login(self.user)
+        url = reverse('homepage:event_occurrence_api', args=[self.event.id])
+        response = self.client.post(url, json.dumps({
+            'original_start': '2025-01-13T09:00:00Z', 'start': '2025-01-13T12:00:00Z', 'end': '2025-01-13T12:00:00Z',
+        }), content_type='application/json', secure=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(EventOccurrenceOverride.objects.exists())
+
+        response = self.client.post(url, json.dumps({
+            'original_start': '2025-01-13T09:00:00Z', 'start': '2025-01-13T12:00:00Z',
+        }), content_type='application/json', secure=True)
+        self.assertEqual(response.status_code, 200)
+        occurrences = occurrences_between([Event.objects.get(id=self.event.id)], utc(2025, 1, 13), utc(2025, 1, 14))
+        self.assertEqual([(o.start, o.end) for o in occurrences], [(utc(2025, 1, 13, 12), utc(2025, 1, 13, 13))])
+
+
+@override_settings(DEFAULT_REMINDER_OFFSETS=[10])
+class RecurringReminderTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        # Mondays 09:00-10:00 UTC from Jan 6 2025
+        self.event = Event.objects.create(
+            user=self.user, title='Standup', start_time=utc(2025, 1, 6, 9), end_time=utc(2025, 1, 6, 10),
+            recurrence_rule='FREQ=WEEKLY', recurrence_timezone='UTC',
+        )
+
+    def reminder_times(self):
+        return list(Reminder.objects.filter(event=self.event, is_sent=False).values_list('reminder_time', flat=True))
+
+    def test_reminder_is_for_the_next_occurrence(self):
+        sync_event_reminders([self.event], now=utc(2025, 1, 15))
+        self.assertEqual(self.reminder_times(), [utc(2025, 1, 20, 8, 50)])
+
+    def test_cancelled_occurrence_is_skipped(self):
+        EventOccurrenceOverride.objects.create(event=self.event, original_start=utc(2025, 1, 20, 9), cancelled=True)
+        sync_event_reminders([self.event], now=utc(2025, 1, 15))
+        self.assertEqual(self.reminder_times(), [utc(2025, 1, 27, 8, 50)])
+
+    def test_sent_reminder_moves_to_the_following_occurrence(self):
+        sync_event_reminders([self.event], now=utc(2025, 1, 15))
+        self.assertEqual(dispatch_due_reminders(now=utc(2025, 1, 20, 8, 51)), 1)
+        notification = Notification.objects.get(user=self.user, notification_type='reminder')
+        self.assertIn('2025-01-20 09:00 UTC', notification.message)
+        self.assertEqual(self.reminder_times(), [utc(2025, 1, 27, 8, 50)])
+        self.assertEqual(dispatch_due_reminders(now=utc(2025, 1, 27, 8, 50)), 1)
+        self.assertEqual(self.reminder_times(), [utc(2025, 2, 3, 8, 50)])
+
+
+class BulkNotificationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.guest = User.objects.create_user('bob', 'bob@example.com', 'pw')
+        self.event = Event.objects.create(
+            user=self.owner, title='Review', start_time=utc(2099, 1, 6, 9), end_time=utc(2099, 1, 6, 10),
+        )
+        self.invitation = Notification.objects.create(
+            user=self.guest, title='Invitation', message='Join us', notification_type='event_invitation',
+            event=self.event, invitation_status='pending',
+        )
+        self.client.force_login(self.guest)
+        self.url = reverse('homepage:notifications_bulk_api')
+
+    def post(self, body):
+        return self.client.post(self.url, body, content_type='application/json', secure=True)
+
+    def test_accept_creates_one_copy(self):
+        response = self.post({'action': 'accept', 'ids': [self.invitation.id]})
+        self.assertEqual(response.json()['events_created'], 1)
+        copy = Event.objects.get(user=self.guest, external_calendar_id=str(self.event.id))
+        self.assertTrue(Reminder.objects.filter(event=copy).exists())
+        self.assertTrue(Notification.objects.filter(user=self.guest, event=copy, notification_type='event').exists())
+
+        self.invitation.invitation_status = 'pending'
+        self.invitation.save()
+        self.assertEqual(self.post({'action': 'accept', 'ids': [self.invitation.id]}).json()['events_created'], 0)
+        self.assertEqual(Event.objects.filter(user=self.guest).count(), 1)
+
+    def test_body_must_be_an_object(self):
+        for body in ('[1]', '"accept"', '3', 'not json'):
+            with self.subTest(body):
+                self.assertEqual(self.post(body).status_code, 400)
+
+
+class FreeBusyTests(TestCase):
+    def setUp(self):
+        tiered_cache.clear_local()
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+
+    def add_event(self, user, start, end, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            event = Event.objects.create(user=user, title='Busy', start_time=start, end_time=end, **fields)
+            touch_calendars([user.id])
+        return event
+
+    def test_merge_intervals(self):
+        self.assertEqual(
+            merge_intervals([(5, 6), (1, 3), (2, 4), (4, 4), (8, 9)]),
+            [(1, 4), (5, 6), (8, 9)],
+        )
+
+    def test_blocks_are_merged_per_user_and_across_users(self):
+        self.add_event(self.alice, utc(2025, 5, 5, 9), utc(2025, 5, 5, 10))
+        self.add_event(self.alice, utc(2025, 5, 5, 9, 30), utc(2025, 5, 5, 11))
+        self.add_event(self.bob, utc(2025, 5, 5, 10, 30), utc(2025, 5, 5, 12))
+        # Weekly on Mondays from the week before; one occurrence in the window
+        self.add_event(self.bob, utc(2025, 4, 28, 15), utc(2025, 4, 28, 16), recurrence_rule='FREQ=WEEKLY',
+                       recurrence_timezone='UTC')
+
+        result = free_busy([self.alice.id, self.bob.id], utc(2025, 5, 5), utc(2025, 5, 6))
+        self.assertEqual(result['users'][self.alice.id], [(utc(2025, 5, 5, 9), utc(2025, 5, 5, 11))])
+        self.assertEqual(result['users'][self.bob.id], [
+            (utc(2025, 5, 5, 10, 30), utc(2025, 5, 5, 12)),
+            (utc(2025, 5, 5, 15), utc(2025, 5, 5, 16)),
+        ])
+        both = frozenset({self.alice.id, self.bob.id})
+        self.assertEqual(result['overall'], [
+            (utc(2025, 5, 5, 9), utc(2025, 5, 5, 10, 30), frozenset({self.alice.id})),
+            (utc(2025, 5, 5, 10, 30), utc(2025, 5, 5, 11), both),
+            (utc(2025, 5, 5, 11), utc(2025, 5, 5, 12), frozenset({self.bob.id})),
+            (utc(2025, 5, 5, 15), utc(2025, 5, 5, 16), frozenset({self.bob.id})),
+        ])
+
+    def test_blocks_spanning_midnight_come_back_whole(self):
+        self.add_event(self.alice, utc(2025, 5, 5, 22), utc(2025, 5, 6, 2))
+        result = free_busy([self.alice.id], utc(2025, 5, 5), utc(2025, 5, 7))
+        self.assertEqual(result['users'][self.alice.id], [(utc(2025, 5, 5, 22), utc(2025, 5, 6, 2))])
+
+    def test_cached_days_are_reused_until_the_calendar_changes(self):
+        self.add_event(self.alice, utc(2025, 5, 5, 9), utc(2025, 5, 5, 10))
+        window = (utc(2025, 5, 5), utc(2025, 5, 6))
+        free_busy([self.alice.id], *window)
+        with CaptureQueriesContext(connection) as queries:
+            free_busy([self.alice.id], *window)
+        self.assertFalse([query for query in queries if 'homepage_event' in query['sql']])
+
+        version = calendar_versions([self.alice.id])[self.alice.id]
+        self.add_event(self.alice, utc(2025, 5, 5, 13), utc(2025, 5, 5, 14))
+        self.assertEqual(calendar_versions([self.alice.id])[self.alice.id], version + 1)
+        self.assertEqual(free_busy([self.alice.id], *window)['users'][self.alice.id], [
+            (utc(2025, 5, 5, 9), utc(2025, 5, 5, 10)),
+            (utc(2025, 5, 5, 13), utc(2025, 5, 5, 14)),
+        ])
+
+    def test_version_bump_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            touch_calendars([self.alice.id, self.bob.id])
+            self.assertEqual(calendar_versions([self.alice.id, self.bob.id]), {self.alice.id: 0, self.bob.id: 0})
+        for callback in callbacks:
+            callback()
+        self.assertEqual(calendar_versions([self.alice.id, self.bob.id]), {self.alice.id: 1, self.bob.id: 1})
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.url = reverse('homepage:calendar_feed', args=[feed_token(UserProfile.objects.create(user=self.user))])
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.create(
+                user=self.user, title='Sync', start_time=utc(2025, 3, 3, 14), end_time=utc(2025, 3, 3, 15),
+                recurrence_rule='FREQ=WEEKLY;UNTIL=20250331', recurrence_timezone='America/New_York',
+            )
+            touch_calendars([self.user.id])
+
+    def test_recurring_events_carry_their_zone(self):
+        body = b''.join(self.client.get(self.url, secure=True).streaming_content).decode()
+        self.assertIn('BEGIN:VTIMEZONE\r\nTZID:America/New_York\r\n', body)
+        self.assertIn('TZOFFSETTO:-0400', body)
+        self.assertIn('DTSTART;TZID=America/New_York:20250303T090000', body)
+        # A date-only UNTIL is the end of that day in the series' zone, sent as UTC
+        self.assertIn('RRULE:FREQ=WEEKLY;UNTIL=20250401T035959Z', body)
+
+    def test_not_modified_until_the_calendar_changes(self):
+        etag = self.client.get(self.url, secure=True)['ETag']
+        self.assertEqual(self.client.get(self.url, secure=True, headers={'If-None-Match': etag}).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            touch_calendars([self.user.id])
+        response = self.client.get(self.url, secure=True, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    async def test_streamed_under_asgi(self):
+        response = await self.async_client.get(self.url, secure=True)
+        self.assertTrue(response.is_async)
+        body = b''.join([part async for part in response.streaming_content]).decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR') and body.endswith('END:VCALENDAR\r\n'))
+        self.assertIn('SUMMARY:Sync', body)
+
+    def test_renaming_the_user_changes_the_feed(self):
+        etag = self.client.get(self.url, secure=True)['ETag']
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(reverse('homepage:profile_api'), {'first_name': 'Alice'},
+                            content_type='application/json', secure=True)
+        response = self.client.get(self.url, secure=True, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-WR-CALNAME:Alice', b''.join(response.streaming_content).decode())
+
+
+ICS = """BEGIN:VCALENDAR\r
+VERSION:2.0\r
+BEGIN:VEVENT\r
+UID:standup@example.com\r
+DTSTART;TZID=Europe/Paris:20250106T090000\r
+DTEND;TZID=Europe/Paris:20250106T093000\r
+RRULE:FREQ=WEEKLY;COUNT=4;WKST=SU\r
+EXDATE;TZID=Europe/Paris:20250113T090000\r
+SUMMARY:Standup\r
+BEGIN:VALARM\r
+TRIGGER:-PT10M\r
+END:VALARM\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:standup@example.com\r
+RECURRENCE-ID;TZID=Europe/Paris:20250120T090000\r
+DTSTART;TZID=Europe/Paris:20250121T100000\r
+DTEND;TZID=Europe/Paris:20250121T103000\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:review@example.com\r
+DTSTART:20250107T150000Z\r
+DURATION:PT1H\r
+SUMMARY:Review\\, quarterly\r
+LOCATION:Room 1\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:byhour@example.com\r
+DTSTART:20250131T090000Z\r
+DTEND:20250131T091500Z\r
+RRULE:FREQ=DAILY;BYHOUR=9,17\r
+SUMMARY:Check-in\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:broken@example.com\r
+SUMMARY:No start\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        tiered_cache.clear_local()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+
+    def run_import(self, text, fmt):
+        return import_events(self.user, io.BytesIO(text.encode()), fmt, 'UTC', chunk_size=2)
+
+    def test_ics_import(self):
+        stats = self.run_import(ICS, 'ics')
+        self.assertEqual((stats['processed'], stats['imported'], stats['skipped'], stats['overrides']), (5, 3, 1, 2))
+        self.assertEqual(stats['errors'], [{'record': 5, 'error': 'Missing DTSTART'}])
+
+        standup = Event.objects.get(external_calendar_id='standup@example.com')
+        # WKST is dropped, the rest of the rule kept; times are read in the TZID
+        self.assertEqual(standup.recurrence_rule, 'FREQ=WEEKLY;COUNT=4')
+        self.assertEqual(standup.recurrence_timezone, 'Europe/Paris')
+        self.assertEqual(standup.start_time, utc(2025, 1, 6, 8))
+        occurrences = occurrences_between([standup], utc(2025, 1, 1), utc(2025, 2, 1))
+        self.assertEqual([o.start for o in occurrences], [utc(2025, 1, 6, 8), utc(2025, 1, 21, 9), utc(2025, 1, 27, 8)])
+
+        review = Event.objects.get(external_calendar_id='review@example.com')
+        self.assertEqual((review.title, review.location, review.end_time), ('Review, quarterly', 'Room 1', utc(2025, 1, 7, 16)))
+
+    def test_unsupported_rule_is_reported_not_dropped(self):
+        stats = self.run_import(ICS, 'ics')
+        self.assertEqual(len(stats['warnings']), 1)
+        self.assertEqual(stats['warnings'][0]['record'], 4)
+        self.assertIn('BYHOUR', stats['warnings'][0]['warning'])
+        event = Event.objects.get(external_calendar_id='byhour@example.com')
+        self.assertEqual((event.recurrence_rule, event.start_time), ('', utc(2025, 1, 31, 9)))
+
+    def test_reimport_updates_in_place(self):
+        self.run_import(ICS, 'ics')
+        self.run_import(ICS.replace('SUMMARY:Standup', 'SUMMARY:Daily standup'), 'ics')
+        self.assertEqual(Event.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(EventOccurrenceOverride.objects.count(), 2)
+        self.assertEqual(Event.objects.get(external_calendar_id='standup@example.com').title, 'Daily standup')
+
+    @override_settings(JOB_QUEUE={'EAGER': True})
+    def test_reimport_refreshes_invitee_copies(self):
+        self.run_import(ICS, 'ics')
+        standup = Event.objects.get(external_calendar_id='standup@example.com')
+        guest = User.objects.create_user('bob', 'bob@example.com', 'pw')
+        copy = Event.objects.create(
+            user=guest, title=standup.title, start_time=standup.start_time, end_time=standup.end_time,
+            recurrence_rule=standup.recurrence_rule, recurrence_timezone=standup.recurrence_timezone,
+            external_calendar_id=str(standup.id), external_calendar_type='invitation',
+        )
+        version = calendar_versions([guest.id])[guest.id]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import(ICS.replace('SUMMARY:Standup', 'SUMMARY:Daily standup'), 'ics')
+        refreshed = Event.objects.get(id=copy.id)
+        self.assertEqual(refreshed.title, 'Daily standup')
+        self.assertGreater(refreshed.updated_at, copy.updated_at)
+        self.assertGreater(calendar_versions([guest.id])[guest.id], version)
+
+    def test_csv_import(self):
+        text = (
+            'Subject,Start Date,Start Time,End Date,End Time,Location\n'
+            'Planning,01/08/2025,10:00 AM,01/08/2025,11:30 AM,HQ\n'
+            'Lunch,01/09/2025,12:00 PM,,,\n'
+            'Bad,someday,,,,\n'
+        )
+        stats = self.run_import(text, 'csv')
+        self.assertEqual((stats['imported'], stats['skipped']), (2, 1))
+        events = {event.title: event for event in Event.objects.filter(user=self.user)}
+        self.assertEqual((events['Planning'].start_time, events['Planning'].end_time, events['Planning'].location),
+                         (utc(2025, 1, 8, 10), utc(2025, 1, 8, 11, 30), 'HQ'))
+        # No end: one hour
+        self.assertEqual(events['Lunch'].end_time, utc(2025, 1, 9, 13))
+
+        # Rows without an id column dedupe on their content
+        self.run_import(text, 'csv')
+        self.assertEqual(Event.objects.filter(user=self.user).count(), 2)
+
+
+@override_settings(JOB_QUEUE={'EAGER': True})
+class ImportApiTests(TestCase):
+    def setUp(self):
+        tiered_cache.clear_local()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def test_upload_is_imported_in_the_background(self):
+        with override_settings(MEDIA_ROOT=self.media_root), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('homepage:import_events_api'),
+                {'file': SimpleUploadedFile('calendar.ics', ICS.encode()), 'client_tz': 'UTC'},
+                secure=True,
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['import']['status'], 'queued')
+
+        result = self.client.get(response.json()['status_url'], secure=True).json()['import']
+        self.assertEqual(result['status'], 'done')
+        self.assertEqual((result['imported'], result['skipped'], result['overrides']), (3, 1, 2))
+        self.assertEqual(len(result['warnings']), 1)
+        # The stored upload is removed once imported
+        self.assertEqual(EventImport.objects.get().file.name, '')
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'imports')), [])
+
+    def test_other_users_imports_are_hidden(self):
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+        event_import = EventImport.objects.create(user=bob, file_format='ics', timezone='UTC')
+        response = self.client.get(reverse('homepage:event_import_api', args=[event_import.id]), secure=True)
+        self.assertEqual(response.status_code, 404)
+
+
+class ConflictConfirmationTests(TestCase):
+    def setUp(self):
+        tiered_cache.clear_local()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        UserProfile.objects.create(user=self.user)
+        Event.objects.create(user=self.user, title='Existing', start_time=utc(2031, 1, 6, 9),
+                             end_time=utc(2031, 1, 6, 11))
+        self.client.force_login(self.user)
+
+    def submit(self, start, end, token=''):
+        return self.client.post(reverse('homepage:create_event'), {
+            'title': 'New', 'start_time': start, 'end_time': end, 'client_tz': 'UTC', 'confirm_conflicts': token,
+        }, secure=True)
+
+    def test_confirmation_only_covers_the_slot_it_was_given_for(self):
+        response = self.submit('2031-01-06T09:30', '2031-01-06T10:00')
+        self.assertEqual(response.status_code, 200)
+        token = response.context['conflict_token']
+        self.assertTrue(token)
+        self.assertFalse(Event.objects.filter(title='New').exists())
+
+        # Moved to another conflicting slot: the old confirmation doesn't apply
+        response = self.submit('2031-01-06T10:00', '2031-01-06T10:30', token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.context['conflict_token'], token)
+        self.assertFalse(Event.objects.filter(title='New').exists())
+
+        self.submit('2031-01-06T10:00', '2031-01-06T10:30', response.context['conflict_token'])
+        self.assertEqual(Event.objects.get(title='New').start_time, utc(2031, 1, 6, 10))
+
+
+class EventBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.url = reverse('homepage:events_api')
+
+    def post(self, body):
+        return self.client.post(self.url, body, content_type='application/json', secure=True)
+
+    def test_batch_creates_every_event(self):
+        item = {'title': 'Talk', 'start_time': '2099-01-06T09:00', 'end_time': '2099-01-06T10:00', 'client_tz': 'UTC'}
+        response = self.post([item, dict(item, title='Break')])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['ids']), 2)
+
+    def test_items_must_be_objects(self):
+        response = self.post([1, 'x'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'0', '1'})
+        self.assertEqual(self.post('3').status_code, 400)
+        self.assertEqual(self.post('{not json').status_code, 400)
+        self.assertFalse(Event.objects.exists())
+
+
+class UserUpdateFormTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        User.objects.create_user('bob', 'Bob@Example.com', 'pw')
+
+    def form(self, email):
+        return UserUpdateForm({'username': 'alice', 'email': email}, instance=self.alice)
+
+    def test_email_taken_by_another_account(self):
+        self.assertIn('email', self.form('bob@example.com').errors)
+
+    def test_keeping_own_email(self):
+        self.assertTrue(self.form('ALICE@example.com').is_valid())
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice.smith', 'alice@example.com', 'pw', first_name='Alice')
+
+    def test_prefix_search(self):
+        self.assertEqual([match['id'] for match in search_users('smi')], [self.alice.id])
+        self.assertEqual(search_users('smi', exclude_id=self.alice.id), [])
+
+    @override_settings(USER_SEARCH={'LOCAL_INDEX_MAX_USERS': 100, 'LOCAL_INDEX_TTL': 0})
+    def test_local_index_is_rebuilt_after_its_ttl(self):
+        self.assertEqual([match['id'] for match in search_users('ali')], [self.alice.id])
+        # A change that doesn't bump the directory version
+        UserSearchTerm.objects.filter(user=self.alice).update(term='zz')
+        self.assertEqual(search_users('ali'), [])
+
+
+class MediaServingTests(TestCase):
+    """SynchSphere/media.py, which serves the avatars under /media/"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SERVING={})
+        override.enable()
+        self.addCleanup(override.disable)
+        self.content = bytes(range(256)) * 4  # 1024 bytes
+        self.write('docs/report.bin', self.content)
+        self.url = reverse('media', args=['docs/report.bin'])
+
+    def write(self, name, content):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.write(content)
+
+    def get(self, url=None, **headers):
+        return self.client.get(url or self.url, secure=True, headers=headers)
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+    def test_single_ranges(self):
+        for header, start, end in [('bytes=0-99', 0, 99), ('bytes=1000-', 1000, 1023),
+                                   ('bytes=-24', 1000, 1023), ('bytes=1020-5000', 1020, 1023)]:
+            with self.subTest(header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/1024')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+                self.assertEqual(self.body(response), self.content[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=1024-', 'bytes=-0', 'bytes=50-10'):
+            with self.subTest(header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_multiple_ranges_get_the_whole_file(self):
+        response = self.get(Range='bytes=0-9,20-29')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+
+    def test_if_range(self):
+        first = self.get()
+        etag, last_modified = first['ETag'], first['Last-Modified']
+        self.assertEqual(self.get(Range='bytes=0-9', **{'If-Range': etag}).status_code, 206)
+        self.assertEqual(self.get(Range='bytes=0-9', **{'If-Range': last_modified}).status_code, 206)
+        # The file changed since the client's copy: send all of it
+        self.assertEqual(self.get(Range='bytes=0-9', **{'If-Range': '"stale"'}).status_code, 200)
+        self.assertEqual(self.get(Range='bytes=0-9', **{'If-Range': http_date(0)}).status_code, 200)
+
+    def test_conditional_get(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(**{'If-None-Match': etag}).status_code, 304)
+
+    def test_hashed_names_are_immutable(self):
+        self.write('avatars/0123456789abcdef01234567-96.webp', b'webp')
+        response = self.get(reverse('media', args=['avatars/0123456789abcdef01234567-96.webp']))
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_other_hex_names_are_not_immutable(self):
+        for name in ('docs/0123456789abcdef01234567.png', 'avatars/0123456789abcdef0123456789.png'):
+            with self.subTest(name):
+                self.write(name, b'png')
+                response = self.get(reverse('media', args=[name]))
+                self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+    def test_private_and_missing_files(self):
+        self.write('imports/upload.ics', b'BEGIN:VCALENDAR')
+        for path in ('imports/upload.ics', 'docs/../imports/upload.ics', 'docs/missing.bin', 'docs', '../etc/passwd'):
+            with self.subTest(path):
+                self.assertEqual(self.get(f'/media/{path}').status_code, 404)
+
+    async def test_streamed_under_asgi(self):
+        # Without an async iterator Django would buffer the whole file first
+        response = await self.async_client.get(self.url, secure=True, headers={'Range': 'bytes=0-99'})
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([part async for part in response.streaming_content]), self.content[:100])
+
+    def test_offload(self):
+        with override_settings(MEDIA_SERVING={'OFFLOAD': 'x-accel-redirect'}):
+            response = self.get(Range='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/docs/report.bin')
+        self.assertEqual(response.content, b'')
@@ -23,9 +23,20 @@ urlpatterns = [
     
     # API endpoints
     path("api/events/", views.events_api, name="events_api"),
+    path("api/events/import/", views.import_events_api, name="import_events_api"),
+    path("api/events/import/<int:import_id>/", views.event_import_api, name="event_import_api"),
+    path("api/events/search/", views.search_events_api, name="search_events_api"),
     path("api/events/<int:event_id>/", views.event_detail_api, name="event_detail_api"),
+    path("api/events/<int:event_id>/occurrences/", views.event_occurrence_api, name="event_occurrence_api"),
     path("api/profile/", views.profile_api, name="profile_api"),
     path("api/search-users/", views.search_users_api, name="search_users_api"),
+    path("api/freebusy/", views.freebusy_api, name="freebusy_api"),
+    path("api/meeting-slots/", views.meeting_slots_api, name="meeting_slots_api"),
+    path("api/notifications/", views.notifications_feed_api, name="notifications_feed_api"),
+    path("api/notifications/bulk/", views.notifications_bulk_api, name="notifications_bulk_api"),
+    
+    # iCalendar subscription feed
+    path("feed/<str:token>.ics", views.calendar_feed_view, name="calendar_feed"),
     
     # Join event
     path("join-event/", views.join_event_view, name="join_event"),
@@ -1,12 +1,70 @@
 """Utility functions for dashboard app - optimized for performance"""
-from django.core.cache import cache
+from asgiref.sync import sync_to_async
 from django.utils import timezone
-from .models import UserProfile, Notification
+from .cache import tiered_cache, cached_lookup
+from .models import UserProfile, Notification, NotificationCounter
 import pytz
 
 # Cache timezone objects to avoid repeated lookups
 _timezone_cache = {}
 
+# Cached ProfileSnapshots pickle positionally: bump the version whenever
+# its fields change so old entries are never unpickled
+PROFILE_KEY = 'user_profile:2:{}'
+
+
+class ProfileSnapshot:
+    """Immutable, read-only view of the profile fields pages actually use.
+
+    This is what get_user_profile caches instead of the UserProfile model
+    instance. It pickles as a flat tuple, and it never lazily loads
+    ``profile.user``. Code that changes a profile must load the model with
+    load_user_profile().
+    """
+    __slots__ = (
+        'user_id', 'timezone', 'email_notifications', 'web_notifications',
+        'avatar_url', 'avatar_thumbnails', 'display_name', 'location',
+        'bio', 'phone', 'created_at', 'updated_at',
+    )
+
+    def __init__(self, user_id, timezone, email_notifications, web_notifications,
+                 avatar_url, avatar_thumbnails, display_name, location,
+                 bio, phone, created_at, updated_at):
+        values = (user_id, timezone, email_notifications, web_notifications,
+                  avatar_url, avatar_thumbnails, display_name, location,
+                  bio, phone, created_at, updated_at)
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_profile(cls, profile, user):
+        return cls(
+            user.id,
+            profile.timezone,
+            profile.email_notifications,
+            profile.web_notifications,
+            profile.avatar_url,
+            profile.avatar_thumbnails,
+            user.get_full_name() or user.username,
+            profile.location,
+            profile.bio,
+            profile.phone,
+            profile.created_at,
+            profile.updated_at,
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ProfileSnapshot is read-only; use load_user_profile() to edit')
+
+    def __delattr__(self, name):
+        raise AttributeError('ProfileSnapshot is read-only; use load_user_profile() to edit')
+
+    def __reduce__(self):
+        return (ProfileSnapshot, tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return f'<ProfileSnapshot user_id={self.user_id} timezone={self.timezone}>'
+
 
 def get_timezone(tz_string):
     """Get timezone object with caching"""
@@ -15,30 +73,40 @@ def get_timezone(tz_string):
     return _timezone_cache[tz_string]
 
 
+@cached_lookup(lambda user: PROFILE_KEY.format(user.id), timeout=300)  # ~5 minutes
 def get_user_profile(user):
-    """Get or create user profile with caching"""
-    cache_key = f'user_profile_{user.id}'
-    profile = cache.get(cache_key)
-    if profile is None:
-        profile, created = UserProfile.objects.get_or_create(user=user)
-        cache.set(cache_key, profile, 300)  # Cache for 5 minutes
+    """Get a cached, read-only ProfileSnapshot for the user"""
+    return ProfileSnapshot.from_profile(load_user_profile(user), user)
+
+
+async def aget_user_profile(user):
+    """get_user_profile for async views; only a cache miss leaves the event loop"""
+    return await get_user_profile.acall(user)
+
+
+def load_user_profile(user):
+    """Load (or create) the UserProfile model instance, bypassing the cache.
+
+    Use this on write paths; callers must invalidate_user_cache() after saving.
+    """
+    profile, created = UserProfile.objects.get_or_create(user=user)
     return profile
 
 
+@cached_lookup(lambda user: f'unread_count_{user.id}', timeout=60)  # ~1 minute
 def get_unread_count(user):
-    """Get unread notification count with caching"""
-    cache_key = f'unread_count_{user.id}'
-    count = cache.get(cache_key)
-    if count is None:
-        count = Notification.objects.filter(user=user, is_read=False).count()
-        cache.set(cache_key, count, 60)  # Cache for 1 minute
-    return count
+    """Get unread notification count from the denormalized counter, with caching"""
+    unread = NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first()
+    if unread is None:
+        # No counter yet: seed it from the table once.
+        unread = Notification.objects.filter(user=user, is_read=False).count()
+        NotificationCounter.objects.get_or_create(user=user, defaults={'unread': unread})
+    return max(unread, 0)
 
 
 def invalidate_user_cache(user_id):
-    """Invalidate user-related cache"""
-    cache.delete(f'user_profile_{user_id}')
-    cache.delete(f'unread_count_{user_id}')
+    """Invalidate user-related cache in every worker"""
+    tiered_cache.delete_many([PROFILE_KEY.format(user_id), f'unread_count_{user_id}'])
 
 
 def convert_to_utc(dt, tz_name, treat_input_as_local=False):
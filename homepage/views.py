@@ -1,18 +1,48 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import JsonResponse
+from django.urls import reverse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import http_date
+from django.db import transaction
 from django.db.models import Q
-from .models import Event, Reminder, Notification, UserProfile
+from .models import Event, EventImport, EventOccurrenceOverride, Reminder, Notification
 from .forms import EventForm, ReminderForm, UserProfileForm, UserUpdateForm, CustomPasswordChangeForm
 from accounts.forms import SetSecurityQuestionsForm
+from accounts.emails import normalize_email, users_with_emails
 from accounts.models import UserSecurityAnswer
+from .notifications import (
+    BULK_ACTIONS,
+    bulk_notification_action,
+    create_notification,
+    filter_notifications,
+    mark_notifications_read,
+    serialize_notification,
+    set_invitation_status,
+)
+from .conflicts import describe_conflict, find_conflicts
+from .directory import asearch_users
+from .events import soft_delete_event
+from .freebusy import free_busy, touch_calendars
+from .ical import CALENDAR_NAME_FIELDS, feed_token, feed_validators, profile_for_token, stream_calendar
+from .importer import detect_format
+from .jobs import enqueue_on_commit
+from .pagination import akeyset_page, keyset_page, older_than
+from .recurrence import is_occurrence, occurrences_between, recurring_in_window, serialize_occurrence
+from .reminders import sync_event_reminders
+from .scheduling import find_slots
+from .search import search_events
 from .utils import (
+    aget_user_profile,
     get_user_profile,
+    load_user_profile,
     get_unread_count,
     invalidate_user_cache,
     get_timezone,
@@ -24,6 +54,28 @@ import json
 import pytz  # Still needed for UTC
 import uuid
 
+NOTIFICATIONS_PAGE_SIZE = 25
+BULK_MAX_IDS = 500
+EVENTS_BATCH_MAX = 200
+EVENT_SEARCH_PAGE_SIZE = 20
+FREEBUSY_MAX_WINDOW = timedelta(days=31)
+FREEBUSY_MAX_USERS = 50
+# Default span of recurring-event occurrences embedded in the calendar page
+CALENDAR_WINDOW_BEFORE = timedelta(days=31)
+CALENDAR_WINDOW_AFTER = timedelta(days=183)
+
+
+def _parse_iso(value):
+    """Parse an ISO timestamp (naive means UTC); raises ValueError"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, pytz.UTC)
+    return parsed
+
+
+def _parse_window(start, end):
+    return _parse_iso(start), _parse_iso(end)
+
 
 @login_required
 def dashboard_view(request):
@@ -55,7 +107,7 @@ def dashboard_view(request):
     ]
     
     # Get ALL notifications (unread first)
-    notifications = Notification.objects.filter(user=user).select_related('event').order_by('-is_read', '-created_at')[:10]
+    notifications = Notification.objects.filter(user=user, archived_at__isnull=True).select_related('event').order_by('-is_read', '-created_at')[:10]
     
     # Get ALL upcoming events (from now onwards) to show as event notifications
     all_upcoming_events = Event.objects.filter(
@@ -118,8 +170,8 @@ def calendar_view(request):
     user = request.user
     profile = get_user_profile(user)
     
-    # Get all events for the user - optimized query with limit for initial load
-    events = Event.objects.filter(user=user).order_by('start_time').only(
+    # Get all one-off events for the user - optimized query with limit for initial load
+    events = Event.objects.filter(user=user, recurrence_rule='').order_by('start_time').only(
         'id', 'title', 'start_time', 'end_time', 'description', 'location'
     )[:100]  # Limit to 100 events for initial load
     
@@ -139,6 +191,18 @@ def calendar_view(request):
             'location': event.location or '',
         }
         events_data.append(event_data)
+
+    # Recurring events are expanded only inside the visible window
+    try:
+        window_start, window_end = _parse_window(request.GET['start'], request.GET['end'])
+    except (KeyError, ValueError):
+        now = timezone.now()
+        window_start, window_end = now - CALENDAR_WINDOW_BEFORE, now + CALENDAR_WINDOW_AFTER
+    recurring = Event.objects.filter(recurring_in_window(window_start, window_end), user=user)
+    events_data.extend(
+        serialize_occurrence(occurrence)
+        for occurrence in occurrences_between(recurring, window_start, window_end)
+    )
     
     unread_count = get_unread_count(user)
     
@@ -221,42 +285,47 @@ def notifications_view(request):
     user = request.user
     profile = get_user_profile(user)
     
-    # Get all notifications - optimized query
-    notifications = Notification.objects.filter(user=user).select_related('event').order_by('-created_at')
-    
     # Mark as read if requested
     if request.method == 'POST' and 'mark_read' in request.POST:
         notification_id = request.POST.get('notification_id')
         if notification_id:
             notification = get_object_or_404(Notification, id=notification_id, user=user)
-            notification.is_read = True
-            notification.read_at = timezone.now()
-            notification.save()
-            invalidate_user_cache(user.id)  # Clear cache
+            mark_notifications_read(user, Notification.objects.filter(id=notification.id))
             messages.success(request, 'Notification marked as read.')
             return redirect('homepage:notifications')
     
     # Mark all as read if requested
     if request.method == 'POST' and 'mark_all_read' in request.POST:
-        now = timezone.now()
-        unread_notifications = Notification.objects.filter(user=user, is_read=False)
-        count = unread_notifications.update(is_read=True, read_at=now)
-        invalidate_user_cache(user.id)  # Clear cache
+        count = mark_notifications_read(user)
         messages.success(request, f'Marked {count} notification(s) as read.')
         return redirect('homepage:notifications')
     
     # Toggle notification preferences
     if request.method == 'POST' and 'toggle_notifications' in request.POST:
-        profile.email_notifications = not profile.email_notifications
-        profile.save()
+        profile_obj = load_user_profile(user)
+        profile_obj.email_notifications = not profile_obj.email_notifications
+        profile_obj.save(update_fields=['email_notifications', 'updated_at'])
         invalidate_user_cache(user.id)  # Clear cache
-        messages.success(request, f'Email notifications {"enabled" if profile.email_notifications else "disabled"}.')
+        messages.success(request, f'Email notifications {"enabled" if profile_obj.email_notifications else "disabled"}.')
+        return redirect('homepage:notifications')
+    
+    # One keyset page of notifications instead of the whole history
+    before = request.GET.get('before')
+    try:
+        notifications, next_cursor = keyset_page(
+            Notification.objects.filter(user=user, archived_at__isnull=True).select_related('event'),
+            before=before,
+            limit=NOTIFICATIONS_PAGE_SIZE,
+        )
+    except ValueError:
         return redirect('homepage:notifications')
     
     unread_count = get_unread_count(user)
     
     context = {
         'notifications': notifications,
+        'next_cursor': next_cursor,
+        'is_first_page': not before,
         'unread_count': unread_count,
         'profile': profile,
     }
@@ -264,11 +333,72 @@ def notifications_view(request):
     return render(request, 'homepage/notifications.html', context)
 
 
+@login_required
+@require_http_methods(["GET"])
+async def notifications_feed_api(request):
+    """JSON feed of notifications for infinite scroll, paged with a `before` cursor"""
+    user = await request.auser()
+    try:
+        limit = min(max(int(request.GET.get('limit', NOTIFICATIONS_PAGE_SIZE)), 1), 100)
+    except ValueError:
+        limit = NOTIFICATIONS_PAGE_SIZE
+    queryset = filter_notifications(
+        Notification.objects.filter(user=user, archived_at__isnull=True).select_related('event'),
+        request.GET,
+    )
+    try:
+        notifications, next_cursor = await akeyset_page(queryset, before=request.GET.get('before'), limit=limit)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    return JsonResponse({
+        'notifications': [serialize_notification(n) for n in notifications],
+        'next_cursor': next_cursor,
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+def notifications_bulk_api(request):
+    """Apply one action to many notifications, selected by id list or a `before` cursor range"""
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid request data'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'success': False, 'error': 'Invalid request data'}, status=400)
+    
+    action = data.get('action')
+    if action not in BULK_ACTIONS:
+        return JsonResponse({'success': False, 'error': f'Action must be one of: {", ".join(BULK_ACTIONS)}'}, status=400)
+    
+    queryset = Notification.objects.filter(user=request.user)
+    ids = data.get('ids')
+    before = data.get('before')
+    if ids is not None:
+        if not isinstance(ids, list) or len(ids) > BULK_MAX_IDS:
+            return JsonResponse({'success': False, 'error': f'ids must be a list of at most {BULK_MAX_IDS} ids'}, status=400)
+        try:
+            queryset = queryset.filter(id__in=[int(i) for i in ids])
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'error': 'ids must be integers'}, status=400)
+    elif before:
+        try:
+            queryset = older_than(queryset, before)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+        queryset = filter_notifications(queryset, data)
+    else:
+        return JsonResponse({'success': False, 'error': 'Provide either ids or a before cursor'}, status=400)
+    
+    result = bulk_notification_action(request.user, queryset, action)
+    return JsonResponse({'success': True, 'action': action, **result})
+
+
 @login_required
 def settings_view(request):
     """Settings page for account management"""
     user = request.user
-    profile = get_user_profile(user)
+    profile = load_user_profile(user)
     
     # Initialize forms (will be overridden if POST)
     profile_form = UserProfileForm(instance=profile)
@@ -283,6 +413,8 @@ def settings_view(request):
             if profile_form.is_valid() and user_form.is_valid():
                 profile_form.save()
                 user_form.save()
+                if CALENDAR_NAME_FIELDS & set(user_form.changed_data):
+                    touch_calendars([user.id])  # The feed's calendar name changed
                 invalidate_user_cache(user.id)  # Clear cache
                 messages.success(request, 'Profile updated successfully.')
                 return redirect('homepage:settings')
@@ -296,6 +428,10 @@ def settings_view(request):
             else:
                 # Form is invalid, show errors - other forms stay initialized
                 messages.error(request, 'Please correct the errors below.')
+        elif 'reset_calendar_feed' in request.POST:
+            feed_token(profile, reset=True)
+            messages.success(request, 'Calendar feed link reset. Update any subscriptions with the new link.')
+            return redirect('homepage:settings')
         elif 'logout' in request.POST:
             from django.contrib.auth import logout
             logout(request)
@@ -310,11 +446,37 @@ def settings_view(request):
         'password_form': password_form,
         'profile': profile,
         'unread_count': unread_count,
+        'calendar_feed_url': request.build_absolute_uri(
+            reverse('homepage:calendar_feed', args=[feed_token(profile)])
+        ),
     }
     
     return render(request, 'homepage/settings.html', context)
 
 
+@require_http_methods(["GET", "HEAD"])
+def calendar_feed_view(request, token):
+    """iCalendar subscription feed, authenticated by the secret in the URL"""
+    profile = profile_for_token(token)
+    if profile is None:
+        raise Http404
+    # The calendar version changes on every write to the user's events, so
+    # polling clients get a 304 until something actually changed.
+    etag, last_modified = feed_validators(profile.user_id)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        host = request.get_host().split(':')[0]
+        response = StreamingHttpResponse(
+            stream_calendar(profile.user, host), content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'inline; filename="synchsphere.ics"'
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @login_required
 def set_security_questions_view(request):
     user = request.user
@@ -349,14 +511,18 @@ def set_security_questions_view(request):
     else:
         form = SetSecurityQuestionsForm()
         
-    return render(request, 'homepage/set_security_questions.html', {'form': form})
+    return render(request, 'homepage/set_security_questions.html', {
+        'form': form,
+        'profile': get_user_profile(user),
+    })
 
 
 @login_required
 def profile_view(request):
     """Mobile-inspired profile dashboard with live stats and avatar editing."""
     user = request.user
-    profile = get_user_profile(user)
+    profile = load_user_profile(user)
+    previous_avatar = profile.avatar.name, profile.avatar_variants
 
     from .forms import UserProfileForm, UserUpdateForm
 
@@ -377,8 +543,20 @@ def profile_view(request):
         user_form = UserUpdateForm(request.POST, instance=user)
 
         if profile_form.is_valid() and user_form.is_valid():
+            new_avatar = 'avatar' in profile_form.changed_data
+            if new_avatar:
+                profile.avatar_variants = {}  # Shows the original until thumbnails are ready
             profile_form.save()
             user_form.save()
+            if CALENDAR_NAME_FIELDS & set(user_form.changed_data):
+                touch_calendars([user.id])  # The feed's calendar name changed
+            if new_avatar:
+                enqueue_on_commit('process_avatar', {
+                    'profile_id': profile.id,
+                    'name': profile.avatar.name,
+                    'previous': previous_avatar[0],
+                    'previous_variants': previous_avatar[1],
+                }, priority=5)
             invalidate_user_cache(user.id)
             messages.success(request, 'Profile updated successfully.')
             save_success = True
@@ -408,76 +586,110 @@ def profile_view(request):
 # API Views for Event Management
 @login_required
 @require_http_methods(["GET", "POST"])
-def events_api(request):
+async def events_api(request):
     """API endpoint for getting and creating events"""
     if request.method == 'GET':
-        # Get events for calendar
-        start = request.GET.get('start')
-        end = request.GET.get('end')
+        return await _list_events(request)
+    return await sync_to_async(_create_events)(request)
 
-        events = Event.objects.filter(user=request.user)
 
-        if start and end:
-            try:
-                start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-                end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
-                if timezone.is_naive(start_dt):
-                    start_dt = timezone.make_aware(start_dt, pytz.UTC)
-                if timezone.is_naive(end_dt):
-                    end_dt = timezone.make_aware(end_dt, pytz.UTC)
-                events = events.filter(start_time__lte=end_dt, end_time__gte=start_dt)
-            except Exception:
-                pass
-        
-        events_data = []
-        profile = get_user_profile(request.user)
-        user_tz = get_timezone(profile.timezone)
-        
-        for event in events:
-            # Send UTC ISO timestamps to the client for consistent parsing
-            events_data.append({
-                'id': event.id,
-                'title': event.title,
-                'start': event.start_time.astimezone(pytz.UTC).isoformat(),
-                'end': event.end_time.astimezone(pytz.UTC).isoformat(),
-                'description': event.description,
-                'location': event.location,
-            })
-        
-        return JsonResponse(events_data, safe=False)
-    
-    elif request.method == 'POST':
-        # Create new event
+async def _list_events(request):
+    # Get events for calendar
+    user = await request.auser()
+    start = request.GET.get('start')
+    end = request.GET.get('end')
+
+    events = Event.objects.filter(user=user)
+    window = None
+
+    if start and end:
+        try:
+            window = _parse_window(start, end)
+        except Exception:
+            pass
+        else:
+            start_dt, end_dt = window
+            events = events.filter(recurrence_rule='', start_time__lte=end_dt, end_time__gte=start_dt)
+
+    # Send UTC ISO timestamps to the client for consistent parsing
+    events_data = [
+        {
+            'id': event.id,
+            'title': event.title,
+            'start': event.start_time.astimezone(pytz.UTC).isoformat(),
+            'end': event.end_time.astimezone(pytz.UTC).isoformat(),
+            'description': event.description,
+            'location': event.location,
+            'recurrence_rule': event.recurrence_rule,
+        }
+        async for event in events
+    ]
+
+    if window:
+        # Recurring events come back as one entry per occurrence in the window
+        recurring = [event async for event in Event.objects.filter(recurring_in_window(*window), user=user)]
+        if recurring:
+            occurrences = await sync_to_async(occurrences_between)(recurring, *window)
+            events_data.extend(serialize_occurrence(o) for o in occurrences)
+
+    return JsonResponse(events_data, safe=False)
+
+
+def _create_events(request):
+    # Create new event, or a batch of them when the body is a JSON list
+    try:
         data = json.loads(request.body)
-        form = EventForm(data)
-        
-        if form.is_valid():
-            event = form.save(commit=False)
-            event.user = request.user
-            profile = get_user_profile(request.user)
-            client_tz = data.get('client_tz')
-            tz_name = client_tz or profile.timezone
-            start_time = form.cleaned_data['start_time']
-            end_time = form.cleaned_data['end_time']
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+    is_batch = isinstance(data, list)
+    items = data if is_batch else [data]
+    if not items or len(items) > EVENTS_BATCH_MAX:
+        return JsonResponse({'success': False, 'error': f'Send between 1 and {EVENTS_BATCH_MAX} events'}, status=400)
 
-            event.start_time = convert_to_utc(start_time, tz_name, treat_input_as_local=bool(client_tz))
-            event.end_time = convert_to_utc(end_time, tz_name, treat_input_as_local=bool(client_tz))
+    profile = get_user_profile(request.user)
+    events = []
+    errors = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = {'__all__': ['Each event must be a JSON object']}
+            continue
+        form = EventForm(item)
+        if not form.is_valid():
+            errors[index] = form.errors
+            continue
+        event = form.save(commit=False)
+        event.user = request.user
+        client_tz = item.get('client_tz')
+        tz_name = client_tz or profile.timezone
+        start_time = form.cleaned_data['start_time']
+        end_time = form.cleaned_data['end_time']
+
+        event.start_time = convert_to_utc(start_time, tz_name, treat_input_as_local=bool(client_tz))
+        event.end_time = convert_to_utc(end_time, tz_name, treat_input_as_local=bool(client_tz))
+        event.recurrence_timezone = tz_name if event.recurrence_rule else ''
+        events.append(event)
+    if errors:
+        return JsonResponse({'success': False, 'errors': errors if is_batch else errors[0]}, status=400)
+
+    # Overlaps are reported, not refused; one tree answers the whole batch
+    conflicts = find_conflicts(request.user, events)
+    with transaction.atomic():
+        for event in events:
             event.save()
-            return JsonResponse({'success': True, 'id': event.id})
-        else:
-            return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+        sync_event_reminders(events)
+    touch_calendars([request.user.id])
+    conflicts = {index: [describe_conflict(c) for c in found] for index, found in conflicts.items()}
+    if not is_batch:
+        return JsonResponse({'success': True, 'id': events[0].id, 'conflicts': conflicts.get(0, [])})
+    return JsonResponse({'success': True, 'ids': [event.id for event in events], 'conflicts': conflicts})
 
 
 @login_required
 @require_http_methods(["GET", "PUT", "DELETE"])
-def event_detail_api(request, event_id):
+async def event_detail_api(request, event_id):
     """API endpoint for getting, updating, or deleting a specific event"""
-    event = get_object_or_404(Event, id=event_id)
-    
-    # For PUT and DELETE, verify ownership
-    if request.method in ['PUT', 'DELETE'] and event.user != request.user:
-        return JsonResponse({'error': 'Permission denied'}, status=403)
-    
+    event = await aget_object_or_404(Event.objects.select_related('user'), id=event_id)
+
     if request.method == 'GET':
         # Return UTC ISO timestamps; client will convert/display in browser timezone
         return JsonResponse({
@@ -491,9 +703,19 @@ def event_detail_api(request, event_id):
             'creator_name': event.user.get_full_name() or event.user.username,
             'creator_email': event.user.email,
         })
-    
-    elif request.method == 'PUT':
+
+    # For PUT and DELETE, verify ownership
+    user = await request.auser()
+    if event.user_id != user.id:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    return await sync_to_async(_change_event)(request, event)
+
+
+def _change_event(request, event):
+    if request.method == 'PUT':
         data = json.loads(request.body)
+        # Partial updates (e.g. drag-and-drop) must not drop the series rule
+        data.setdefault('recurrence_rule', event.recurrence_rule)
         form = EventForm(data, instance=event)
 
         if form.is_valid():
@@ -506,20 +728,107 @@ def event_detail_api(request, event_id):
 
             updated.start_time = convert_to_utc(start_time, tz_name, treat_input_as_local=bool(client_tz))
             updated.end_time = convert_to_utc(end_time, tz_name, treat_input_as_local=bool(client_tz))
+            if updated.recurrence_rule and not updated.recurrence_timezone:
+                updated.recurrence_timezone = tz_name
+            conflicts = find_conflicts(request.user, [updated]).get(0, [])
             updated.save()
-            return JsonResponse({'success': True})
+            sync_event_reminders([updated])
+            touch_calendars([request.user.id])
+            return JsonResponse({'success': True, 'conflicts': [describe_conflict(c) for c in conflicts]})
         else:
             return JsonResponse({'success': False, 'errors': form.errors}, status=400)
     
     elif request.method == 'DELETE':
-        event.delete()
+        if event.external_calendar_type in ['joined', 'invitation']:
+            event.delete()
+            touch_calendars([request.user.id])
+        else:
+            soft_delete_event(event)
         return JsonResponse({'success': True})
 
 
+@login_required
+@require_http_methods(["POST", "DELETE"])
+def event_occurrence_api(request, event_id):
+    """Cancel, move or restore one occurrence of a recurring event (owner only)"""
+    event = get_object_or_404(
+        Event.objects.exclude(external_calendar_type__in=['joined', 'invitation']),
+        id=event_id, user=request.user,
+    )
+    if not event.is_recurring:
+        return JsonResponse({'error': 'Event is not recurring'}, status=400)
+    try:
+        data = json.loads(request.body or b'{}')
+        original_start = _parse_iso(data['original_start'])
+        new_start = _parse_iso(data['start']) if data.get('start') else None
+        new_end = _parse_iso(data['end']) if data.get('end') else None
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': 'original_start (and optional start/end) must be ISO datetimes'}, status=400)
+    if not is_occurrence(event, original_start):
+        return JsonResponse({'error': 'No occurrence starts at original_start'}, status=400)
+    if new_end and new_end <= (new_start or original_start):
+        return JsonResponse({'error': 'end must be after start'}, status=400)
+
+    if request.method == 'POST':
+        EventOccurrenceOverride.objects.update_or_create(
+            event=event, original_start=original_start,
+            defaults={
+                'cancelled': bool(data.get('cancelled')),
+                'start_time': new_start,
+                'end_time': new_end,
+                'title': data.get('title', '')[:200],
+                'location': data.get('location', '')[:200],
+            },
+        )
+    else:
+        EventOccurrenceOverride.objects.filter(event=event, original_start=original_start).delete()
+
+    # Bump updated_at on the series and every copy so cached expansions are dropped
+    series = Event.objects.filter(
+        Q(id=event.id) | Q(external_calendar_id=str(event.id), external_calendar_type__in=['joined', 'invitation'])
+    )
+    series.update(updated_at=timezone.now())
+    touch_calendars(series.values_list('user_id', flat=True))
+    # The next occurrence may have been cancelled or moved
+    sync_event_reminders(list(series))
+    return JsonResponse({'success': True})
+
+
+def _conflict_token(event):
+    """Ties a conflict confirmation to the times it was shown for"""
+    return salted_hmac(
+        'homepage.conflict_confirmation',
+        f'{event.start_time.isoformat()}|{event.end_time.isoformat()}|{event.recurrence_rule}',
+    ).hexdigest()
+
+
+def _unconfirmed_conflicts(request, form, event, tz_name):
+    """Overlaps for a form submission, flagged on the form until the user confirms them.
+
+    A confirmation only counts for the times it was given for, so moving
+    the event to another conflicting slot warns again.
+    """
+    if constant_time_compare(request.POST.get('confirm_conflicts', ''), _conflict_token(event)):
+        return []
+    overlaps = find_conflicts(request.user, [event]).get(0, [])
+    if not overlaps:
+        return []
+    form.add_error(None, 'This event overlaps other events on your calendar. Save again to keep it anyway.')
+    user_tz = get_timezone(tz_name)
+    return [
+        {
+            'title': other.title,
+            'when': f"{start.astimezone(user_tz):%b %d, %I:%M %p} - {end.astimezone(user_tz):%I:%M %p}",
+        }
+        for other, start, end in overlaps
+    ]
+
+
 @login_required
 def create_event_view(request):
     """View for creating a new event"""
     profile = get_user_profile(request.user)
+    conflicts = []
     
     if request.method == 'POST':
         form = EventForm(request.POST)
@@ -532,53 +841,31 @@ def create_event_view(request):
             
             event.start_time = convert_to_utc(start_time, client_tz, treat_input_as_local=True)
             event.end_time = convert_to_utc(end_time, client_tz, treat_input_as_local=True)
+            event.recurrence_timezone = client_tz if event.recurrence_rule else ''
             
             # Get invitation link from form (generated by JavaScript)
             invitation_link = request.POST.get('invitation_link', '')
             if invitation_link:
                 event.invitation_link = invitation_link
             
-            event.save()
+            conflicts = _unconfirmed_conflicts(request, form, event, client_tz)
+            if not conflicts:
+                event.save()
+                sync_event_reminders([event])
+                touch_calendars([request.user.id])
             
-            # Send invitations to participants
-            if event.invite_participants:
-                participant_emails = [email.strip() for email in event.invite_participants.split(',') if email.strip()]
-                invited_count = 0
-                for email in participant_emails:
-                    # Find user by email
-                    try:
-                        invited_user = User.objects.get(email=email)
-                        # Create event invitation notification for the invited user
-                        Notification.objects.create(
-                            user=invited_user,
-                            title=f"Event Invitation: {event.title}",
-                            message=f"{request.user.username} has invited you to '{event.title}' on {event.start_time.strftime('%Y-%m-%d %H:%M UTC')}. Location: {event.location or 'Not specified'}",
-                            notification_type='event_invitation',
-                            event=event,
-                            invitation_status='pending',
-                            delivery_method='web',
-                            delivery_status='sent'
-                        )
-                        invalidate_user_cache(invited_user.id)  # Clear cache for invited user
-                        invited_count += 1
-                    except User.DoesNotExist:
-                        pass  # Skip if user not found
-                
-                # Create a confirmation notification for the event creator
-                if invited_count > 0:
-                    Notification.objects.create(
-                        user=request.user,
-                        title=f"Invitations Sent for {event.title}",
-                        message=f"You have successfully sent {invited_count} invitation(s) for '{event.title}'",
-                        notification_type='event',
-                        event=event,
-                        delivery_method='web',
-                        delivery_status='sent'
-                    )
+                # Send invitations to participants (plus a confirmation for the creator)
+                if event.invite_participants:
+                    enqueue_on_commit('send_event_invitations', {
+                        'event_id': event.id,
+                        'inviter_id': request.user.id,
+                        'emails': event.invite_participants.split(','),
+                        'confirmation_message': "You have successfully sent {count} invitation(s) for '{title}'",
+                    }, priority=10)
             
-            invalidate_user_cache(request.user.id)  # Clear cache
-            messages.success(request, 'Event created successfully.')
-            return redirect('homepage:calendar')
+                invalidate_user_cache(request.user.id)  # Clear cache
+                messages.success(request, 'Event created successfully.')
+                return redirect('homepage:calendar')
     else:
         form = EventForm()
         # Prefill from calendar interactions
@@ -626,6 +913,8 @@ def create_event_view(request):
         'form': form,
         'profile': profile,
         'unread_count': unread_count,
+        'conflicts': conflicts,
+        'conflict_token': _conflict_token(event) if conflicts else '',
     })
 
 
@@ -635,6 +924,7 @@ def edit_event_view(request, event_id):
     event = get_object_or_404(Event, id=event_id, user=request.user)
     profile = get_user_profile(request.user)
     user_tz = pytz.timezone(profile.timezone)
+    conflicts = []
     
     # Check if this is an invited/joined event (user is participant) or original event (user is owner)
     is_invited = event.external_calendar_type in ['joined', 'invitation']
@@ -647,7 +937,7 @@ def edit_event_view(request, event_id):
     # Convert UTC to user's timezone for form
     if request.method == 'POST':
         # Store old participants before form modifies the event
-        old_participants = set(event.invite_participants.split(',')) if event.invite_participants else set()
+        old_participants = {normalize_email(email) for email in (event.invite_participants or '').split(',')}
         
         form = EventForm(request.POST, instance=event)
         if form.is_valid():
@@ -658,69 +948,39 @@ def edit_event_view(request, event_id):
             
             event.start_time = convert_to_utc(start_time, client_tz, treat_input_as_local=True)
             event.end_time = convert_to_utc(end_time, client_tz, treat_input_as_local=True)
+            event.recurrence_timezone = client_tz if event.recurrence_rule else ''
             
             # Get invitation link from form (generated/regenerated by JavaScript)
             invitation_link = request.POST.get('invitation_link', '')
             if invitation_link:
                 event.invitation_link = invitation_link
             
-            event.save()
-            
-            # Update all invitees' copied events with the new details
-            invitee_events = Event.objects.filter(
-                external_calendar_id=str(event.id),
-                external_calendar_type__in=['joined', 'invitation']
-            )
-            for invitee_event in invitee_events:
-                invitee_event.title = event.title
-                invitee_event.description = event.description
-                invitee_event.start_time = event.start_time
-                invitee_event.end_time = event.end_time
-                invitee_event.location = event.location
-                invitee_event.save()
+            conflicts = _unconfirmed_conflicts(request, form, event, client_tz)
+            if not conflicts:
+                event.save()
             
-            # Check if participants were updated
-            new_participants = set(event.invite_participants.split(',')) if event.invite_participants else set()
+                sync_event_reminders([event])
+                touch_calendars([request.user.id])
+                # Invitees' copies (and their reminders) are updated by the worker
+                enqueue_on_commit('propagate_event_update', {'event_id': event.id}, priority=5)
             
-            # Send invitations to new participants only
-            newly_added = new_participants - old_participants
-            invited_count = 0
-            for email in newly_added:
-                email = email.strip()
-                if email:
-                    try:
-                        invited_user = User.objects.get(email=email)
-                        # Create event invitation notification
-                        Notification.objects.create(
-                            user=invited_user,
-                            title=f"Event Invitation: {event.title}",
-                            message=f"{request.user.username} has invited you to '{event.title}' on {event.start_time.strftime('%Y-%m-%d %H:%M UTC')}. Location: {event.location or 'Not specified'}",
-                            notification_type='event_invitation',
-                            event=event,
-                            invitation_status='pending',
-                            delivery_method='web',
-                            delivery_status='sent'
-                        )
-                        invalidate_user_cache(invited_user.id)  # Clear cache for invited user
-                        invited_count += 1
-                    except User.DoesNotExist:
-                        pass  # Skip if user not found
+                # Check if participants were updated
+                # Compared case-insensitively so re-casing an address doesn't re-invite
+                new_participants = {normalize_email(email) for email in (event.invite_participants or '').split(',')}
             
-            # Create a confirmation notification for the event creator if new invitations were sent
-            if invited_count > 0:
-                Notification.objects.create(
-                    user=request.user,
-                    title=f"Invitations Sent for {event.title}",
-                    message=f"You have successfully sent {invited_count} new invitation(s) for '{event.title}'",
-                    notification_type='event',
-                    event=event,
-                    delivery_method='web',
-                    delivery_status='sent'
-                )
+                # Send invitations to new participants only
+                newly_added = new_participants - old_participants - {''}
+                if newly_added:
+                    enqueue_on_commit('send_event_invitations', {
+                        'event_id': event.id,
+                        'inviter_id': request.user.id,
+                        'emails': sorted(newly_added),
+                        'confirmation_message': "You have successfully sent {count} new invitation(s) for '{title}'",
+                    }, priority=10)
             
-            invalidate_user_cache(request.user.id)  # Clear cache
-            messages.success(request, 'Event updated successfully. All invitees have been notified of the changes.')
-            return redirect('homepage:calendar')
+                invalidate_user_cache(request.user.id)  # Clear cache
+                messages.success(request, 'Event updated successfully. All invitees have been notified of the changes.')
+                return redirect('homepage:calendar')
     else:
         # Convert UTC times to user's timezone for display
         form = EventForm(instance=event)
@@ -738,6 +998,8 @@ def edit_event_view(request, event_id):
         'profile': profile,
         'unread_count': unread_count,
         'is_invited': is_invited,
+        'conflicts': conflicts,
+        'conflict_token': _conflict_token(event) if conflicts else '',
     })
 
 
@@ -759,19 +1021,13 @@ def delete_event_view(request, event_id):
         if is_participant:
             # Participant removing event from their calendar only
             event.delete()
+            touch_calendars([request.user.id])
             invalidate_user_cache(request.user.id)
             messages.success(request, 'Event removed from your calendar.')
         else:
-            # Creator deleting the original event - also delete all related notifications and invitee events
-            Notification.objects.filter(event=event).delete()
-            
-            # Delete all events created by invitees who accepted this invitation
-            Event.objects.filter(
-                external_calendar_id=str(event.id),
-                external_calendar_type__in=['joined', 'invitation']
-            ).delete()
-            
-            event.delete()
+            # Creator deleting the original event - hide it and every invitee copy now;
+            # the rows, reminders and notifications are purged in the background
+            soft_delete_event(event)
             invalidate_user_cache(request.user.id)
             messages.success(request, 'Event deleted successfully.')
         return redirect('homepage:calendar')
@@ -789,94 +1045,251 @@ def delete_event_view(request, event_id):
 # API Views for Profile Management
 @login_required
 @require_http_methods(["GET", "PUT"])
-def profile_api(request):
+async def profile_api(request):
     """API endpoint for getting and updating user profile"""
+    if request.method == 'PUT':
+        return await sync_to_async(_update_profile)(request)
+    user = await request.auser()
+    profile = await aget_user_profile(user)
+
+    # Return profile data as JSON
+    profile_data = {
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'timezone': profile.timezone,
+        'email_notifications': profile.email_notifications,
+        'web_notifications': profile.web_notifications,
+        'bio': profile.bio,
+        'phone': profile.phone,
+        'location': profile.location,
+        'avatar': profile.avatar_url,
+        'avatar_thumbnails': profile.avatar_thumbnails,
+        'created_at': profile.created_at.isoformat() if profile.created_at else None,
+        'updated_at': profile.updated_at.isoformat() if profile.updated_at else None,
+    }
+    return JsonResponse(profile_data)
+
+
+def _update_profile(request):
     user = request.user
-    profile = get_user_profile(user)
-    
-    if request.method == 'GET':
-        # Return profile data as JSON
-        profile_data = {
-            'username': user.username,
-            'email': user.email,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'timezone': profile.timezone,
-            'email_notifications': profile.email_notifications,
-            'web_notifications': profile.web_notifications,
-            'bio': profile.bio,
-            'phone': profile.phone,
-            'location': profile.location,
-            'avatar': profile.avatar.url if profile.avatar else None,
-            'created_at': profile.created_at.isoformat() if profile.created_at else None,
-            'updated_at': profile.updated_at.isoformat() if profile.updated_at else None,
-        }
-        return JsonResponse(profile_data)
-    
-    elif request.method == 'PUT':
-        # Update profile
-        try:
-            data = json.loads(request.body)
-            
-            # Update user fields
-            if 'first_name' in data:
-                user.first_name = data['first_name']
-            if 'last_name' in data:
-                user.last_name = data['last_name']
-            if 'email' in data:
-                user.email = data['email']
-            user.save()
-            
-            # Update profile fields
-            if 'timezone' in data:
-                profile.timezone = data['timezone']
-            if 'email_notifications' in data:
-                profile.email_notifications = data['email_notifications']
-            if 'web_notifications' in data:
-                profile.web_notifications = data['web_notifications']
-            if 'bio' in data:
-                profile.bio = data['bio']
-            if 'phone' in data:
-                profile.phone = data['phone']
-            if 'location' in data:
-                profile.location = data['location']
-            profile.save()
-            invalidate_user_cache(user.id)  # Clear cache
-            
-            return JsonResponse({'success': True, 'message': 'Profile updated successfully'})
-        except Exception as e:
-            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    profile = load_user_profile(user)
+    # Update profile
+    try:
+        data = json.loads(request.body)
+        
+        # Update user fields
+        renamed = any(field in data and data[field] != getattr(user, field) for field in CALENDAR_NAME_FIELDS)
+        if 'first_name' in data:
+            user.first_name = data['first_name']
+        if 'last_name' in data:
+            user.last_name = data['last_name']
+        if 'email' in data:
+            user.email = data['email']
+        user.save()
+        if renamed:
+            touch_calendars([user.id])  # The feed's calendar name changed
+        
+        # Update profile fields
+        if 'timezone' in data:
+            profile.timezone = data['timezone']
+        if 'email_notifications' in data:
+            profile.email_notifications = data['email_notifications']
+        if 'web_notifications' in data:
+            profile.web_notifications = data['web_notifications']
+        if 'bio' in data:
+            profile.bio = data['bio']
+        if 'phone' in data:
+            profile.phone = data['phone']
+        if 'location' in data:
+            profile.location = data['location']
+        profile.save()
+        invalidate_user_cache(user.id)  # Clear cache
+        
+        return JsonResponse({'success': True, 'message': 'Profile updated successfully'})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
 @login_required
 @require_http_methods(["GET"])
-def search_users_api(request):
+async def search_users_api(request):
     """API endpoint to search for registered users"""
+    user = await request.auser()
     query = request.GET.get('q', '').strip()
-    
-    if len(query) < 2:
-        return JsonResponse({'users': []})
-    
-    # Search by username or email
-    from django.contrib.auth.models import User
-    users = User.objects.filter(
-        Q(username__icontains=query) | 
-        Q(email__icontains=query) |
-        Q(first_name__icontains=query) |
-        Q(last_name__icontains=query)
-    ).exclude(id=request.user.id)[:10]  # Exclude current user, limit to 10 results
-    
-    users_data = []
-    for user in users:
-        full_name = f"{user.first_name} {user.last_name}".strip()
-        users_data.append({
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'full_name': full_name if full_name else None,
-        })
-    
-    return JsonResponse({'users': users_data})
+    # Prefix match on any word of the username, email or name (see homepage/directory.py)
+    return JsonResponse({'users': await asearch_users(query, exclude_id=user.id)})
+
+
+@login_required
+@require_http_methods(["GET"])
+def search_events_api(request):
+    """Full-text search over the user's events, best match first.
+
+    Query params: ``q``, optional ``limit`` and the ``after`` cursor from the
+    previous page.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', EVENT_SEARCH_PAGE_SIZE)), 1), 100)
+    except ValueError:
+        limit = EVENT_SEARCH_PAGE_SIZE
+    try:
+        results, next_cursor = search_events(request.user, query, limit, request.GET.get('after'))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    return JsonResponse({
+        'results': [
+            {
+                'id': event.id,
+                'title': event.title,
+                'start': event.start_time.astimezone(pytz.UTC).isoformat(),
+                'end': event.end_time.astimezone(pytz.UTC).isoformat(),
+                'description': event.description,
+                'location': event.location,
+                'recurrence_rule': event.recurrence_rule,
+                'score': score,
+            }
+            for event, score in results
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
+def _serialize_import(event_import):
+    return {
+        'id': event_import.id,
+        'status': event_import.status,
+        'format': event_import.file_format,
+        'error': event_import.error,
+        'created_at': event_import.created_at.isoformat(),
+        'finished_at': event_import.finished_at.isoformat() if event_import.finished_at else None,
+        **{key: event_import.stats.get(key, 0) for key in ('processed', 'imported', 'skipped', 'overrides')},
+        'errors': event_import.stats.get('errors', []),
+        'warnings': event_import.stats.get('warnings', []),
+    }
+
+
+@login_required
+@require_http_methods(["POST"])
+def import_events_api(request):
+    """Queue an uploaded .ics or .csv file for import into the user's calendar.
+
+    The file is stored and imported by a background job; poll the returned
+    ``status_url`` for progress and the outcome. Re-uploading the same file
+    updates the events it created instead of duplicating them. Floating
+    times are read in ``client_tz`` or the user's profile timezone.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'success': False, 'error': 'Attach a .ics or .csv file as "file"'}, status=400)
+    tz_name = request.POST.get('client_tz') or get_user_profile(request.user).timezone
+    if tz_name not in pytz.all_timezones_set:
+        return JsonResponse({'success': False, 'error': f'Unknown timezone {tz_name}'}, status=400)
+    fmt = detect_format(upload.name, request.POST.get('format'))
+    with transaction.atomic():
+        event_import = EventImport(user=request.user, file_format=fmt, timezone=tz_name)
+        # A random name: the upload is private until the job deletes it
+        event_import.file.save(f'{uuid.uuid4().hex}.{fmt}', upload)
+        enqueue_on_commit('import_events', {'import_id': event_import.id})
+    return JsonResponse({
+        'success': True,
+        'import': _serialize_import(event_import),
+        'status_url': reverse('homepage:event_import_api', args=[event_import.id]),
+    }, status=202)
+
+
+@login_required
+@require_http_methods(["GET"])
+def event_import_api(request, import_id):
+    """Progress and results of one of the user's imports"""
+    event_import = get_object_or_404(EventImport, id=import_id, user=request.user)
+    return JsonResponse({'success': True, 'import': _serialize_import(event_import)})
+
+
+@login_required
+@require_http_methods(["GET"])
+def freebusy_api(request):
+    """Busy blocks for the requester and the given invitees over a window.
+
+    Query params: ``emails`` (comma-separated), ``start`` and ``end`` (ISO).
+    """
+    try:
+        window_start, window_end = _parse_window(request.GET['start'], request.GET['end'])
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'start and end must be ISO datetimes'}, status=400)
+    if window_end <= window_start or window_end - window_start > FREEBUSY_MAX_WINDOW:
+        return JsonResponse({'error': f'Window must be positive and at most {FREEBUSY_MAX_WINDOW.days} days'}, status=400)
+    emails = [email.strip() for email in request.GET.get('emails', '').split(',') if email.strip()]
+    if len(emails) > FREEBUSY_MAX_USERS:
+        return JsonResponse({'error': f'At most {FREEBUSY_MAX_USERS} users per request'}, status=400)
+
+    users = [request.user] + list(users_with_emails(emails).exclude(id=request.user.id))
+    result = free_busy([user.id for user in users], window_start, window_end)
+
+    def block(start, end):
+        return {'start': start.astimezone(pytz.UTC).isoformat(), 'end': end.astimezone(pytz.UTC).isoformat()}
+
+    found = {normalize_email(user.email) for user in users}
+    return JsonResponse({
+        'start': window_start.astimezone(pytz.UTC).isoformat(),
+        'end': window_end.astimezone(pytz.UTC).isoformat(),
+        'users': [
+            {
+                'id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'busy': [block(*interval) for interval in result['users'][user.id]],
+            }
+            for user in users
+        ],
+        'overall': [
+            dict(block(start, end), busy_count=len(busy), user_ids=sorted(busy))
+            for start, end, busy in result['overall']
+        ],
+        'unknown_emails': [email for email in emails if normalize_email(email) not in found],
+    })
+
+
+@login_required
+@require_http_methods(["GET"])
+def meeting_slots_api(request):
+    """Suggest meeting times that fit the requester's and invitees' working hours.
+
+    Query params: ``emails`` (comma-separated), ``duration`` (minutes),
+    ``start`` and ``end`` (ISO) bounding the search.
+    """
+    try:
+        window_start, window_end = _parse_window(request.GET['start'], request.GET['end'])
+        duration = timedelta(minutes=int(request.GET.get('duration', 30)))
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'start and end must be ISO datetimes and duration whole minutes'}, status=400)
+    window_start = max(window_start, timezone.now())
+    if window_end <= window_start or window_end - window_start > FREEBUSY_MAX_WINDOW:
+        return JsonResponse({'error': f'Window must be in the future and at most {FREEBUSY_MAX_WINDOW.days} days'}, status=400)
+    if not timedelta(minutes=5) <= duration <= timedelta(hours=8):
+        return JsonResponse({'error': 'Duration must be between 5 and 480 minutes'}, status=400)
+    emails = [email.strip() for email in request.GET.get('emails', '').split(',') if email.strip()]
+    if len(emails) > FREEBUSY_MAX_USERS:
+        return JsonResponse({'error': f'At most {FREEBUSY_MAX_USERS} users per request'}, status=400)
+
+    users = [request.user] + list(users_with_emails(emails).exclude(id=request.user.id))
+    emails_by_id = {user.id: user.email for user in users}
+    slots = find_slots(list(emails_by_id), duration, window_start, window_end)
+    return JsonResponse({
+        'slots': [
+            {
+                'start': slot['start'].isoformat(),
+                'end': slot['end'].isoformat(),
+                'available': [emails_by_id[user_id] for user_id in slot['available']],
+                'unavailable': [emails_by_id[user_id] for user_id in slot['unavailable']],
+                'offset_hours': slot['offset_hours'],
+            }
+            for slot in slots
+        ],
+        'participants': len(users),
+    })
 
 
 @login_required
@@ -902,7 +1315,8 @@ def meeting_invitation_view(request, token, event_id=None):
     
     # Check if user is the organizer or invited participant
     is_organizer = event.user == request.user
-    is_invited = request.user.email in event.invite_participants if event.invite_participants else False
+    invited = {normalize_email(email) for email in (event.invite_participants or '').split(',')}
+    is_invited = bool(request.user.email) and normalize_email(request.user.email) in invited
     
     unread_count = get_unread_count(request.user)
     
@@ -966,20 +1380,22 @@ def join_event_view(request):
             start_time=event.start_time,
             end_time=event.end_time,
             location=event.location,
+            recurrence_rule=event.recurrence_rule,
+            recurrence_timezone=event.recurrence_timezone,
             user=request.user,
             external_calendar_id=str(event.id),  # Reference to original event
             external_calendar_type='joined'
         )
+        sync_event_reminders([new_event])
+        touch_calendars([request.user.id])
         
         # Create a notification
-        Notification.objects.create(
+        create_notification(
             user=request.user,
             title='Event Added to Calendar',
             message=f'You have successfully joined "{event.title}"',
             notification_type='event',
-            event=new_event,
-            delivery_method='web',
-            delivery_status='sent'
+            event=new_event
         )
         
         invalidate_user_cache(request.user.id)
@@ -1006,7 +1422,7 @@ def accept_invitation_view(request, notification_id):
     if notification.invitation_status != 'pending':
         return JsonResponse({'success': False, 'error': 'Invitation already responded to'}, status=400)
     
-    if not notification.event:
+    if not notification.event or notification.event.deleted_at:
         return JsonResponse({'success': False, 'error': 'Event not found'}, status=404)
     
     event = notification.event
@@ -1024,11 +1440,7 @@ def accept_invitation_view(request, notification_id):
     
     if existing_event:
         # Update notification status even if already joined
-        notification.invitation_status = 'accepted'
-        notification.is_read = True
-        notification.read_at = timezone.now()
-        notification.save()
-        invalidate_user_cache(request.user.id)
+        set_invitation_status(notification, 'accepted')
         
         return JsonResponse({
             'success': True,
@@ -1043,30 +1455,27 @@ def accept_invitation_view(request, notification_id):
         start_time=event.start_time,
         end_time=event.end_time,
         location=event.location,
+        recurrence_rule=event.recurrence_rule,
+        recurrence_timezone=event.recurrence_timezone,
         user=request.user,
         external_calendar_id=str(event.id),
         external_calendar_type='invitation'
     )
+    sync_event_reminders([new_event])
+    touch_calendars([request.user.id])
     
     # Update notification status
-    notification.invitation_status = 'accepted'
-    notification.is_read = True
-    notification.read_at = timezone.now()
-    notification.save()
+    set_invitation_status(notification, 'accepted')
     
     # Create a confirmation notification
-    Notification.objects.create(
+    create_notification(
         user=request.user,
         title='Invitation Accepted',
         message=f'You have accepted the invitation for "{event.title}"',
         notification_type='event',
-        event=new_event,
-        delivery_method='web',
-        delivery_status='sent'
+        event=new_event
     )
     
-    invalidate_user_cache(request.user.id)
-    
     return JsonResponse({
         'success': True,
         'message': 'Invitation accepted and event added to your calendar',
@@ -1084,12 +1493,7 @@ def reject_invitation_view(request, notification_id):
         return JsonResponse({'success': False, 'error': 'Invitation already responded to'}, status=400)
     
     # Update notification status
-    notification.invitation_status = 'rejected'
-    notification.is_read = True
-    notification.read_at = timezone.now()
-    notification.save()
-    
-    invalidate_user_cache(request.user.id)
+    set_invitation_status(notification, 'rejected')
     
     return JsonResponse({
         'success': True,